@@ -5,11 +5,14 @@ from flask_bcrypt import Bcrypt
 from flask_mail import Mail
 from config import Config
 from models import db
-from routes.auth import auth_bp, bcrypt
+from routes.auth import auth_bp
 from routes.posts import posts_bp
 from routes.replies import replies_api
 from routes.comments import comments_api
-from services.file_upload import init_cloudinary
+from services.storage import init_storage
+from services.cache import init_cache
+from services.serialization import init_serialization
+from services.passwords import init_passwords
 from routes.categories import categories_bp
 from routes.follows import follows_api
 from routes.subscriptions import subscriptions_bp
@@ -24,6 +27,9 @@ from routes.search import search_bp
 from routes.signalement import bp_signalement 
 from routes.warn import warn_bp
 from routes.classement import classement_bp
+from routes.maintenance import maintenance_bp
+from routes.media import media_bp
+from routes.uploads import uploads_bp
 
 from routes.websocket_chat import init_socketio
 
@@ -32,13 +38,16 @@ mail = Mail()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    init_serialization(app)
     
     db.init_app(app)
     jwt = JWTManager(app)
     CORS(app)
     mail.init_app(app)
     
-    init_cloudinary(app)
+    init_storage(app)
+    init_cache(app)
+    init_passwords(app)
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(posts_bp)
@@ -58,6 +67,9 @@ def create_app(config_class=Config):
     app.register_blueprint(bp_signalement) 
     app.register_blueprint(warn_bp)
     app.register_blueprint(classement_bp)
+    app.register_blueprint(maintenance_bp)
+    app.register_blueprint(media_bp)
+    app.register_blueprint(uploads_bp)
 
     socketio = init_socketio(app)
 
@@ -69,6 +81,14 @@ def create_app(config_class=Config):
         from models.reply_like import ReplyLike
         from models.subscription import Subscription
         from models.favorite import Favorite
+        from models.timeline import TimelineEntry
+        from models.conversation import Conversation, ConversationParticipant
+        from models.search import SearchDocument, SearchTerm
+        from models.leaderboard import FollowerRollup
+        from models.media_asset import MediaAsset
+        from models.upload_ticket import UploadTicket
+        from models.poll_tally import PollTally
+        from models.notification_actor import NotificationActor
         db.create_all()
     
     return app, socketio
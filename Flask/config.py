@@ -15,6 +15,67 @@ class Config:
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+    # Stockage des médias : 'cloudinary' ou 'local' (disque adressé par contenu, servi par /api/media)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'cloudinary'
+    LOCAL_STORAGE_ROOT = os.environ.get('LOCAL_STORAGE_ROOT') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media')
+    LOCAL_STORAGE_URL = os.environ.get('LOCAL_STORAGE_URL') or 'http://localhost:5000/api/media'
+    LOCAL_STORAGE_MAX_AGE = int(os.environ.get('LOCAL_STORAGE_MAX_AGE') or 365 * 24 * 3600)
+    # Délègue l'envoi des fichiers au serveur frontal (nginx, X-Sendfile)
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'False').lower() in ['true', 'on', '1']
+
+    # Téléversement des médias : pool borné, délai par fichier (s), mode différé (lignes 'pending')
+    MEDIA_UPLOAD_WORKERS = int(os.environ.get('MEDIA_UPLOAD_WORKERS') or 8)
+    MEDIA_UPLOAD_TIMEOUT = int(os.environ.get('MEDIA_UPLOAD_TIMEOUT') or 30)
+    MEDIA_UPLOAD_ASYNC = os.environ.get('MEDIA_UPLOAD_ASYNC', 'False').lower() in ['true', 'on', '1']
+    MEDIA_SPOOL_MAX_MEMORY = int(os.environ.get('MEDIA_SPOOL_MAX_MEMORY') or 1024 * 1024)
+    # Compression des réponses JSON (brotli si disponible, sinon gzip) au-delà de COMPRESS_MIN_SIZE octets ;
+    # les niveaux par défaut privilégient le temps CPU sur le taux de compression
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_MIMETYPES = ['application/json', 'text/plain', 'text/html']
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL') or 5)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 4)
+
+    # Cache de réponses des GET les plus lus : LRU local, couche partagée optionnelle
+    # (redis://..., memory:// pour les tests), durée de vie par défaut en secondes
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True').lower() in ['true', 'on', '1']
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX') or 'cache'
+    CACHE_LOCAL_SIZE = int(os.environ.get('CACHE_LOCAL_SIZE') or 1024)
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 60)
+    CACHE_LEADERBOARD_TTL = int(os.environ.get('CACHE_LEADERBOARD_TTL') or 30)
+
+    # GET conditionnels (ETag faible, Last-Modified, 304) ; changer ETAG_VERSION quand le format
+    # d'une réponse change, pour que les clients ne revalident pas une ancienne représentation
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'True').lower() in ['true', 'on', '1']
+    ETAG_VERSION = os.environ.get('ETAG_VERSION') or '1'
+
+    # Résultats des sondages en direct (room poll_{id}) : au plus une diffusion par sondage et par intervalle (s),
+    # instantané gardé POLL_SNAPSHOT_TTL secondes pour les clients qui rejoignent la room
+    POLL_RESULTS_LIVE = os.environ.get('POLL_RESULTS_LIVE', 'True').lower() in ['true', 'on', '1']
+    POLL_RESULTS_INTERVAL = float(os.environ.get('POLL_RESULTS_INTERVAL') or 0.5)
+    POLL_SNAPSHOT_TTL = float(os.environ.get('POLL_SNAPSHOT_TTL') or 2.0)
+
+    # Coût bcrypt par environnement (2^n itérations, 12 par défaut ; 4 suffit en test) : les
+    # hachages à un autre coût sont recalculés à la connexion suivante. Calculs hors de la boucle
+    # du serveur, sur PASSWORD_HASH_WORKERS threads système (un par cœur par défaut)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 12)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 2)
+
+    # Déclinaisons des images (miniatures WebP, aperçu flou) calculées dans un pool de processus
+    MEDIA_DERIVATIVES = os.environ.get('MEDIA_DERIVATIVES', 'True').lower() in ['true', 'on', '1']
+    MEDIA_DERIVATIVE_WORKERS = int(os.environ.get('MEDIA_DERIVATIVE_WORKERS') or 2)
+    MEDIA_DERIVATIVE_WIDTHS = [int(width) for width in (os.environ.get('MEDIA_DERIVATIVE_WIDTHS') or '320,640,1280').split(',')]
+    MEDIA_DERIVATIVE_QUALITY = int(os.environ.get('MEDIA_DERIVATIVE_QUALITY') or 80)
+    MEDIA_DERIVATIVE_TIMEOUT = int(os.environ.get('MEDIA_DERIVATIVE_TIMEOUT') or 60)
+    MEDIA_PLACEHOLDER_WIDTH = int(os.environ.get('MEDIA_PLACEHOLDER_WIDTH') or 16)
+
+    # Téléversement direct vers le stockage : durée de validité des tickets et taille maximale par abonnement
+    UPLOAD_TICKET_TTL = int(os.environ.get('UPLOAD_TICKET_TTL') or 600)
+    UPLOAD_MAX_SIZE_FREE = int(os.environ.get('UPLOAD_MAX_SIZE_FREE') or 10 * 1024 * 1024)
+    UPLOAD_MAX_SIZE_PLUS = int(os.environ.get('UPLOAD_MAX_SIZE_PLUS') or 50 * 1024 * 1024)
+    UPLOAD_MAX_SIZE_PREMIUM = int(os.environ.get('UPLOAD_MAX_SIZE_PREMIUM') or 100 * 1024 * 1024)
+
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'True').lower() in ['true', 'on', '1']
@@ -25,4 +86,51 @@ class Config:
     FRONTEND_URL = os.environ.get('FRONTEND_URL')
 
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
-    STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
\ No newline at end of file
+    STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+
+    TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get('TIMELINE_FANOUT_MAX_FOLLOWERS') or 5000)
+    TIMELINE_BACKFILL_SIZE = int(os.environ.get('TIMELINE_BACKFILL_SIZE') or 200)
+
+    THREAD_MAX_DEPTH = int(os.environ.get('THREAD_MAX_DEPTH') or 8)
+    THREAD_FANOUT = int(os.environ.get('THREAD_FANOUT') or 50)
+
+    CHAT_PAGE_SIZE = int(os.environ.get('CHAT_PAGE_SIZE') or 50)
+    CHAT_MAX_PAGE_SIZE = int(os.environ.get('CHAT_MAX_PAGE_SIZE') or 200)
+
+    NOTIFICATIONS_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_PAGE_SIZE') or 20)
+    NOTIFICATIONS_MAX_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_MAX_PAGE_SIZE') or 100)
+    # Agrégation : fenêtre de regroupement (s) et nombre d'acteurs affichés par groupe
+    NOTIFICATIONS_GROUP_WINDOW = int(os.environ.get('NOTIFICATIONS_GROUP_WINDOW') or 6 * 3600)
+    NOTIFICATIONS_SAMPLE_ACTORS = int(os.environ.get('NOTIFICATIONS_SAMPLE_ACTORS') or 3)
+    # Tampon d'écriture : les événements proches sont fusionnés avant l'upsert
+    NOTIFICATIONS_BUFFERED = os.environ.get('NOTIFICATIONS_BUFFERED', 'True').lower() in ['true', 'on', '1']
+    NOTIFICATIONS_BUFFER_SIZE = int(os.environ.get('NOTIFICATIONS_BUFFER_SIZE') or 10000)
+    NOTIFICATIONS_FLUSH_INTERVAL = float(os.environ.get('NOTIFICATIONS_FLUSH_INTERVAL') or 1.0)
+    NOTIFICATIONS_BATCH_SIZE = int(os.environ.get('NOTIFICATIONS_BATCH_SIZE') or 500)
+
+    # File de messages Socket.IO (redis://..., memory:// pour les tests) ; vide = un seul worker
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL') or 'flask-socketio'
+    SOCKETIO_PRESENCE_URL = os.environ.get('SOCKETIO_PRESENCE_URL') or os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+
+    # Mode asynchrone Socket.IO : eventlet, gevent ou threading (vide = détection automatique)
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE') or None
+    WORKER_CONNECTIONS = int(os.environ.get('WORKER_CONNECTIONS') or 1000)
+
+    # File d'écriture différée des messages du chat, une file par worker et une conversation par worker
+    CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND', 'True').lower() in ['true', 'on', '1']
+    CHAT_WRITE_QUEUE_SIZE = int(os.environ.get('CHAT_WRITE_QUEUE_SIZE') or 10000)
+    CHAT_WRITE_WORKERS = int(os.environ.get('CHAT_WRITE_WORKERS') or 4)
+    CHAT_WRITE_BATCH_SIZE = int(os.environ.get('CHAT_WRITE_BATCH_SIZE') or 100)
+
+    # Les greenlets partagent le pool : une connexion par writer plus une marge pour les requêtes HTTP,
+    # les autres attendent pool_timeout au lieu d'ouvrir une connexion par client
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or CHAT_WRITE_WORKERS + 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or DB_POOL_SIZE)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 10)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_pre_ping': True
+    } if (SQLALCHEMY_DATABASE_URI or '').startswith('postgres') else {}
\ No newline at end of file
@@ -14,6 +14,10 @@ class Chat(db.Model):
     sender = db.relationship('User', backref=db.backref('sent_chats', lazy=True))
     reply_to = db.relationship('Chat', remote_side=[id], backref='replies')
     
+    __table_args__ = (
+        db.Index('ix_chats_conversation_send_at_id', 'conversation_id', 'send_at', 'id'),
+    )
+    
     def __init__(self, conversation_id, sender_id, content, reply_to_id=None):
         self.conversation_id = int(conversation_id) if conversation_id else None
         self.sender_id = int(sender_id) if sender_id else None
@@ -8,3 +8,7 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    replies_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Modifiée aussi par les compteurs (mentions J'aime, réponses) : validateur HTTP du fil
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,5 @@
 from models import db
+from models.media_asset import MediaAsset, track_asset_references
 from datetime import datetime
 
 class CommentMedia(db.Model):
@@ -8,6 +9,14 @@ class CommentMedia(db.Model):
     comment_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=False)
     media_type = db.Column(db.String(50), nullable=False)
     media_url = db.Column(db.Text, nullable=False)
+    # 'pending' tant que le téléversement différé n'est pas terminé, puis 'ready' ou 'failed'
+    status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    # Fichier partagé (déduplication par contenu), NULL pour les médias antérieurs
+    asset_id = db.Column(db.Integer, db.ForeignKey('media_assets.id'), nullable=True, index=True)
+    # Chargé par jointure avec le média : les déclinaisons n'ajoutent pas de requête
+    asset = db.relationship(MediaAsset, lazy='joined')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    comment = db.relationship('Comment', backref=db.backref('media', lazy=True, cascade='all, delete-orphan'))
\ No newline at end of file
+    comment = db.relationship('Comment', backref=db.backref('media', lazy=True, cascade='all, delete-orphan'))
+
+track_asset_references(CommentMedia)
@@ -0,0 +1,31 @@
+from models import db
+from datetime import datetime, timezone
+
+class Conversation(db.Model):
+    __tablename__ = 'conversations'
+    
+    # Même identifiant que Chat.conversation_id
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('chats.id', ondelete='SET NULL'), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    messages_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    participants = db.relationship('ConversationParticipant', backref='conversation', lazy=True, cascade='all, delete-orphan')
+
+class ConversationParticipant(db.Model):
+    __tablename__ = 'conversation_participants'
+    
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Copie de Conversation.last_message_at pour trier la boîte de réception sur un seul index
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    last_read_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_conversation_participants_inbox', 'user_id', 'last_message_at', 'conversation_id'),
+    )
+    
+    def __repr__(self):
+        return f'<ConversationParticipant {self.user_id} in {self.conversation_id}>'
@@ -0,0 +1,18 @@
+from models import db
+
+class FollowerRollup(db.Model):
+    """Abonnés gagnés (solde net) par utilisateur sur une semaine ou un mois calendaire"""
+    __tablename__ = 'follower_rollups'
+    
+    # 'week' (semaine commençant le lundi) ou 'month'
+    period = db.Column(db.String(10), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    followers_gained = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_follower_rollups_board', 'period', 'period_start', 'followers_gained', 'user_id'),
+    )
+    
+    def __repr__(self):
+        return f'<FollowerRollup {self.period} {self.period_start} user={self.user_id} +{self.followers_gained}>'
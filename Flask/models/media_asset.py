@@ -0,0 +1,48 @@
+from models import db
+from datetime import datetime
+
+class MediaAsset(db.Model):
+    """
+    Fichier stocké une seule fois, identifié par le SHA-256 de son contenu.
+    PostMedia, CommentMedia et ReplyMedia le référencent ; ref_count suit ces références
+    pour qu'un fichier partagé ne soit retiré du stockage qu'après sa dernière utilisation.
+    """
+    __tablename__ = 'media_assets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False, unique=True)
+    url = db.Column(db.Text, nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    size = db.Column(db.BigInteger, nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Déclinaisons calculées après le téléversement (images) : NULL tant qu'elles ne sont pas prêtes
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    # [{'width', 'height', 'type', 'url'}] par largeur croissante, la dernière en pleine taille
+    variants = db.Column(db.JSON, nullable=True)
+    # Aperçu flou en data URI, affiché pendant le chargement
+    placeholder = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+def _change_ref_count(connection, asset_id, delta):
+    condition = MediaAsset.id == asset_id
+    if delta < 0:
+        condition = db.and_(condition, MediaAsset.ref_count >= -delta)
+    connection.execute(
+        db.update(MediaAsset).where(condition).values(ref_count=MediaAsset.ref_count + delta)
+    )
+
+def track_asset_references(model):
+    """
+    Maintient MediaAsset.ref_count à chaque insertion ou suppression ORM d'une ligne de média
+    (y compris via les cascades des relations), dans la même transaction.
+    """
+    @db.event.listens_for(model, 'after_insert')
+    def _on_insert(mapper, connection, target):
+        if target.asset_id:
+            _change_ref_count(connection, target.asset_id, 1)
+
+    @db.event.listens_for(model, 'after_delete')
+    def _on_delete(mapper, connection, target):
+        if target.asset_id:
+            _change_ref_count(connection, target.asset_id, -1)
@@ -10,4 +10,23 @@ class Notification(db.Model):
     follow_id = db.Column(db.Integer, db.ForeignKey('follows.id'), nullable=True)
     replie_id = db.Column(db.Integer, db.ForeignKey('replies.id'), nullable=True)
     type = db.Column(db.String(50), nullable=False)
-    signalement_id = db.Column(db.Integer, db.ForeignKey('signalement.id'), nullable=True)
\ No newline at end of file
+    signalement_id = db.Column(db.Integer, db.ForeignKey('signalement.id'), nullable=True)
+    # NULL tant que la notification n'a pas été lue (compteur User.unread_notifications_count)
+    read_at = db.Column(db.DateTime, nullable=True)
+    # Séquence croissante par destinataire, poussée en temps réel avec la notification
+    seq = db.Column(db.Integer, nullable=True)
+    # Agrégation : les événements de même type et même cible dans la fenêtre partagent une ligne
+    group_key = db.Column(db.String(100), nullable=True)
+    actor_id = db.Column(db.Integer, nullable=True)
+    actor_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Derniers acteurs, du plus récent au plus ancien, séparés par des virgules
+    sample_actor_ids = db.Column(db.String(100), nullable=True)
+
+    __table_args__ = (
+        # Boîte de réception : WHERE user_id = ? ORDER BY date DESC, id DESC
+        db.Index('ix_notification_user_date_id', 'user_id', 'date', 'id'),
+        # Rattrapage : WHERE user_id = ? AND seq > ? ORDER BY seq
+        db.Index('ix_notification_user_seq', 'user_id', 'seq'),
+        # Groupe ouvert : WHERE user_id = ? AND group_key = ? AND date >= ?
+        db.Index('ix_notification_user_group_date', 'user_id', 'group_key', 'date'),
+    )
@@ -0,0 +1,14 @@
+from models import db
+from datetime import datetime
+
+class NotificationActor(db.Model):
+    """Acteur d'une notification groupée : un désabonnement le retire du compte et de l'échantillon"""
+    __tablename__ = 'notification_actors'
+
+    notification_id = db.Column(db.Integer, db.ForeignKey('notification.id', ondelete='CASCADE'), primary_key=True)
+    actor_id = db.Column(db.Integer, primary_key=True)
+    # Dernière activité de l'acteur dans le groupe : ordre de l'échantillon
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<NotificationActor notification={self.notification_id} actor={self.actor_id}>'
@@ -6,18 +6,20 @@ class Poll(db.Model):
     question = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(1000), nullable=True)
     options = db.Column(db.PickleType, nullable=False)
+    # Ancien cumul sérialisé, plus mis à jour : les totaux sont dans poll_tallies (services/polls.py)
     votes = db.Column(db.PickleType, nullable=False)
     date_created = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
 
-    def to_dict(self):
+    def to_dict(self, votes=None):
+        """votes : totaux par option (vote_counts), à zéro si non fournis"""
         return {
             "id": self.id,
             "question": self.question,
             "description": self.description,
             "options": self.options,
-            "votes": self.votes,
+            "votes": votes if votes is not None else [0] * len(self.options),
             "date_created": self.date_created.isoformat() if self.date_created else None,
             "user_id": self.user_id,
             "category_id": self.category_id
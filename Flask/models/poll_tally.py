@@ -0,0 +1,12 @@
+from models import db
+
+class PollTally(db.Model):
+    """Nombre de votes d'une option de sondage, incrémenté atomiquement à chaque vote"""
+    __tablename__ = 'poll_tallies'
+
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id', ondelete='CASCADE'), primary_key=True)
+    option = db.Column(db.Integer, primary_key=True)
+    votes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<PollTally poll={self.poll_id} option={self.option} votes={self.votes}>'
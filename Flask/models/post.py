@@ -8,4 +8,14 @@ class Post(db.Model):
     published_at = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())    
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete="CASCADE"), nullable=False)
\ No newline at end of file
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete="CASCADE"), nullable=False)
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    favorites_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Dernière modification du titre, du contenu, de la catégorie ou des médias (pas des compteurs) : validateur HTTP
+    edited_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_post_published_at_id', 'published_at', 'id'),
+        db.Index('ix_post_user_published_at_id', 'user_id', 'published_at', 'id'),
+    )
@@ -1,11 +1,20 @@
 from models import db
+from models.media_asset import MediaAsset, track_asset_references
 
 class PostMedia(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), nullable=False)
     media_url = db.Column(db.String(255), nullable=False)
     media_type = db.Column(db.String(20), nullable=False)
+    # 'pending' tant que le téléversement différé n'est pas terminé, puis 'ready' ou 'failed'
+    status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    # Fichier partagé (déduplication par contenu), NULL pour les médias antérieurs
+    asset_id = db.Column(db.Integer, db.ForeignKey('media_assets.id'), nullable=True, index=True)
+    # Chargé par jointure avec le média : les déclinaisons n'ajoutent pas de requête
+    asset = db.relationship(MediaAsset, lazy='joined')
     created_at = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     
     def __repr__(self):
-        return f'<PostMedia {self.id} for Post {self.post_id}>'
\ No newline at end of file
+        return f'<PostMedia {self.id} for Post {self.post_id}>'
+
+track_asset_references(PostMedia)
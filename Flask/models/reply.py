@@ -8,4 +8,8 @@ class Reply(db.Model):
     replies_id = db.Column(db.Integer, db.ForeignKey('replies.id'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    replies_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Modifiée aussi par les compteurs (mentions J'aime, réponses) : validateur HTTP du fil
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
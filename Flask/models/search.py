@@ -0,0 +1,43 @@
+from models import db
+from datetime import datetime, timezone
+
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 'post', 'comment', 'user' ou 'category'
+    kind = db.Column(db.String(20), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    author_id = db.Column(db.Integer, nullable=True, index=True)
+    # Textes normalisés (minuscules, sans accents) : l'affichage relit les tables sources
+    title = db.Column(db.Text, nullable=False, default='')
+    body = db.Column(db.Text, nullable=False, default='')
+    published_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'target_id', name='_search_document_target_uc'),
+    )
+
+class SearchTerm(db.Model):
+    """Index inversé terme -> document, utilisé quand la base n'est pas PostgreSQL (SQLite en test)"""
+    __tablename__ = 'search_terms'
+
+    term = db.Column(db.String(100), primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('search_documents.id', ondelete='CASCADE'), primary_key=True, index=True)
+    weight = db.Column(db.Float, nullable=False, default=1.0)
+
+# Sous PostgreSQL : colonne tsvector générée (titre pondéré A, corps B) avec index GIN,
+# et index trigramme sur le titre pour la recherche approximative
+db.event.listen(
+    SearchDocument.__table__,
+    'after_create',
+    db.DDL(
+        "ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED; "
+        "CREATE INDEX ix_search_documents_vector ON search_documents USING gin (search_vector); "
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm; "
+        "CREATE INDEX ix_search_documents_title_trgm ON search_documents USING gin (title gin_trgm_ops)"
+    ).execute_if(dialect='postgresql')
+)
@@ -0,0 +1,17 @@
+from models import db
+
+class TimelineEntry(db.Model):
+    __tablename__ = 'timeline_entries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    published_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_timeline_user_published_at_post', 'user_id', 'published_at', 'post_id'),
+        db.Index('ix_timeline_user_author', 'user_id', 'author_id'),
+    )
+    
+    def __repr__(self):
+        return f'<TimelineEntry user {self.user_id} post {self.post_id}>'
@@ -0,0 +1,27 @@
+from models import db
+from datetime import datetime
+
+class UploadTicket(db.Model):
+    """
+    Autorisation de téléversement direct vers le stockage, à durée de vie courte.
+    Le client envoie le fichier au stockage, le ticket est complété avec l'asset obtenu,
+    puis consommé quand l'asset est rattaché à un post, un commentaire, une réponse ou un profil.
+    """
+    __tablename__ = 'upload_tickets'
+
+    id = db.Column(db.String(64), primary_key=True)
+    # NULL pour une inscription : l'utilisateur n'existe pas encore
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=True)
+    # 'post', 'comment', 'reply', 'profile_picture' ou 'banner'
+    purpose = db.Column(db.String(20), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    max_size = db.Column(db.BigInteger, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    asset_id = db.Column(db.Integer, db.ForeignKey('media_assets.id', ondelete='CASCADE'), nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    consumed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_upload_tickets_user_asset', 'user_id', 'asset_id'),
+    )
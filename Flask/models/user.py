@@ -21,6 +21,17 @@ class User(db.Model):
     warn_count = db.Column(db.Integer, default=0)  
     is_banned = db.Column(db.Boolean, default=False)  
     ban_until = Column(DateTime, nullable=True)
+    fanout_on_read = db.Column(db.Boolean, default=False, nullable=False)
+    # Abonnés acceptés, maintenu à chaque suivi accepté ou retiré (classement)
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Notifications non lues, maintenu à chaque création, lecture ou suppression
+    unread_notifications_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Dernier numéro de séquence attribué à une notification de l'utilisateur (rattrapage après reconnexion)
+    notifications_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_user_followers_count_id', 'followers_count', 'id'),
+    )
     
     def to_dict(self):
         return {
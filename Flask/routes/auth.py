@@ -1,7 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app, make_response
 from models import db
 from models.user import User
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token, decode_token, get_jwt_identity
 from flask_mail import Message
 from datetime import timedelta
@@ -9,8 +8,12 @@ import re
 import os
 from urllib.parse import quote
 from services.file_upload import upload_file 
+from services.upload_tickets import image_type_error, claim_profile_asset, claim_ticket_asset
+from services.search import index_document, remove_author_documents
+from services.cache import cached, invalidate, invalidate_profile
+from services.conditional import conditional, profile_state
+from services.passwords import hash_password, check_password, needs_rehash, rehash_password, release_session
 
-bcrypt = Bcrypt()
 auth_bp = Blueprint('auth', __name__)
 
 SUBSCRIPTION_TYPES = ['free', 'plus', 'premium']
@@ -77,27 +80,10 @@ def validate_image_file(file, user_subscription, file_type='image'):
     if not file:
         return None, None
     
-    # Vérifier que c'est bien un fichier image
-    if not file.content_type or not file.content_type.startswith('image/'):
-        return None, f"Le fichier doit être une image pour {file_type}."
-    
-    is_gif = file.content_type == 'image/gif'
-    
-    # Si c'est un GIF et que l'utilisateur n'a pas d'abonnement premium/plus
-    if is_gif and user_subscription not in ['plus', 'premium']:
-        return None, f"Les GIFs ne sont disponibles que pour les abonnements Plus et Premium. Votre {file_type} doit être une image statique (JPEG, PNG, WebP)."
-    
-    # Types d'images autorisés
-    allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-    if user_subscription in ['plus', 'premium']:
-        allowed_types.append('image/gif')
-    
-    if file.content_type not in allowed_types:
-        if user_subscription in ['plus', 'premium']:
-            return None, f"Format non supporté. Formats autorisés: JPEG, PNG, WebP, GIF."
-        else:
-            return None, f"Format non supporté. Formats autorisés: JPEG, PNG, WebP. Les GIFs sont réservés aux abonnements Plus et Premium."
-    
+    error_msg = image_type_error(file.content_type, user_subscription, file_type)
+    if error_msg:
+        return None, error_msg
+
     return file, None
 
 @auth_bp.route('/api/users', methods=['POST'])
@@ -181,11 +167,23 @@ def create_user():
     if User.query.filter_by(pseudo=pseudo).first():
         return jsonify({'error': 'Ce pseudo est déjà utilisé'}), 400
 
-    hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+    # Connexion rendue au pool pendant le hachage
+    release_session()
+    hashed_password = hash_password(password)
     
     default_subscription = 'free'
     validate_subscription_type(default_subscription)
     
+    # Images déjà déposées sur le stockage via /api/uploads/tickets : sans compte, le jeton signé du ticket transite
+    try:
+        if data_source.get('profile_picture_upload_token'):
+            profile_picture_to_save = claim_ticket_asset(data_source['profile_picture_upload_token'], 'profile_picture')
+        if data_source.get('banner_upload_token'):
+            banner_image_to_save = claim_ticket_asset(data_source['banner_upload_token'], 'banner')
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
     new_user = User(
         email=email,
         password=hashed_password,
@@ -201,6 +199,7 @@ def create_user():
     )
     
     db.session.add(new_user)
+    index_document(new_user)
     db.session.commit()
     
     return jsonify({
@@ -261,24 +260,30 @@ def login():
     if user.password is None: 
         return jsonify({'error': 'Ce compte a été créé via un fournisseur externe (Google/GitHub). Veuillez vous connecter en utilisant le bouton correspondant.'}), 401
 
-    if bcrypt.check_password_hash(user.password, password):
-        user_data = {
-            'id': user.id,
-            'email': user.email,
-            'roles': user.roles, 
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'pseudo': user.pseudo,
-            'profile_picture': user.profile_picture,
-            'private': user.private,
-            'biography': user.biography,
-            'banner': user.banner,
-            'subscription': user.subscription_level 
-        }
-        return jsonify({'message': 'Connexion réussie', 'user': user_data}), 200
-    else:
+    user_data = {
+        'id': user.id,
+        'email': user.email,
+        'roles': user.roles, 
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'pseudo': user.pseudo,
+        'profile_picture': user.profile_picture,
+        'private': user.private,
+        'biography': user.biography,
+        'banner': user.banner,
+        'subscription': user.subscription_level 
+    }
+    password_hash = user.password
+    # Connexion rendue au pool pendant la vérification bcrypt
+    release_session()
+
+    if not check_password(password_hash, password):
         return jsonify({'error': 'Mot de passe incorrect.'}), 401
 
+    if needs_rehash(password_hash):
+        rehash_password(user_data['id'], password_hash, password)
+    return jsonify({'message': 'Connexion réussie', 'user': user_data}), 200
+
 @auth_bp.route('/api/users', methods=['GET'])
 def get_users():
     users = User.query.all()
@@ -315,6 +320,10 @@ def update_user(user_id):
     if not user_to_update:
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
     
+    # Avant un éventuel changement de pseudo : le profil est mis en cache sous l'ancien
+    invalidate_profile(user_id)
+    invalidate('leaderboard')
+    
     profile_picture_url_to_set = user_to_update.profile_picture
     banner_image_url_to_set = user_to_update.banner
     data_source = None
@@ -360,6 +369,15 @@ def update_user(user_id):
         return jsonify({'error': 'Type de contenu non supporté'}), 400
 
     if data_source:
+        try:
+            if data_source.get('profile_picture_asset_id'):
+                profile_picture_url_to_set = claim_profile_asset(user_id, data_source['profile_picture_asset_id'], 'profile_picture')
+            if data_source.get('banner_asset_id'):
+                banner_image_url_to_set = claim_profile_asset(user_id, data_source['banner_asset_id'], 'banner')
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
         if 'first_name' in data_source:
             user_to_update.first_name = data_source['first_name']
         if 'last_name' in data_source:
@@ -384,6 +402,7 @@ def update_user(user_id):
     user_to_update.profile_picture = profile_picture_url_to_set
     user_to_update.banner = banner_image_url_to_set 
     
+    index_document(user_to_update)
     db.session.commit()
     
     return jsonify({
@@ -431,12 +450,21 @@ def delete_user(user_id):
         
         # 3. Supprimer les relations de suivi
         from models.follow import Follow
+        from services.leaderboard import record_follow_change
+        from services.notifications import remove_follow_notifications, push_follow_removal
+        invalidate_profile(user_id)
         follows_as_follower = Follow.query.filter_by(follower_id=user_id).all()
+        updated_notifications = {}
         for follow in follows_as_follower:
+            if follow.status == 'accepted':
+                record_follow_change(follow.followed_id, -1)
+            updated_notifications[follow.followed_id] = remove_follow_notifications(follow)
+            invalidate_profile(follow.followed_id)
             db.session.delete(follow)
         
         follows_as_followed = Follow.query.filter_by(followed_id=user_id).all()
         for follow in follows_as_followed:
+            invalidate_profile(follow.follower_id)
             db.session.delete(follow)
         
         # 4. Supprimer les favoris
@@ -447,6 +475,10 @@ def delete_user(user_id):
         
         # 5. Supprimer les notifications
         from models.notification import Notification
+        from models.notification_actor import NotificationActor
+        NotificationActor.query.filter(
+            NotificationActor.notification_id.in_(db.select(Notification.id).where(Notification.user_id == user_id))
+        ).delete(synchronize_session=False)
         notifications = Notification.query.filter_by(user_id=user_id).all()
         for notification in notifications:
             db.session.delete(notification)
@@ -521,23 +553,29 @@ def delete_user(user_id):
         # 11. Supprimer les sondages et leurs votes
         from models.poll import Poll
         from models.pollvote import PollVote
+        from services.polls import delete_poll_votes, delete_votes
         polls = Poll.query.filter_by(user_id=user_id).all()
         for poll in polls:
-            # Supprimer les votes du sondage
-            poll_votes = PollVote.query.filter_by(poll_id=poll.id).all()
-            for vote in poll_votes:
-                db.session.delete(vote)
+            # Supprimer les votes et les totaux du sondage
+            delete_poll_votes(poll.id)
+            invalidate('poll', poll.id)
             db.session.delete(poll)
         
-        # Supprimer les votes de l'utilisateur sur d'autres sondages
-        user_votes = PollVote.query.filter_by(user_id=user_id).all()
-        for vote in user_votes:
-            db.session.delete(vote)
+        # Supprimer les votes de l'utilisateur sur d'autres sondages, en les retirant de leurs totaux
+        for (poll_id,) in PollVote.query.filter_by(user_id=user_id).with_entities(PollVote.poll_id).all():
+            invalidate('poll', poll_id)
+        delete_votes(PollVote.query.filter_by(user_id=user_id))
         
-        # 12. Enfin, supprimer l'utilisateur
+        # 12. Retirer l'utilisateur et ses publications de l'index de recherche
+        remove_author_documents(user_id)
+        
+        # 13. Enfin, supprimer l'utilisateur
         db.session.delete(user_to_delete)
         db.session.commit()
         
+        for followed_id, groups in updated_notifications.items():
+            push_follow_removal(followed_id, groups)
+        
         return jsonify({'message': 'Utilisateur et toutes ses données supprimés avec succès'}), 200
         
     except Exception as e:
@@ -615,7 +653,11 @@ def reset_password_with_token():
         if not user:
             return jsonify({'error': 'Utilisateur introuvable ou token invalide'}), 404
         
-        user.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        # Connexion rendue au pool pendant le hachage, puis mise à jour sans recharger l'utilisateur
+        release_session()
+        db.session.query(User).filter(User.id == user_id).update(
+            {User.password: hash_password(new_password)}, synchronize_session=False
+        )
         db.session.commit()
         return jsonify({'message': 'Mot de passe mis à jour avec succès'}), 200
 
@@ -624,6 +666,8 @@ def reset_password_with_token():
         return jsonify({'error': 'Token invalide, expiré ou une erreur est survenue'}), 401
 
 @auth_bp.route('/api/users/profile/<string:pseudo>', methods=['GET'])
+@conditional(profile_state)
+@cached('get_user_by_pseudo', lambda pseudo: [('profile', pseudo)])
 def get_user_by_pseudo(pseudo):
     user = User.query.filter_by(pseudo=pseudo).first()
     
@@ -726,8 +770,6 @@ def get_user_comments_and_replies(user_id):
         from models.post import Post
         from models.comment_media import CommentMedia
         from models.reply_media import ReplyMedia
-        from models.comment_like import CommentLike
-        from models.reply_like import ReplyLike
         
         comments_and_replies = []
         
@@ -759,8 +801,8 @@ def get_user_comments_and_replies(user_id):
                 'type': m.media_type
             } for m in comment_media]
             
-            likes_count = CommentLike.query.filter_by(comment_id=comment.id).count()
-            replies_count = Reply.query.filter_by(comment_id=comment.id).count()
+            likes_count = comment.likes_count
+            replies_count = comment.replies_count
             
             comments_and_replies.append({
                 'id': comment.id,
@@ -829,8 +871,8 @@ def get_user_comments_and_replies(user_id):
                 'type': m.media_type
             } for m in reply_media]
             
-            likes_count = ReplyLike.query.filter_by(replies_id=reply.id).count()
-            sub_replies_count = Reply.query.filter_by(replies_id=reply.id).count()
+            likes_count = reply.likes_count
+            sub_replies_count = reply.replies_count
             
             comments_and_replies.append({
                 'id': reply.id,
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from models import db
 from models.user import User
 from models.category import Category
+from services.search import index_document, remove_document
+from services.cache import cached, invalidate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token
 
@@ -21,11 +23,14 @@ def create_category():
 
     new_category = Category(name=name, description=description)
     db.session.add(new_category)
+    index_document(new_category)
+    invalidate('category')
     db.session.commit()
 
     return jsonify({'message': 'Category created successfully', 'category_id': new_category.id}), 201
 
 @categories_bp.route('/api/categories', methods=['GET'])
+@cached('get_categories', lambda: [('category', '*')])
 def get_categories():
     try:
         categories = Category.query.all()
@@ -55,6 +60,8 @@ def update_category(category_id):
     if description:
         category.description = description
 
+    index_document(category)
+    invalidate('category', category_id)
     db.session.commit()
 
     return jsonify({'message': 'Category updated successfully'}), 200
@@ -66,11 +73,14 @@ def delete_category(category_id):
         return jsonify({'error': 'Category not found'}), 404
 
     db.session.delete(category)
+    remove_document('category', category_id)
+    invalidate('category', category_id)
     db.session.commit()
 
     return jsonify({'message': 'Category deleted successfully'}), 200
 
 @categories_bp.route('/api/categories/<int:category_id>', methods=['GET'])
+@cached('get_category', lambda category_id: [('category', category_id)])
 def get_category(category_id):
     category = Category.query.get(category_id)
     if not category:
@@ -90,31 +100,21 @@ def get_posts_by_category(category_id):
     
     try:
         from models.post import Post
-        from models.post_media import PostMedia
-        from models.user import User
+        from services.feed import load_post_relations, serialize_media
 
         posts = Post.query.filter_by(category_id=category.id).all()
+        relations = load_post_relations(posts)
         posts_list = []
         
         for post in posts:
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = []
-            
-            for item in media_list:
-                media.append({
-                    'id': item.id,
-                    'url': item.media_url,
-                    'type': item.media_type
-                })
-            
-            user = User.query.get(post.user_id)
+            user = relations['users'].get(post.user_id)
             user_pseudo = user.pseudo if user else None
 
             post_data = {
                 'id': post.id, 
                 'title': post.title, 
                 'content': post.content, 
-                'media': media,
+                'media': [serialize_media(m) for m in relations['media'].get(post.id, [])],
                 'published_at': post.published_at.isoformat() if post.published_at else None,
                 'user_id': post.user_id,
                 'user_pseudo': user_pseudo
@@ -2,6 +2,12 @@ from flask import Blueprint, request, jsonify
 from models import db
 from models.user import User
 from models.chat import Chat
+from models.conversation import Conversation, ConversationParticipant
+from services.conversations import (
+    conversation_id_for, record_message, record_message_deleted, mark_conversation_read,
+    chat_page_limit, page_messages, serialize_chat_user, load_conversation_participants
+)
+from services.pagination import apply_cursor, encode_cursor
 from datetime import datetime, timedelta, timezone
 import traceback
 
@@ -19,13 +25,20 @@ def create_chat():
         sender_id = data.get('sender_id')
         content = data.get('content')
         reply_to_id = data.get('reply_to_id')
+        recipient_id = data.get('recipient_id')
 
         if not conversation_id or not sender_id or not content:
             return jsonify({'error': 'conversation_id, sender_id et content sont requis'}), 400
 
+        # Sans recipient_id, seuls les participants déjà indexés reçoivent le message dans leur boîte
+        if recipient_id and int(conversation_id) != conversation_id_for(sender_id, recipient_id):
+            return jsonify({'error': 'conversation_id ne correspond pas à sender_id et recipient_id'}), 400
+
         sender = User.query.get(sender_id)
         if not sender:
             return jsonify({'error': 'Utilisateur expéditeur non trouvé'}), 404
+        if recipient_id and not User.query.get(recipient_id):
+            return jsonify({'error': 'Utilisateur destinataire non trouvé'}), 404
 
         new_chat = Chat(
             conversation_id=conversation_id,
@@ -37,6 +50,7 @@ def create_chat():
         new_chat.send_at = datetime.now(timezone.utc)
         
         db.session.add(new_chat)
+        record_message(new_chat, participant_ids=[sender_id, recipient_id] if recipient_id else [sender_id])
         db.session.commit()
 
         return jsonify({
@@ -54,14 +68,22 @@ def create_chat():
 @chats_bp.route('/api/chats', methods=['GET'])
 def get_chats():
     try:
-        chats = Chat.query.order_by(Chat.send_at.asc()).all()
+        chats, has_more = page_messages(
+            Chat.query,
+            before_id=request.args.get('before_id', type=int),
+            after_id=request.args.get('after_id', type=int),
+            limit=chat_page_limit(request.args)
+        )
         chats_list = [chat.to_dict() for chat in chats]
         
         return jsonify({
             'chats': chats_list,
-            'total': len(chats_list)
+            'total': len(chats_list),
+            'has_more': has_more
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Erreur lors de la récupération des chats: {str(e)}")
         return jsonify({'error': f'Erreur interne du serveur: {str(e)}'}), 500
@@ -114,6 +136,7 @@ def delete_chat(chat_id):
         if not chat:
             return jsonify({'error': 'Message non trouvé'}), 404
 
+        record_message_deleted(chat)
         db.session.delete(chat)
         db.session.commit()
 
@@ -169,35 +192,43 @@ def get_chat_sender(chat_id):
         print(f"Erreur lors de la récupération de l'expéditeur pour le chat {chat_id}: {str(e)}")
         return jsonify({'error': f'Erreur interne du serveur: {str(e)}'}), 500
 
+def parse_since(since_param):
+    """Convertit le paramètre ?since= (ISO 8601) en datetime, lève ValueError s'il est invalide"""
+    if not since_param:
+        return None
+    try:
+        return datetime.fromisoformat(since_param.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Paramètre since invalide: {since_param}")
+
+def conversation_page_response(conversation_id, chats, has_more):
+    conversation = Conversation.query.get(conversation_id)
+    chats_list = [chat.to_dict() for chat in chats]
+
+    return {
+        'conversation_id': conversation_id,
+        'chats': chats_list,
+        'total_messages': conversation.messages_count if conversation else len(chats_list),
+        'participants': [serialize_chat_user(user) for user in load_conversation_participants(conversation_id, chats)],
+        'has_more': has_more,
+        'oldest_id': chats_list[0]['id'] if chats_list else None,
+        'newest_id': chats_list[-1]['id'] if chats_list else None
+    }
+
 @chats_bp.route('/api/conversations/<int:conversation_id>/chats', methods=['GET'])
 def get_conversation_chats(conversation_id):
     try:
-        chats = Chat.query.filter_by(conversation_id=conversation_id).order_by(Chat.send_at.asc()).all()
-        chats_list = [chat.to_dict() for chat in chats]
-        
-        participants_ids = set(chat.sender_id for chat in chats)
-        participants = []
-        
-        for user_id in participants_ids:
-            user = User.query.get(user_id)
-            if user:
-                participants.append({
-                    'id': user.id,
-                    'username': user.pseudo,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'profile_picture': user.profile_picture,
-                    'subscription': user.subscription
-                })
+        chats, has_more = page_messages(
+            Chat.query.filter_by(conversation_id=conversation_id),
+            before_id=request.args.get('before_id', type=int),
+            after_id=request.args.get('after_id', type=int),
+            limit=chat_page_limit(request.args)
+        )
 
-        return jsonify({
-            'conversation_id': conversation_id,
-            'chats': chats_list,
-            'total_messages': len(chats_list),
-            'participants': participants
-        }), 200
+        return jsonify(conversation_page_response(conversation_id, chats, has_more)), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Erreur lors de la récupération des chats de la conversation {conversation_id}: {str(e)}")
         return jsonify({'error': f'Erreur interne du serveur: {str(e)}'}), 500
@@ -205,149 +236,62 @@ def get_conversation_chats(conversation_id):
 @chats_bp.route('/api/chats/conversations/<int:user_id>', methods=['GET'])
 def get_user_conversations(user_id):
     try:
-        print(f"=== Getting conversations for user_id: {user_id} ===")
-        
         user = User.query.get(user_id)
         if not user:
-            print(f"❌ User {user_id} not found")
             return jsonify({'error': 'Utilisateur introuvable'}), 404
-        
-        print(f"✅ User found: {user.email}")
-
-        def extract_participants_from_conversation_id(conv_id):
-            """
-            Extrait les IDs des participants à partir de l'ID de conversation
-            """
-            conv_str = str(conv_id)
-            print(f"🔍 Analyzing conversation ID: {conv_str}")
-            
-            # Si l'ID contient un 0 au milieu, le diviser à ce point
-            if '0' in conv_str[1:-1]:
-                zero_pos = conv_str.index('0', 1)
-                user1_id = int(conv_str[:zero_pos])
-                user2_id = int(conv_str[zero_pos+1:])
-                print(f"  → Split at zero: {user1_id}, {user2_id}")
-                return [user1_id, user2_id]
-            
-            # Méthode alternative: essayer de diviser en supposant que le 2ème ID fait 3 chiffres
-            if len(conv_str) >= 4:
-                user1_id = int(conv_str[:-3])
-                user2_id = int(conv_str[-3:])
-                if user1_id > 0 and user2_id > 0:
-                    print(f"  → Split with 3-digit suffix: {user1_id}, {user2_id}")
-                    return [user1_id, user2_id]
-            
-            # Méthode de fallback: essayer différentes positions de split
-            for split_pos in range(1, len(conv_str)):
-                try:
-                    user1_id = int(conv_str[:split_pos])
-                    user2_id = int(conv_str[split_pos:])
-                    if user1_id > 0 and user2_id > 0:
-                        print(f"  → Split at position {split_pos}: {user1_id}, {user2_id}")
-                        return [user1_id, user2_id]
-                except ValueError:
-                    continue
-            
-            print(f"  → ❌ Could not extract participants from {conv_str}")
-            return []
 
-        all_conversations = db.session.query(Chat.conversation_id).distinct().all()
-        print(f"📊 Total conversations in database: {len(all_conversations)}")
-        
-        user_conversations = []
-        conversation_ids = set()
-        
-        for (conv_id,) in all_conversations:
-            participants = extract_participants_from_conversation_id(conv_id)
-            
-            if user_id in participants:
-                conversation_ids.add(conv_id)
-                print(f"  ✅ User {user_id} participates in conversation {conv_id}")
-        
-        sent_conversations = db.session.query(Chat.conversation_id).filter_by(sender_id=user_id).distinct().all()
-        for conv in sent_conversations:
-            conversation_ids.add(conv[0])
-        
-        print(f"🎯 Final conversation_ids for user {user_id}: {conversation_ids}")
-        
-        for conv_id in conversation_ids:
-            try:
-                # Récupérer tous les messages de cette conversation
-                conversation_chats = Chat.query.filter_by(conversation_id=conv_id).order_by(Chat.send_at.desc()).all()
-                
-                if not conversation_chats:
-                    continue
-                
-                # Récupérer les détails de l'autre utilisateur
-                participants = extract_participants_from_conversation_id(conv_id)
-                other_user_id = participants[1] if participants[0] == user_id else participants[0]
-                
-                if not other_user_id:
-                    continue
-                
-                other_user = User.query.get(other_user_id)
-                if not other_user:
-                    continue
-                
-                other_user_details = {
-                    'id': other_user.id,
-                    'username': other_user.pseudo,
-                    'email': other_user.email,
-                    'first_name': other_user.first_name,
-                    'last_name': other_user.last_name,
-                    'profile_picture': other_user.profile_picture,
-                    'subscription': other_user.subscription
-                }
-                
-                print(f"  🔍 Other user details: {other_user_details}")  # Debug log
-                
-                last_message_details = None
-                if conversation_chats:
-                    last_chat = conversation_chats[0]
-                    last_message_details = {
-                        'id': last_chat.id,
-                        'content': last_chat.content,
-                        'sender_id': last_chat.sender_id,
-                        'send_at': last_chat.send_at.isoformat().replace('+00:00', 'Z') if last_chat.send_at else None
-                    }
-                
-                unread_count = 0
-                
-                conversation_data = {
-                    'conversation_id': conv_id,
-                    'other_user': other_user_details,
-                    'last_message': last_message_details,
-                    'unread_count': unread_count,
-                    'total_messages': len(conversation_chats)
-                }
-                
-                user_conversations.append(conversation_data)
-                print(f"  ✅ Added conversation {conv_id} with {other_user.email} (subscription: {other_user.subscription})")
-                
-            except Exception as e:
-                print(f"  ❌ Error processing conversation {conv_id}: {str(e)}")
-                continue
-        
-        # Trier par date du dernier message
-        user_conversations.sort(
-            key=lambda x: x['last_message']['send_at'] if x.get('last_message') and x['last_message'].get('send_at') else '1970-01-01T00:00:00Z', 
-            reverse=True
+        cursor = request.args.get('cursor')
+        limit = min(max(request.args.get('limit', 20, type=int) or 20, 1), 100)
+
+        # Une seule requête indexée sur (user_id, last_message_at, conversation_id) pour la page
+        me = db.aliased(ConversationParticipant)
+        other = db.aliased(ConversationParticipant)
+        query = (
+            db.session.query(me, Conversation, User, Chat)
+            .join(Conversation, Conversation.id == me.conversation_id)
+            .join(other, db.and_(other.conversation_id == me.conversation_id, other.user_id != me.user_id))
+            .join(User, User.id == other.user_id)
+            .outerjoin(Chat, Chat.id == Conversation.last_message_id)
+            .filter(me.user_id == user_id, me.last_message_at.isnot(None))
         )
-        
-        print(f"🎉 Returning {len(user_conversations)} conversations for user {user_id}")
-        
-        for conv in user_conversations:
-            print(f"  - Conv {conv['conversation_id']}: {conv['other_user']['email']} (subscription: {conv['other_user'].get('subscription', 'NOT_SET')}) ({conv['total_messages']} messages)")
-        
+        rows = (
+            apply_cursor(query, me.last_message_at, me.conversation_id, cursor)
+            .order_by(me.last_message_at.desc(), me.conversation_id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_participant = rows[-1][0]
+            next_cursor = encode_cursor(last_participant.last_message_at, last_participant.conversation_id)
+
+        user_conversations = []
+        for participant, conversation, other_user, last_chat in rows:
+            user_conversations.append({
+                'conversation_id': conversation.id,
+                'other_user': serialize_chat_user(other_user),
+                'last_message': {
+                    'id': last_chat.id,
+                    'content': last_chat.content,
+                    'sender_id': last_chat.sender_id,
+                    'send_at': last_chat.send_at.isoformat().replace('+00:00', 'Z') if last_chat.send_at else None
+                } if last_chat else None,
+                'unread_count': participant.unread_count,
+                'total_messages': conversation.messages_count
+            })
+
         return jsonify({
             'user_id': user_id,
             'conversations': user_conversations,
-            'total_conversations': len(user_conversations)
+            'total_conversations': len(user_conversations),
+            'nextCursor': next_cursor
         }), 200
-        
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"💥 ERROR in get_user_conversations: {str(e)}")
-        import traceback
+        print(f"Erreur lors de la récupération des conversations de l'utilisateur {user_id}: {str(e)}")
         traceback.print_exc()
         return jsonify({
             'error': f'Erreur interne: {str(e)}',
@@ -356,19 +300,32 @@ def get_user_conversations(user_id):
             'total_conversations': 0
         }), 500
 
+@chats_bp.route('/api/chats/conversations/<int:conversation_id>/read', methods=['POST'])
+def mark_conversation_as_read(conversation_id):
+    data = request.get_json() or {}
+    user_id = data.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'user_id est requis'}), 400
+
+    mark_conversation_read(conversation_id, user_id)
+    return jsonify({'message': 'Conversation marquée comme lue', 'conversation_id': conversation_id}), 200
+
 @chats_bp.route('/api/chats/conversation/<int:conversation_id>', methods=['GET'])
 def get_conversation_messages(conversation_id):
-    since_timestamp = request.args.get('since')
-    
-    query = Chat.query.filter_by(conversation_id=conversation_id)
-    
-    if since_timestamp:
-        query = query.filter(Chat.send_at > since_timestamp)
-    
-    messages = query.order_by(Chat.send_at.asc()).all()
+    try:
+        messages, has_more = page_messages(
+            Chat.query.filter_by(conversation_id=conversation_id),
+            before_id=request.args.get('before_id', type=int),
+            after_id=request.args.get('after_id', type=int),
+            since=parse_since(request.args.get('since')),
+            limit=chat_page_limit(request.args)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'messages': [message.to_dict() for message in messages]
+        'messages': [message.to_dict() for message in messages],
+        'has_more': has_more
     })
 
 @chats_bp.route('/api/chats/private', methods=['POST'])
@@ -391,8 +348,7 @@ def create_private_message():
         if not sender or not recipient:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
 
-        sorted_ids = sorted([sender_id, recipient_id])
-        conversation_id = int(f"{sorted_ids[0]}{sorted_ids[1]:03d}")
+        conversation_id = conversation_id_for(sender_id, recipient_id)
 
         # VÉRIFICATION ANTI-DOUBLON : Regarder s'il n'y a pas déjà un message identique récent
         recent_threshold = datetime.now(timezone.utc) - timedelta(seconds=5)
@@ -430,6 +386,7 @@ def create_private_message():
         new_chat.send_at = datetime.now(timezone.utc)
         
         db.session.add(new_chat)
+        record_message(new_chat, participant_ids=[sender_id, recipient_id])
         db.session.commit()
 
         print(f"✅ HTTP: NEW message saved with ID: {new_chat.id}")
@@ -472,30 +429,23 @@ def get_new_messages_simple(user_id):
         else:
             since_timestamp = datetime.utcnow() - timedelta(seconds=30)
         
-        # Récupérer toutes les conversations de l'utilisateur
-        user_chats = Chat.query.filter_by(sender_id=user_id).all()
-        conversation_ids = set(chat.conversation_id for chat in user_chats)
-        
-        all_chats = Chat.query.all()
-        for chat in all_chats:
-            conv_id_str = str(chat.conversation_id)
-            user_id_str = str(user_id)
-            if user_id_str in conv_id_str:
-                conversation_ids.add(chat.conversation_id)
-        
-        # Récupérer les nouveaux messages dans ces conversations
+        # Conversations de l'utilisateur ayant reçu un message depuis le timestamp, via l'index
+        conversation_ids = db.session.query(ConversationParticipant.conversation_id).filter(
+            ConversationParticipant.user_id == user_id,
+            ConversationParticipant.last_message_at > since_timestamp
+        )
+
+        messages = Chat.query.filter(
+            Chat.conversation_id.in_(conversation_ids),
+            Chat.send_at > since_timestamp,
+            Chat.sender_id != user_id
+        ).order_by(Chat.send_at.asc()).all()
+
         new_messages = []
-        for conv_id in conversation_ids:
-            messages = Chat.query.filter(
-                Chat.conversation_id == conv_id,
-                Chat.send_at > since_timestamp,
-                Chat.sender_id != user_id
-            ).order_by(Chat.send_at.asc()).all()
-            
-            for message in messages:
-                message_dict = message.to_dict()
-                message_dict['conversation_id'] = conv_id
-                new_messages.append(message_dict)
+        for message in messages:
+            message_dict = message.to_dict()
+            message_dict['conversation_id'] = message.conversation_id
+            new_messages.append(message_dict)
         
         return jsonify({
             'success': True,
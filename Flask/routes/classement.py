@@ -1,47 +1,53 @@
-from flask import Blueprint, jsonify
-from models.user import User
-from models.follow import Follow
-from models import db
+from flask import Blueprint, jsonify, request
+from services.leaderboard import PERIODS, top_users, user_rank
+from services.cache import cached
 
 classement_bp = Blueprint('classement', __name__)
 
+def requested_period():
+    """?period=week|month pour un classement sur la période en cours, absent pour le classement global"""
+    period = request.args.get('period') or None
+    if period == 'all':
+        return None
+    if period and period not in PERIODS:
+        raise ValueError(f"Période invalide: {period}")
+    return period
+
 @classement_bp.route('/api/classement/top10', methods=['GET'])
+# Invalidé à chaque abonnement : la durée de vie courte limite aussi les recalculs
+@cached('classement_top10', lambda: [('leaderboard', '*')], ttl='CACHE_LEADERBOARD_TTL')
 def classement_top10():
-    users = (
-        db.session.query(User, db.func.count(Follow.follower_id).label('followers_count'))
-        .outerjoin(Follow, User.id == Follow.followed_id)
-        .group_by(User.id)
-        .order_by(db.desc('followers_count'))
-        .limit(10)
-        .all()
-    )
+    try:
+        period = requested_period()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = min(max(request.args.get('limit', 10, type=int) or 10, 1), 100)
     result = []
-    for user, followers_count in users:
+    for user, followers_count in top_users(limit, period):
         result.append({
             "id": user.id,
             "pseudo": user.pseudo,
             "profile_picture": user.profile_picture,
             "followers_count": followers_count
         })
-    return jsonify({"top10": result})
+    return jsonify({"top10": result, "period": period or 'all'})
 
 @classement_bp.route('/api/classement/user/<int:user_id>', methods=['GET'])
 def classement_user(user_id):
-    users = (
-        db.session.query(User.id, User.pseudo, User.profile_picture, db.func.count(Follow.follower_id).label('followers_count'))
-        .outerjoin(Follow, User.id == Follow.followed_id)
-        .group_by(User.id)
-        .order_by(db.desc('followers_count'))
-        .all()
-    )
+    try:
+        period = requested_period()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     rank = None
-    for idx, (uid, pseudo, profile_picture, followers_count) in enumerate(users, start=1):
-        if uid == user_id:
-            rank = {
-                "rank": idx,
-                "pseudo": pseudo,
-                "profile_picture": profile_picture,
-                "followers_count": followers_count
-            }
-            break
-    return jsonify({"rank": rank})
\ No newline at end of file
+    ranking = user_rank(user_id, period)
+    if ranking:
+        user, position, followers_count = ranking
+        rank = {
+            "rank": position,
+            "pseudo": user.pseudo,
+            "profile_picture": user.profile_picture,
+            "followers_count": followers_count
+        }
+    return jsonify({"rank": rank, "period": period or 'all'})
@@ -3,6 +3,7 @@ from models import db
 from models.comment_like import CommentLike
 from models.comment import Comment
 from models.user import User
+from services.counters import increment_counter
 
 comment_likes_bp = Blueprint('comment_likes', __name__)
 
@@ -28,9 +29,10 @@ def toggle_comment_like(comment_id):
         
         if existing_like:
             db.session.delete(existing_like)
+            increment_counter(Comment, comment_id, 'likes_count', -1)
             db.session.commit()
             
-            likes_count = CommentLike.query.filter_by(comment_id=comment_id).count()
+            likes_count = comment.likes_count
             
             return jsonify({
                 'message': 'Like retiré',
@@ -40,9 +42,10 @@ def toggle_comment_like(comment_id):
         else:
             new_like = CommentLike(user_id=user_id, comment_id=comment_id)
             db.session.add(new_like)
+            increment_counter(Comment, comment_id, 'likes_count', 1)
             db.session.commit()
             
-            likes_count = CommentLike.query.filter_by(comment_id=comment_id).count()
+            likes_count = comment.likes_count
             
             return jsonify({
                 'message': 'Commentaire liké',
@@ -2,14 +2,18 @@ from flask import Blueprint, request, jsonify
 from models import db
 from models.post import Post
 from models.user import User
-from models.notification import Notification
+from services.notifications import record_notification
 from models.comment import Comment
-from models.reply import Reply
 from models.comment_media import CommentMedia
-from models.reply_media import ReplyMedia
-from models.comment_like import CommentLike
-from models.reply_like import ReplyLike
-from services.file_upload import upload_file, determine_media_type
+from services.media_pipeline import request_media_files, prepare_media, add_media_rows, start_pending_uploads
+from services.upload_tickets import request_asset_ids, claim_assets, prepared_from_assets
+from services.counters import increment_counter
+from services.search import index_document, remove_document
+from services.conditional import conditional, thread_state
+from services.threads import (
+    thread_limits, load_users, load_comment_media, load_reply_subtrees,
+    page_reply_children, serialize_thread_media, serialize_thread_user
+)
 
 comments_api = Blueprint('comments_api', __name__)
 
@@ -22,48 +26,28 @@ def create_comment():
             post_id = data.get('post_id')
             user_id = data.get('user_id')
             media_files = []
+            asset_ids = request_asset_ids(data)
         else:
             content = request.form.get('content')
             post_id = request.form.get('post_id')
             user_id = request.form.get('user_id')
             
-            media_files = []
-            if 'file' in request.files:
-                file = request.files['file']
-                if file.filename:
-                    media_files.append(file)
-                    
-            if 'files[]' in request.files:
-                files = request.files.getlist('files[]')
-                for file in files:
-                    if file.filename:
-                        media_files.append(file)
+            media_files = request_media_files(request.files, 'file', 'files[]')
+            asset_ids = request_asset_ids()
 
         if not content:
             return jsonify({'error': 'Content is required'}), 400
 
+        claimed = prepared_from_assets(claim_assets(user_id, asset_ids, ['comment']))
+        prepared = claimed + prepare_media(media_files)
+
         new_comment = Comment(content=content, post_id=post_id, user_id=user_id)
         db.session.add(new_comment)
+        increment_counter(Post, post_id, 'comments_count', 1)
+        index_document(new_comment)
+        pending = add_media_rows(CommentMedia, 'comment_id', new_comment.id, prepared)
         db.session.commit()
-
-        for file in media_files:
-            url, file_type = upload_file(file)
-            
-            if not url:
-                continue 
-                
-            media_type = determine_media_type(file_type)
-            if not media_type:
-                continue 
-                
-            comment_media = CommentMedia(
-                comment_id=new_comment.id,
-                media_url=url,
-                media_type=media_type
-            )
-            db.session.add(comment_media)
-
-        db.session.commit()
+        start_pending_uploads(pending)
 
         notify_user_on_new_comment(new_comment)
 
@@ -74,6 +58,7 @@ def create_comment():
             'id': m.id,
             'url': m.media_url,
             'type': m.media_type,
+            'status': m.status,
             'created_at': m.created_at.isoformat()
         } for m in comment_media_list]
         
@@ -96,6 +81,9 @@ def create_comment():
             }
         }), 201
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to create comment: {str(e)}'}), 500
@@ -104,16 +92,14 @@ def notify_user_on_new_comment(comment):
     try:
         post = Post.query.get(comment.post_id)
         if post and post.user_id != comment.user_id:
-            notification = Notification(
+            record_notification(
+                post.user_id,
+                "comment",
+                comment.user_id,
+                group_target=f"post:{post.id}",
                 post_id=post.id,
-                comments_id=comment.id,
-                user_id=post.user_id,
-                replie_id=None, 
-                follow_id=None, 
-                type="comment"
+                comments_id=comment.id
             )
-            db.session.add(notification)
-            db.session.commit()
 
             print(f"Notification envoyée à l'utilisateur {post.user_id} pour un commentaire sur le post {post.id}.")
         else:
@@ -122,79 +108,42 @@ def notify_user_on_new_comment(comment):
         print(f"Erreur lors de la notification: {e}")
 
 @comments_api.route('/api/posts/<int:post_id>/comments', methods=['GET'])
+@conditional(thread_state)
 def get_post_comments(post_id):
     try:
+        depth, fanout = thread_limits(request.args, default_depth=1)
+        
         comments = Comment.query.filter_by(post_id=post_id).order_by(Comment.created_at.desc()).all()
-        result = []
+        comment_ids = [comment.id for comment in comments]
         
+        users = load_users([comment.user_id for comment in comments])
+        media = load_comment_media(comment_ids)
+        replies = load_reply_subtrees(comment_ids=comment_ids, depth=depth, fanout=fanout)
+        
+        result = []
         for comment in comments:
-            user = User.query.get(comment.user_id)
-            
-            comment_media_list = CommentMedia.query.filter_by(comment_id=comment.id).all()
-            media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type,
-                'created_at': m.created_at.isoformat()
-            } for m in comment_media_list]
-            
-            likes_count = CommentLike.query.filter_by(comment_id=comment.id).count()
-            
-            replies = Reply.query.filter_by(comment_id=comment.id).order_by(Reply.created_at.asc()).all()
-            replies_data = []
-            
-            for reply in replies:
-                reply_user = User.query.get(reply.user_id)
-                
-                reply_media_list = ReplyMedia.query.filter_by(replies_id=reply.id).all()
-                reply_media = [{
-                    'id': m.id,
-                    'url': m.media_url,
-                    'type': m.media_type,
-                    'created_at': m.created_at.isoformat()
-                } for m in reply_media_list]
-                
-                reply_likes_count = ReplyLike.query.filter_by(replies_id=reply.id).count()
-                
-                replies_data.append({
-                    'id': reply.id,
-                    'content': reply.content,
-                    'created_at': reply.created_at.isoformat(),
-                    'comment_id': reply.comment_id,
-                    'user_id': reply.user_id,
-                    'likes_count': reply_likes_count,
-                    'media': reply_media,
-                    'user': {
-                        'id': reply_user.id if reply_user else None,
-                        'pseudo': reply_user.pseudo if reply_user else None,
-                        'first_name': reply_user.first_name if reply_user else None,
-                        'last_name': reply_user.last_name if reply_user else None,
-                        'profile_picture': reply_user.profile_picture if reply_user else None
-                    }
-                })
-            
-            result.append({
-                'id': comment.id,
-                'content': comment.content,
-                'created_at': comment.created_at.isoformat(),
-                'post_id': comment.post_id,
-                'user_id': comment.user_id,
-                'media': media,
-                'likes_count': likes_count,
-                'replies': replies_data,
-                'user': {
-                    'id': user.id if user else None,
-                    'pseudo': user.pseudo if user else None,
-                    'first_name': user.first_name if user else None,
-                    'last_name': user.last_name if user else None,
-                    'profile_picture': user.profile_picture if user else None
-                }
-            })
+            comment_data = serialize_comment(comment, users, media)
+            comment_data['replies'] = replies.get(('comment', comment.id), [])
+            comment_data['has_more_replies'] = comment.replies_count > len(comment_data['replies'])
+            result.append(comment_data)
         
         return jsonify({'comments': result}), 200
     except Exception as e:
         return jsonify({'error': f'Failed to fetch comments: {str(e)}'}), 500
 
+def serialize_comment(comment, users, media):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat() if comment.created_at else None,
+        'post_id': comment.post_id,
+        'user_id': comment.user_id,
+        'media': [serialize_thread_media(m) for m in media.get(comment.id, [])],
+        'likes_count': comment.likes_count,
+        'replies_count': comment.replies_count,
+        'user': serialize_thread_user(users.get(comment.user_id))
+    }
+
 @comments_api.route('/api/comments', methods=['GET'])
 def get_comments():
     comments = Comment.query.all()
@@ -213,6 +162,7 @@ def update_comment(comment_id):
 
     if content:
         comment.content = content
+        index_document(comment)
 
     db.session.commit()
 
@@ -225,6 +175,8 @@ def delete_comment(comment_id):
         return jsonify({'error': 'Comment not found'}), 404
 
     db.session.delete(comment)
+    increment_counter(Post, comment.post_id, 'comments_count', -1)
+    remove_document('comment', comment_id)
     db.session.commit()
 
     return jsonify({'message': 'Comment deleted successfully'}), 200
@@ -236,103 +188,15 @@ def get_comment(comment_id):
         if not comment:
             return jsonify({'error': 'Comment not found'}), 404
 
-        user = User.query.get(comment.user_id)
+        depth, fanout = thread_limits(request.args, default_depth=2)
         
-        comment_media_list = CommentMedia.query.filter_by(comment_id=comment.id).all()
-        media = [{
-            'id': m.id,
-            'url': m.media_url,
-            'type': m.media_type,
-            'created_at': m.created_at.isoformat()
-        } for m in comment_media_list]
-        
-        likes_count = CommentLike.query.filter_by(comment_id=comment.id).count()
-        
-        replies = Reply.query.filter_by(comment_id=comment.id).order_by(Reply.created_at.asc()).all()
-        replies_data = []
-        
-        for reply in replies:
-            reply_user = User.query.get(reply.user_id)
-            
-            reply_media_list = ReplyMedia.query.filter_by(replies_id=reply.id).all()
-            reply_media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type,
-                'created_at': m.created_at.isoformat()
-            } for m in reply_media_list]
-            
-            reply_likes_count = ReplyLike.query.filter_by(replies_id=reply.id).count()
-            
-            sub_replies = Reply.query.filter_by(replies_id=reply.id).order_by(Reply.created_at.asc()).all()
-            sub_replies_data = []
-            
-            for sub_reply in sub_replies:
-                sub_reply_user = User.query.get(sub_reply.user_id)
-                
-                sub_reply_media_list = ReplyMedia.query.filter_by(replies_id=sub_reply.id).all()
-                sub_reply_media = [{
-                    'id': m.id,
-                    'url': m.media_url,
-                    'type': m.media_type,
-                    'created_at': m.created_at.isoformat()
-                } for m in sub_reply_media_list]
-                
-                sub_reply_likes_count = ReplyLike.query.filter_by(replies_id=sub_reply.id).count()
-                
-                sub_replies_data.append({
-                    'id': sub_reply.id,
-                    'content': sub_reply.content,
-                    'created_at': sub_reply.created_at.isoformat(),
-                    'comment_id': sub_reply.comment_id,
-                    'replies_id': sub_reply.replies_id,
-                    'user_id': sub_reply.user_id,
-                    'likes_count': sub_reply_likes_count,
-                    'media': sub_reply_media,
-                    'user': {
-                        'id': sub_reply_user.id if sub_reply_user else None,
-                        'pseudo': sub_reply_user.pseudo if sub_reply_user else None,
-                        'first_name': sub_reply_user.first_name if sub_reply_user else None,
-                        'last_name': sub_reply_user.last_name if sub_reply_user else None,
-                        'profile_picture': sub_reply_user.profile_picture if sub_reply_user else None
-                    }
-                })
-            
-            replies_data.append({
-                'id': reply.id,
-                'content': reply.content,
-                'created_at': reply.created_at.isoformat(),
-                'comment_id': reply.comment_id,
-                'user_id': reply.user_id,
-                'likes_count': reply_likes_count,
-                'media': reply_media,
-                'sub_replies': sub_replies_data,
-                'user': {
-                    'id': reply_user.id if reply_user else None,
-                    'pseudo': reply_user.pseudo if reply_user else None,
-                    'first_name': reply_user.first_name if reply_user else None,
-                    'last_name': reply_user.last_name if reply_user else None,
-                    'profile_picture': reply_user.profile_picture if reply_user else None
-                }
-            })
+        users = load_users([comment.user_id])
+        media = load_comment_media([comment.id])
+        replies = load_reply_subtrees(comment_ids=[comment.id], depth=depth, fanout=fanout)
 
-        comment_data = {
-            'id': comment.id,
-            'content': comment.content,
-            'created_at': comment.created_at.isoformat(),
-            'post_id': comment.post_id,
-            'user_id': comment.user_id,
-            'likes_count': likes_count,
-            'media': media,
-            'replies': replies_data,
-            'user': {
-                'id': user.id if user else None,
-                'pseudo': user.pseudo if user else None,
-                'first_name': user.first_name if user else None,
-                'last_name': user.last_name if user else None,
-                'profile_picture': user.profile_picture if user else None
-            }
-        }
+        comment_data = serialize_comment(comment, users, media)
+        comment_data['replies'] = replies.get(('comment', comment.id), [])
+        comment_data['has_more_replies'] = comment.replies_count > len(comment_data['replies'])
 
         return jsonify({'comment': comment_data}), 200
     except Exception as e:
@@ -340,11 +204,21 @@ def get_comment(comment_id):
 
 @comments_api.route('/api/comments/<int:comment_id>/replies', methods=['GET'])
 def get_comment_replies(comment_id):
-    comment = Comment.query.get(comment_id)
-    if not comment:
-        return jsonify({'error': 'Comment not found'}), 404
+    """Page suivante des réponses directes d'un commentaire (?cursor=, ?limit=, ?depth=)"""
+    try:
+        comment = Comment.query.get(comment_id)
+        if not comment:
+            return jsonify({'error': 'Comment not found'}), 404
 
-    replies = comment.replies.all()
-    replies_list = [{'id': reply.id, 'content': reply.content, 'comment_id': reply.comment_id, 'user_id': reply.user_id} for reply in replies]
+        depth, fanout = thread_limits(request.args, default_depth=1)
+        limit = min(max(request.args.get('limit', fanout, type=int) or fanout, 1), 100)
+        
+        replies, next_cursor = page_reply_children(
+            ('comment', comment_id), request.args.get('cursor'), limit, depth, fanout
+        )
 
-    return jsonify({'replies': replies_list}), 200
\ No newline at end of file
+        return jsonify({'replies': replies, 'nextCursor': next_cursor}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch replies: {str(e)}'}), 500
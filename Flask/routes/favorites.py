@@ -3,8 +3,8 @@ from models import db
 from models.favorite import Favorite
 from models.post import Post
 from models.user import User
-from models.category import Category
-from models.like import Like
+from services.feed import hydrate_posts
+from services.counters import increment_counter
 
 favorites_bp = Blueprint('favorites', __name__)
 
@@ -30,20 +30,24 @@ def toggle_favorite(post_id):
         
         if existing_favorite:
             db.session.delete(existing_favorite)
+            increment_counter(Post, post_id, 'favorites_count', -1)
             db.session.commit()
             
             return jsonify({
                 'message': 'Favori retiré',
-                'favorited': False
+                'favorited': False,
+                'favorites_count': post.favorites_count
             }), 200
         else:
             new_favorite = Favorite(user_id=user_id, post_id=post_id)
             db.session.add(new_favorite)
+            increment_counter(Post, post_id, 'favorites_count', 1)
             db.session.commit()
             
             return jsonify({
                 'message': 'Post ajouté aux favoris',
-                'favorited': True
+                'favorited': True,
+                'favorites_count': post.favorites_count
             }), 201
             
     except Exception as e:
@@ -71,43 +75,7 @@ def get_user_favorites(user_id):
             
         favorites = db.session.query(Favorite, Post).join(Post, Favorite.post_id == Post.id).filter(Favorite.user_id == user_id).order_by(Favorite.id.desc()).all()
         
-        result = []
-        for favorite, post in favorites:
-            post_user = User.query.get(post.user_id)
-            category = Category.query.get(post.category_id)
-            
-            from models.post_media import PostMedia
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type
-            } for m in media_list]
-            
-            likes_count = Like.query.filter_by(post_id=post.id).count()
-            
-            result.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'publishedAt': post.published_at.isoformat(),
-                'media': media,
-                'userId': post.user_id,
-                'categoryId': post.category_id,
-                'likes': likes_count,
-                'user': {
-                    'id': post_user.id if post_user else None,
-                    'pseudo': post_user.pseudo if post_user else 'Utilisateur supprimé',
-                    'profilePicture': post_user.profile_picture if post_user else None,
-                    'firstName': post_user.first_name if post_user else None,
-                    'lastName': post_user.last_name if post_user else None
-                },
-                'category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Catégorie supprimée',
-                    'description': category.description if category else None
-                }
-            })
+        result = hydrate_posts([post for favorite, post in favorites])
         
         return jsonify({
             'favorites': result
@@ -6,6 +6,10 @@ from flask_jwt_extended import create_access_token
 from models.follow import Follow
 from datetime import datetime
 from models.notification import Notification
+from services.timeline import backfill_timeline, prune_timeline
+from services.leaderboard import record_follow_change
+from services.cache import invalidate_profile
+from services.notifications import record_notification, delete_notifications, remove_follow_notifications, push_follow_removal
 
 follows_api = Blueprint('follows_api', __name__)
 
@@ -180,6 +184,7 @@ def follow_user():
                 status='pending'
             )
             db.session.add(new_follow)
+            invalidate_profile(follower_id, followed_id)
             db.session.commit()
 
             notify_user_on_follow_request(new_follow)
@@ -198,8 +203,11 @@ def follow_user():
                 status='accepted'
             )
             db.session.add(new_follow)
+            record_follow_change(followed_id, 1)
+            invalidate_profile(follower_id, followed_id)
             db.session.commit()
 
+            backfill_timeline(follower_id, followed_id)
             notify_user_on_new_follow(new_follow)
             return jsonify({
                 'message': 'Utilisateur suivi avec succès',
@@ -233,13 +241,17 @@ def unfollow_user():
             return jsonify({'error': 'Relation de suivi non trouvée'}), 404
         
         # Supprimer les notifications associées
-        notifications = Notification.query.filter_by(follow_id=follow.id).all()
-        for notification in notifications:
-            db.session.delete(notification)
+        updated_notifications = remove_follow_notifications(follow)
             
+        if follow.status == 'accepted':
+            record_follow_change(follow.followed_id, -1)
         db.session.delete(follow)
+        invalidate_profile(follower_id, followed_id)
         db.session.commit()
         
+        push_follow_removal(followed_id, updated_notifications)
+        prune_timeline(follower_id, followed_id)
+        
         return jsonify({
             'message': 'Vous ne suivez plus cet utilisateur',
             'unfollowed': {
@@ -267,15 +279,17 @@ def handle_follow_request(follow_id, action):
 
         if action == 'accept':
             follow.status = 'accepted'
-            db.session.commit()
+            record_follow_change(follow.followed_id, 1)
+            invalidate_profile(follow.follower_id, follow.followed_id)
             
             # Supprimer la notification de demande de suivi
-            notification = Notification.query.filter_by(
+            delete_notifications(Notification.query.filter_by(
                 follow_id=follow_id, 
                 type='follow_request'
-            ).first()
-            if notification:
-                db.session.delete(notification)
+            ))
+            db.session.commit()
+            
+            backfill_timeline(follow.follower_id, follow.followed_id)
             
             # Créer une notification d'acceptation
             notify_user_on_accept_follow_request(follow)
@@ -295,14 +309,13 @@ def handle_follow_request(follow_id, action):
 
         else:
             # Supprimer la notification de demande de suivi
-            notification = Notification.query.filter_by(
+            delete_notifications(Notification.query.filter_by(
                 follow_id=follow_id, 
                 type='follow_request'
-            ).first()
-            if notification:
-                db.session.delete(notification)
+            ))
             
             # Supprimer la relation de suivi
+            invalidate_profile(follow.follower_id, follow.followed_id)
             db.session.delete(follow)
             db.session.commit()
 
@@ -322,13 +335,12 @@ def notify_user_on_accept_follow_request(follow):
             print("Erreur : Utilisateur suivi ou follower introuvable.")
             return
         
-        notification = Notification(
-            user_id=follower_user.id,
-            follow_id=follow.id,
-            type="follow_request_accepted"
+        record_notification(
+            follower_user.id,
+            "follow_request_accepted",
+            followed_user.id,
+            follow_id=follow.id
         )
-        db.session.add(notification)
-        db.session.commit()
         print(f"Notification acceptation d'une invitation envoyée à {follower_user.pseudo}.")
     except Exception as e:
         print(f"Erreur lors de la notification d'acceptation de demande de suivi: {e}")
@@ -342,15 +354,13 @@ def notify_user_on_follow_request(follow):
             print("Erreur : Utilisateur suivi ou follower introuvable.")
             return
 
-        notification = Notification(
-            user_id=followed_user.id,
-            follow_id=follow.id,
-            type="follow_request"
+        record_notification(
+            followed_user.id,
+            "follow_request",
+            follower_user.id,
+            follow_id=follow.id
         )
 
-        db.session.add(notification)
-        db.session.commit()
-
         print(f"Notification de demande de suivi envoyée à {followed_user.pseudo}.")
 
     except Exception as e:
@@ -365,18 +375,13 @@ def notify_user_on_new_follow(follow):
             print("Erreur : Utilisateur suivi ou follower introuvable.")
             return
 
-        notification = Notification(
-            post_id=None, 
-            comments_id=None,  
-            user_id=follow.followed_id,
-            replie_id=None,  
-            follow_id=follow.id,
-            type="follow"  
+        record_notification(
+            follow.followed_id,
+            "follow",
+            follow.follower_id,
+            follow_id=follow.id
         )
 
-        db.session.add(notification)
-        db.session.commit()
-
         print(f"Notification envoyée à {followed_user.pseudo} : {follower_user.pseudo} vient de vous suivre.")
 
     except Exception as e:
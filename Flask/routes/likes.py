@@ -3,6 +3,7 @@ from models import db
 from models.like import Like
 from models.post import Post
 from models.user import User
+from services.counters import increment_counter
 from models.category import Category
 
 likes_bp = Blueprint('likes', __name__)
@@ -29,9 +30,10 @@ def toggle_like(post_id):
         
         if existing_like:
             db.session.delete(existing_like)
+            increment_counter(Post, post_id, 'likes_count', -1)
             db.session.commit()
             
-            likes_count = Like.query.filter_by(post_id=post_id).count()
+            likes_count = post.likes_count
             
             return jsonify({
                 'message': 'Like retiré',
@@ -41,9 +43,10 @@ def toggle_like(post_id):
         else:
             new_like = Like(user_id=user_id, post_id=post_id)
             db.session.add(new_like)
+            increment_counter(Post, post_id, 'likes_count', 1)
             db.session.commit()
             
-            likes_count = Like.query.filter_by(post_id=post_id).count()
+            likes_count = post.likes_count
             
             return jsonify({
                 'message': 'Post liké',
@@ -133,9 +136,9 @@ def get_user_likes(user_id):
                         }
                 
                 from models.comment import Comment
-                comments_count = Comment.query.filter_by(post_id=post.id).count()
+                comments_count = post.comments_count
                 
-                likes_count = Like.query.filter_by(post_id=post.id).count()
+                likes_count = post.likes_count
                 
                 all_likes.append({
                     'id': post.id,
@@ -192,7 +195,7 @@ def get_user_likes(user_id):
                             }
                         }
                 
-                likes_count = CommentLike.query.filter_by(comment_id=comment.id).count()
+                likes_count = comment.likes_count
                 
                 all_likes.append({
                     'id': comment.id,
@@ -245,7 +248,7 @@ def get_user_likes(user_id):
                             }
                         }
                 
-                likes_count = ReplyLike.query.filter_by(replies_id=reply.id).count()
+                likes_count = reply.likes_count
                 
                 all_likes.append({
                     'id': reply.id,
@@ -0,0 +1,87 @@
+from flask import Blueprint, jsonify, request
+from models import db
+from models.user import User
+from services.timeline import rebuild_timeline
+from services.counters import reconcile_counters
+from services.conversations import rebuild_conversation_index
+from services.search import rebuild_search_index
+from services.media_assets import collect_unreferenced_assets
+from services.cache import get_cache
+
+maintenance_bp = Blueprint('maintenance', __name__)
+
+@maintenance_bp.route('/api/admin/timelines/<int:user_id>/rebuild', methods=['POST'])
+def rebuild_user_timeline(user_id):
+    """Reconstruire le fil Abonnements précalculé d'un utilisateur"""
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'Utilisateur non trouvé'}), 404
+
+        followed_count = rebuild_timeline(user_id)
+        return jsonify({'message': 'Fil reconstruit', 'user_id': user_id, 'followed_count': followed_count}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@maintenance_bp.route('/api/admin/timelines/rebuild', methods=['POST'])
+def rebuild_all_timelines():
+    """Reconstruire le fil précalculé de tous les utilisateurs (après une mise en production)"""
+    try:
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).all()]
+        for user_id in user_ids:
+            rebuild_timeline(user_id)
+        return jsonify({'message': 'Fils reconstruits', 'users_count': len(user_ids)}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@maintenance_bp.route('/api/admin/counters/reconcile', methods=['POST'])
+def reconcile_engagement_counters():
+    """Corriger la dérive des compteurs de likes, commentaires, réponses, favoris et abonnés"""
+    try:
+        repaired = reconcile_counters()
+        return jsonify({'message': 'Compteurs réconciliés', 'repaired': repaired}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@maintenance_bp.route('/api/admin/conversations/rebuild', methods=['POST'])
+def rebuild_conversations():
+    """Reconstruire l'index des conversations (boîte de réception) à partir de l'historique des messages"""
+    try:
+        conversations_count = rebuild_conversation_index()
+        return jsonify({'message': 'Index des conversations reconstruit', 'conversations_count': conversations_count}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+
+@maintenance_bp.route('/api/admin/search/rebuild', methods=['POST'])
+def rebuild_search():
+    """Reconstruire l'index de recherche (posts, commentaires, utilisateurs, catégories)"""
+    try:
+        indexed = rebuild_search_index()
+        return jsonify({'message': 'Index de recherche reconstruit', 'indexed': indexed}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@maintenance_bp.route('/api/admin/media/collect', methods=['POST'])
+def collect_media_assets():
+    """Supprimer les fichiers dédupliqués qui ne sont plus référencés (?grace= en secondes, 24 h par défaut)"""
+    try:
+        grace = request.args.get('grace', 24 * 3600, type=int)
+        removed = collect_unreferenced_assets(grace_seconds=max(grace, 0))
+        return jsonify({'message': 'Médias non référencés supprimés', 'removed': removed}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@maintenance_bp.route('/api/admin/cache/stats', methods=['GET'])
+def cache_stats():
+    """Succès et échecs du cache de réponses de ce worker, par endpoint"""
+    cache = get_cache()
+    if cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **cache.stats()}), 200
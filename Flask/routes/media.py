@@ -0,0 +1,35 @@
+import os
+from flask import Blueprint, jsonify, send_file, current_app
+from services.storage import LocalStorage, get_storage
+
+media_bp = Blueprint('media', __name__)
+
+@media_bp.route('/api/media/<key>', methods=['GET', 'HEAD'])
+def serve_media(key):
+    """
+    Sert un fichier du stockage local. send_file gère les requêtes Range (206), If-None-Match
+    et If-Modified-Since, et transmet le fichier via wsgi.file_wrapper (sendfile côté serveur
+    quand il est disponible) ou X-Sendfile si USE_X_SENDFILE est activé.
+    """
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        return jsonify({'error': 'Stockage local désactivé'}), 404
+
+    path = storage.path_for(key)
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'Média introuvable'}), 404
+
+    max_age = current_app.config.get('LOCAL_STORAGE_MAX_AGE', 365 * 24 * 3600)
+    response = send_file(
+        path,
+        mimetype=storage.mimetype_for(key),
+        conditional=True,
+        etag=key.split('.')[0],
+        max_age=max_age
+    )
+    # Le nom est le hachage du contenu : le fichier ne change jamais
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    response.headers['Accept-Ranges'] = 'bytes'
+    # Le type servi est celui de la liste fixe : pas de détection par le navigateur
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
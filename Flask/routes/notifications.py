@@ -1,105 +1,93 @@
 from flask import Blueprint, request, jsonify
 from models import db
 from models.notification import Notification
-from models.user import User
-from models.post import Post
-from models.comment import Comment
-from models.follow import Follow
-from models.reply import Reply  
-from models.signalement import Signalement  
+from services.notifications import (
+    FOLLOW_TYPES, notification_page_limit, page_notifications, hydrate_notifications,
+    load_notification_relations, notification_actor, unread_count, mark_notifications_read,
+    delete_notifications, notifications_after_seq, notification_state, push_notification_state
+)
+from services.conditional import conditional, notifications_state
 
 notifications_api = Blueprint('notifications_api', __name__)
 
 @notifications_api.route('/api/user_notifications/<int:user_id>', methods=['GET'])
+@conditional(notifications_state, private=True)
 def get_user_notifications(user_id):
     try:
-        notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.date.desc()).all()
-
-        result = []
-        for notification in notifications:
-            notification_data = {
-                'id': notification.id,
-                'post_id': notification.post_id,
-                'comments_id': notification.comments_id,
-                'replie_id': notification.replie_id,
-                'follow_id': notification.follow_id,
-                'user_id': notification.user_id,
-                'type': notification.type,
-                'date': notification.date.isoformat() if notification.date else None,
-                'actor_user': None
-            }
-
-            # Récupérer les informations de l'utilisateur acteur selon le type
-            if notification.type in ["follow", "follow_request", "follow_request_accepted"] and notification.follow_id:
-                follow = Follow.query.get(notification.follow_id)
-                if follow:
-                    follower_user = User.query.get(follow.follower_id)
-                    if follower_user:
-                        notification_data['actor_user'] = {
-                            'id': follower_user.id,
-                            'pseudo': follower_user.pseudo,
-                            'first_name': follower_user.first_name,
-                            'last_name': follower_user.last_name,
-                            'profile_picture': follower_user.profile_picture,
-                            'subscription': follower_user.subscription,
-                            'email': follower_user.email
-                        }
-
-            elif notification.type == "comment" and notification.comments_id:
-                comment = Comment.query.get(notification.comments_id)
-                if comment:
-                    comment_user = User.query.get(comment.user_id)
-                    if comment_user:
-                        notification_data['actor_user'] = {
-                            'id': comment_user.id,
-                            'pseudo': comment_user.pseudo,
-                            'first_name': comment_user.first_name,
-                            'last_name': comment_user.last_name,
-                            'profile_picture': comment_user.profile_picture,
-                            'subscription': comment_user.subscription,
-                            'email': comment_user.email
-                        }
-                        notification_data['comment_data'] = {
-                            'content': comment.content
-                        }
-
-            elif notification.type in ["reply", "reply_to_reply"] and notification.replie_id:
-                reply = Reply.query.get(notification.replie_id)
-                if reply:
-                    reply_user = User.query.get(reply.user_id)
-                    if reply_user:
-                        notification_data['actor_user'] = {
-                            'id': reply_user.id,
-                            'pseudo': reply_user.pseudo,
-                            'first_name': reply_user.first_name,
-                            'last_name': reply_user.last_name,
-                            'profile_picture': reply_user.profile_picture,
-                            'subscription': reply_user.subscription,
-                            'email': reply_user.email
-                        }
-
-            result.append(notification_data)
-
-        return jsonify(result)
-
+        cursor = request.args.get('cursor')
+        limit = notification_page_limit(request.args)
+        after_seq = request.args.get('after_seq', type=int)
+
+        if after_seq is not None:
+            # Rattrapage après reconnexion : uniquement ce qui a été manqué, dans l'ordre de séquence
+            notifications, has_more = notifications_after_seq(user_id, after_seq, limit)
+            latest_seq, unread = notification_state(user_id)
+            return jsonify({
+                'notifications': hydrate_notifications(notifications),
+                'has_more': has_more,
+                'latest_seq': latest_seq,
+                'unread_count': unread
+            })
+
+        query = Notification.query.filter(Notification.user_id == user_id)
+        if request.args.get('unread') in ('1', 'true'):
+            query = query.filter(Notification.read_at.is_(None))
+
+        notifications, next_cursor = page_notifications(query, cursor, limit)
+        latest_seq, unread = notification_state(user_id)
+
+        return jsonify({
+            'notifications': hydrate_notifications(notifications),
+            'nextCursor': next_cursor,
+            'latest_seq': latest_seq,
+            'unread_count': unread
+        })
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Erreur lors de la récupération des notifications: {e}")  
         return jsonify({'error': f'Failed to fetch notifications: {str(e)}'}), 500    
 
+@notifications_api.route('/api/user_notifications/<int:user_id>/unread_count', methods=['GET'])
+def get_unread_notifications_count(user_id):
+    count = unread_count(user_id)
+    if count is None:
+        return jsonify({'error': 'Utilisateur introuvable'}), 404
+    return jsonify({'user_id': user_id, 'unread_count': count})
+
+@notifications_api.route('/api/user_notifications/<int:user_id>/read', methods=['POST'])
+def mark_user_notifications_read(user_id):
+    """Marque comme lues les notifications {"ids": [...]} du corps, ou toutes si aucun id n'est fourni"""
+    try:
+        data = request.get_json(silent=True) or {}
+        notification_ids = data.get('ids')
+        if notification_ids is not None:
+            if not isinstance(notification_ids, list):
+                return jsonify({'error': 'ids doit être une liste'}), 400
+            notification_ids = [int(notification_id) for notification_id in notification_ids]
+
+        marked = mark_notifications_read(user_id, notification_ids)
+        push_notification_state(user_id)
+        return jsonify({'marked': marked, 'unread_count': unread_count(user_id) or 0}), 200
+
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids invalides'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to mark notifications as read: {str(e)}'}), 500
+
 @notifications_api.route('/api/user_notifications/<int:user_id>', methods=['DELETE'])
 def delete_all_user_notifications(user_id):
     try:
-        notifications = Notification.query.filter(
+        deleted = delete_notifications(Notification.query.filter(
             Notification.user_id == user_id,
             Notification.type != 'follow_request'
-        ).all()
+        ))
 
-        if not notifications:
+        if not deleted:
             return jsonify({'message': 'No notifications to delete'}), 200
 
-        for notification in notifications:
-            db.session.delete(notification)
-
         db.session.commit()
         return jsonify({'message': 'All non-follow-request notifications deleted successfully'}), 200
 
@@ -110,20 +98,24 @@ def delete_all_user_notifications(user_id):
 @notifications_api.route('/api/user_notifications/<int:user_id>/<int:notification_id>', methods=['DELETE'])
 def delete_user_notification(user_id, notification_id):
     try:
-        notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
-        if not notification:
+        deleted = delete_notifications(Notification.query.filter_by(id=notification_id, user_id=user_id))
+        if not deleted:
             return jsonify({'error': 'Notification not found'}), 404
 
-        db.session.delete(notification)
         db.session.commit()
         return jsonify({'message': 'Notification deleted successfully'}), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Failed to delete notification: {str(e)}'}), 500
 
 @notifications_api.route('/api/notifications', methods=['GET'])
 def get_all_notifications():
     try:
-        notifications = Notification.query.order_by(Notification.date.desc()).all()
+        cursor = request.args.get('cursor')
+        limit = notification_page_limit(request.args)
+
+        notifications, next_cursor = page_notifications(Notification.query, cursor, limit)
+        relations = load_notification_relations(notifications)
 
         result = []
         for notification in notifications:
@@ -135,34 +127,38 @@ def get_all_notifications():
                 'follow_id': notification.follow_id,
                 'user_id': notification.user_id,
                 'type': notification.type,
-                'date': notification.date.isoformat() if notification.date else None
+                'date': notification.date.isoformat() if notification.date else None,
+                'read_at': notification.read_at.isoformat() if notification.read_at else None
             }
 
             # Gestion des types de notifications
 
             if notification.type == "comment" and notification.comments_id:
-                comment = Comment.query.get(notification.comments_id)
+                comment = relations['comments'].get(notification.comments_id)
                 if comment:
                     notification_data['comment_content'] = comment.content
                     notification_data['post_id'] = comment.post_id
 
             if notification.type == "reply" and notification.replie_id:
-                reply = Reply.query.get(notification.replie_id)
+                reply = relations['replies'].get(notification.replie_id)
                 if reply:
                     notification_data['replie_content'] = reply.content
                     notification_data['comment_id'] = reply.comment_id
 
-            if notification.type in ["follow", "follow_request","follow_request_accepted"] and notification.follow_id:
-                follow = Follow.query.get(notification.follow_id)
-                if follow:
-                    follower_user = User.query.get(follow.follower_id)
-                    if follower_user:
-                        notification_data.update({
-                            'follower_user': follower_user.pseudo,
-                            'follower_id': follower_user.id
-                        })
-        return jsonify(result)
+            if notification.type in FOLLOW_TYPES and notification.follow_id:
+                follower_user = notification_actor(notification, relations)
+                if follower_user:
+                    notification_data.update({
+                        'follower_user': follower_user.pseudo,
+                        'follower_id': follower_user.id
+                    })
+
+            result.append(notification_data)
+
+        return jsonify({'notifications': result, 'nextCursor': next_cursor})
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Erreur lors de la récupération de toutes les notifications: {e}")
-        return jsonify({'error': f'Failed to fetch all notifications: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to fetch all notifications: {str(e)}'}), 500
@@ -4,7 +4,8 @@ from models.poll import Poll
 from models.category import Category
 from models.pollvote import PollVote
 from models.user import User
-import sqlalchemy as sa
+from services.cache import cached, invalidate
+from services.polls import cast_vote, poll_tallies, vote_counts, delete_poll_votes, schedule_poll_results
 
 polls_bp = Blueprint('polls', __name__)
 
@@ -20,9 +21,10 @@ def get_polls():
             error_out=False
         )
         
+        tallies = poll_tallies([poll.id for poll in polls_paginated.items])
         polls_with_category = []
         for poll in polls_paginated.items:
-            poll_dict = poll.to_dict()
+            poll_dict = poll.to_dict(vote_counts(poll, tallies))
             category = Category.query.get(poll.category_id)
             poll_dict['category'] = {
                 'id': category.id if category else None,
@@ -83,13 +85,15 @@ def create_poll():
         return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
 
 @polls_bp.route('/api/polls/<int:poll_id>', methods=['GET'])
+# La catégorie intégrée à la réponse est couverte par la version de l'ensemble des catégories
+@cached('get_poll', lambda poll_id: [('poll', poll_id), ('category', '*')])
 def get_poll(poll_id):
     try:
         poll = Poll.query.get(poll_id)
         if not poll:
             return jsonify({'error': 'Sondage introuvable'}), 404
         
-        poll_dict = poll.to_dict()
+        poll_dict = poll.to_dict(vote_counts(poll))
         category = Category.query.get(poll.category_id)
         poll_dict['category'] = {
             'id': category.id if category else None,
@@ -116,16 +120,15 @@ def vote_poll(poll_id):
         if not user_id:
             return jsonify({'error': 'ID utilisateur requis'}), 400
 
-        existing_vote = PollVote.query.filter_by(poll_id=poll_id, user_id=int(user_id)).first()
-        if existing_vote:
+        if not cast_vote(poll_id, int(user_id), option):
+            db.session.rollback()
             return jsonify({'error': 'Vous avez déjà voté pour ce sondage'}), 400
 
-        poll.votes[option] += 1
-        sa.orm.attributes.flag_modified(poll, "votes")
-        db.session.add(PollVote(poll_id=poll_id, user_id=int(user_id), option=option))
+        invalidate('poll', poll_id)
         db.session.commit()
+        schedule_poll_results(poll_id)
         
-        poll_dict = poll.to_dict()
+        poll_dict = poll.to_dict(vote_counts(poll))
         category = Category.query.get(poll.category_id)
         poll_dict['category'] = {
             'id': category.id if category else None,
@@ -167,9 +170,10 @@ def get_polls_by_category(category_id):
             error_out=False
         )
         
+        tallies = poll_tallies([poll.id for poll in polls_paginated.items])
         polls_with_category = []
         for poll in polls_paginated.items:
-            poll_dict = poll.to_dict()
+            poll_dict = poll.to_dict(vote_counts(poll, tallies))
             poll_dict['category'] = {
                 'id': category.id,
                 'name': category.name,
@@ -203,9 +207,10 @@ def get_user_polls(user_id):
             
         polls = Poll.query.filter_by(user_id=user_id).order_by(Poll.date_created.desc()).all()
         
+        tallies = poll_tallies([poll.id for poll in polls])
         result = []
         for poll in polls:
-            poll_dict = poll.to_dict()
+            poll_dict = poll.to_dict(vote_counts(poll, tallies))
             category = Category.query.get(poll.category_id)
             poll_dict['category'] = {
                 'id': category.id if category else None,
@@ -236,9 +241,10 @@ def delete_poll(poll_id):
         if poll.user_id != int(user_id):
             return jsonify({'error': 'Non autorisé'}), 403
             
-        PollVote.query.filter_by(poll_id=poll_id).delete()
+        delete_poll_votes(poll_id)
         
         db.session.delete(poll)
+        invalidate('poll', poll_id)
         db.session.commit()
         
         return jsonify({'message': 'Sondage supprimé avec succès'})
@@ -1,11 +1,17 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from models import db
 from models.post import Post
 from models.user import User
-from models.category import Category
-from models.comment import Comment
-from services.file_upload import upload_file, determine_media_type
-from models.like import Like
+from services.file_upload import upload_file
+from services.media_pipeline import request_media_files, prepare_media, add_media_rows, start_pending_uploads
+from services.upload_tickets import request_asset_ids, claim_assets, prepared_from_assets
+from services.feed import hydrate_posts, serialize_media
+from services.pagination import keyset_paginate, encode_cursor
+from services.timeline import fan_out_post, read_timeline
+from services.search import index_document, remove_document
+from services.cache import cached, invalidate, invalidate_profile
+from services.conditional import conditional, post_state
 
 posts_bp = Blueprint('posts', __name__)
 
@@ -32,6 +38,15 @@ def create_post():
         user_id = request.form['user_id']
         category_id = request.form['category_id']
         
+        # Médias déjà déposés sur le stockage (tickets de téléversement direct), réclamés en premier :
+        # un identifiant invalide rejette la requête avant tout téléversement
+        claimed = prepared_from_assets(claim_assets(user_id, request_asset_ids(), ['post']))
+        
+        # Téléversements parallèles (ou mise en attente) avant d'ouvrir la transaction :
+        # le post et ses médias sont ensuite enregistrés ensemble
+        media_files = request_media_files(request.files, 'file', 'files[]')
+        prepared = claimed + prepare_media(media_files)
+        
         post = Post(
             title=title, 
             content=content, 
@@ -42,49 +57,28 @@ def create_post():
         )
         
         db.session.add(post)
-        db.session.commit()
-        
-        media_files = []
-        
-        if 'file' in request.files:
-            file = request.files['file']
-            if file.filename:
-                media_files.append(file)
-                
-        if 'files[]' in request.files:
-            files = request.files.getlist('files[]')
-            for file in files:
-                if file.filename:
-                    media_files.append(file)
-        
-        for file in media_files:
-            url, file_type = upload_file(file)
-            
-            if not url:
-                continue 
-                
-            media_type = determine_media_type(file_type)
-            if not media_type:
-                continue 
-                
-            from models.post_media import PostMedia
-            post_media = PostMedia(
-                post_id=post.id,
-                media_url=url,
-                media_type=media_type
-            )
-            db.session.add(post_media)
+        index_document(post)
+        invalidate_profile(user_id)
         
+        from models.post_media import PostMedia
+        pending = add_media_rows(PostMedia, 'post_id', post.id, prepared)
         db.session.commit()
+        start_pending_uploads(pending)
+        
+        fan_out_post(post)
         
         return jsonify({
             'message': 'Post created successfully', 
             'post_id': post.id,
-            'media_count': len(media_files)
+            'media_count': len(media_files) + len(claimed),
+            'media_pending': len(pending)
         })
     
     except KeyError as e:
         return jsonify({'error': f'Missing required field: {str(e)}'}), 400
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to create post: {str(e)}'}), 500
@@ -120,38 +114,17 @@ def update_post(post_id):
             except (json.JSONDecodeError, ValueError) as e:
                 print(f"Erreur lors du parsing des IDs de médias à supprimer: {e}")
         
-        media_files = []
-        
-        if 'file' in request.files:
-            file = request.files['file']
-            if file.filename:
-                media_files.append(file)
-                
-        if 'new_files[]' in request.files:
-            files = request.files.getlist('new_files[]')
-            for file in files:
-                if file.filename:
-                    media_files.append(file)
-        
-        for file in media_files:
-            url, file_type = upload_file(file)
-            
-            if not url:
-                continue
-                 
-            media_type = determine_media_type(file_type)
-            if not media_type:
-                continue
-                 
-            from models.post_media import PostMedia
-            post_media = PostMedia(
-                post_id=post.id,
-                media_url=url,
-                media_type=media_type
-            )
-            db.session.add(post_media)
+        from models.post_media import PostMedia
+        claimed = prepared_from_assets(claim_assets(post.user_id, request_asset_ids(), ['post']))
+        prepared = claimed + prepare_media(request_media_files(request.files, 'file', 'new_files[]'))
+        pending = add_media_rows(PostMedia, 'post_id', post.id, prepared)
+        post.edited_at = datetime.utcnow()
 
+        index_document(post)
+        invalidate('post', post.id)
+        invalidate_profile(post.user_id)
         db.session.commit()
+        start_pending_uploads(pending)
         
         from models.post_media import PostMedia
         media_list = PostMedia.query.filter_by(post_id=post.id).all()
@@ -161,7 +134,8 @@ def update_post(post_id):
             media.append({
                 'id': item.id,
                 'url': item.media_url,
-                'type': item.media_type
+                'type': item.media_type,
+                'status': item.status
             })
         
         return jsonify({
@@ -174,11 +148,16 @@ def update_post(post_id):
             }
         })
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to update post: {str(e)}'}), 500
 
 @posts_bp.route('/api/posts/<int:post_id>', methods=['GET'])
+@conditional(post_state)
+@cached('get_post', lambda post_id: [('post', post_id)])
 def get_post(post_id):
     post = Post.query.get(post_id)
     if not post:
@@ -189,11 +168,7 @@ def get_post(post_id):
     media = []
     
     for item in media_list:
-        media.append({
-            'id': item.id,
-            'url': item.media_url,
-            'type': item.media_type
-        })
+        media.append(serialize_media(item))
         
     return jsonify({
         'id': post.id,
@@ -212,7 +187,14 @@ def delete_post(post_id):
         if not post:
             return jsonify({'error': 'Post not found'}), 404
             
+        # Suppression ORM des médias (et non la cascade SQL) pour décrémenter les assets partagés
+        from models.post_media import PostMedia
+        for media in PostMedia.query.filter_by(post_id=post.id).all():
+            db.session.delete(media)
         db.session.delete(post)
+        remove_document('post', post_id)
+        invalidate('post', post_id)
+        invalidate_profile(post.user_id)
         db.session.commit()
         
         return jsonify({'message': 'Post deleted successfully'})
@@ -225,47 +207,7 @@ def delete_post(post_id):
 def get_all_posts():
     try:
         posts = Post.query.order_by(Post.published_at.desc()).all()
-        result = []
-        
-        for post in posts:
-            user = User.query.get(post.user_id)
-            
-            category = Category.query.get(post.category_id)
-            
-            from models.post_media import PostMedia
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type
-            } for m in media_list]
-            
-            likes_count = Like.query.filter_by(post_id=post.id).count()
-            comments_count = Comment.query.filter_by(post_id=post.id).count()
-            
-            result.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'publishedAt': post.published_at.isoformat(),
-                'media': media,
-                'userId': post.user_id,
-                'categoryId': post.category_id,
-                'likes': likes_count,
-                'comments': comments_count,
-                'user': {
-                    'id': user.id if user else None,
-                    'pseudo': user.pseudo if user else 'Utilisateur supprimé',
-                    'profilePicture': user.profile_picture if user else None,
-                    'firstName': user.first_name if user else None,
-                    'lastName': user.last_name if user else None
-                },
-                'category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Catégorie supprimée',
-                    'description': category.description if category else None
-                }
-            })
+        result = hydrate_posts(posts)
         
         return jsonify(result)
     except Exception as e:
@@ -281,6 +223,10 @@ def delete_media(media_id):
             return jsonify({'error': 'Média non trouvé'}), 404
         
         db.session.delete(media_to_delete)
+        db.session.query(Post).filter(Post.id == media_to_delete.post_id).update(
+            {Post.edited_at: datetime.utcnow()}, synchronize_session=False
+        )
+        invalidate('post', media_to_delete.post_id)
         db.session.commit()
         
         return jsonify({'message': 'Média supprimé avec succès'}), 200
@@ -292,121 +238,28 @@ def delete_media(media_id):
 def get_user_posts(user_id):
     try:
         posts = Post.query.filter_by(user_id=user_id).order_by(Post.published_at.desc()).all()
-        result = []
-        
-        user = User.query.get(user_id)
-        
-        for post in posts:
-            category = Category.query.get(post.category_id)
-            
-            from models.post_media import PostMedia
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = []
-            
-            for item in media_list:
-                media.append({
-                    'id': item.id,
-                    'url': item.media_url,
-                    'type': item.media_type,
-                    'created_at': item.created_at.isoformat() if item.created_at else None
-                })
-            
-            likes_count = Like.query.filter_by(post_id=post.id).count()
-            comments_count = Comment.query.filter_by(post_id=post.id).count() 
-                 
-            result.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'published_at': post.published_at.isoformat() if post.published_at else None,
-                'publishedAt': post.published_at.isoformat() if post.published_at else None,
-                'media': media,
-                'user_id': post.user_id,
-                'userId': post.user_id,
-                'category_id': post.category_id,
-                'categoryId': post.category_id,
-                'likes': likes_count,
-                'comments': comments_count,
-                'user': {
-                    'id': user.id if user else None,
-                    'pseudo': user.pseudo if user else 'Utilisateur supprimé',
-                    'profilePicture': user.profile_picture if user else None,
-                    'firstName': user.first_name if user else None,
-                    'lastName': user.last_name if user else None
-                },
-                'category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Catégorie supprimée',
-                    'description': category.description if category else None
-                }
-            })
-        
-        return jsonify({'posts': result})
+        return jsonify({'posts': hydrate_posts(posts, media_with_date=True)})
     except Exception as e:
         return jsonify({'error': f'Failed to fetch user posts: {str(e)}'}), 500
 
 @posts_bp.route('/api/posts/foryou', methods=['GET'])
 def get_foryou_posts():
     try:
-        page = request.args.get('page', 1, type=int)
         per_page = 20
-
-        posts = (
+        
+        query = (
             Post.query
                 .join(User, Post.user_id == User.id)
                 .filter(User.private == False)
-                .order_by(Post.published_at.desc())
-                .paginate(page=page, per_page=per_page, error_out=False)
         )
-
-        result = []
-        for post in posts.items:
-            user = User.query.get(post.user_id)
-            
-            category = Category.query.get(post.category_id)
-            
-            from models.post_media import PostMedia
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type
-            } for m in media_list]
-            
-            likes_count = Like.query.filter_by(post_id=post.id).count()
-            comments_count = Comment.query.filter_by(post_id=post.id).count()
-            
-            result.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'publishedAt': post.published_at.isoformat(),
-                'media': media,
-                'userId': post.user_id,
-                'categoryId': post.category_id,
-                'likes': likes_count,
-                'comments': comments_count, 
-                'user': {
-                    'id': user.id if user else None,
-                    'pseudo': user.pseudo if user else 'Utilisateur supprimé',
-                    'profilePicture': user.profile_picture if user else None,
-                    'firstName': user.first_name if user else None,
-                    'lastName': user.last_name if user else None
-                },
-                'category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Catégorie supprimée',
-                    'description': category.description if category else None
-                }
-            })
         
-        return jsonify({
-            'posts': result,
-            'hasNext': posts.has_next,
-            'nextPage': posts.next_num if posts.has_next else None,
-            'totalPages': posts.pages,
-            'currentPage': page
-        })
+        # Mode page conservé pour la compatibilité des anciens clients
+        if 'page' in request.args and not request.args.get('cursor'):
+            return legacy_page_response(query, request.args.get('page', 1, type=int), per_page)
+
+        return cursor_page_response(query, request.args.get('cursor'), per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -414,8 +267,18 @@ def get_foryou_posts():
 def get_following_posts(user_id):
     try:
         page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = 20
         
+        # Fil précalculé : un parcours d'index, quel que soit le nombre d'abonnements
+        if 'page' not in request.args or cursor:
+            posts, next_cursor = read_timeline(user_id, cursor, per_page)
+            return jsonify({
+                'posts': hydrate_posts(posts),
+                'hasNext': next_cursor is not None,
+                'nextCursor': next_cursor
+            })
+        
         from models.follow import Follow
         following_ids = db.session.query(Follow.followed_id).filter_by(follower_id=user_id).all()
         following_ids = [f[0] for f in following_ids]
@@ -429,57 +292,37 @@ def get_following_posts(user_id):
                 'currentPage': page
             })
         
-        posts = Post.query.filter(Post.user_id.in_(following_ids)).order_by(Post.published_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        query = Post.query.filter(Post.user_id.in_(following_ids))
         
-        result = []
-        for post in posts.items:
-            user = User.query.get(post.user_id)
-            
-            category = Category.query.get(post.category_id)
-            
-            from models.post_media import PostMedia
-            media_list = PostMedia.query.filter_by(post_id=post.id).all()
-            media = [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type
-            } for m in media_list]
-            
-            likes_count = Like.query.filter_by(post_id=post.id).count()
-            comments_count = Comment.query.filter_by(post_id=post.id).count()
-            
-            result.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'publishedAt': post.published_at.isoformat(),
-                'media': media,
-                'userId': post.user_id,
-                'categoryId': post.category_id,
-                'likes': likes_count,
-                'comments': comments_count,
-                'user': {
-                    'id': user.id if user else None,
-                    'pseudo': user.pseudo if user else 'Utilisateur supprimé',
-                    'profilePicture': user.profile_picture if user else None,
-                    'firstName': user.first_name if user else None,
-                    'lastName': user.last_name if user else None
-                },
-                'category': {
-                    'id': category.id if category else None,
-                    'name': category.name if category else 'Catégorie supprimée',
-                    'description': category.description if category else None
-                }
-            })
-        
-        return jsonify({
-            'posts': result,
-            'hasNext': posts.has_next,
-            'nextPage': posts.next_num if posts.has_next else None,
-            'totalPages': posts.pages,
-            'currentPage': page
-        })
+        return legacy_page_response(query, page, per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+def cursor_page_response(query, cursor, per_page):
+    """Page d'un fil par curseur (published_at, id), sans COUNT ni OFFSET"""
+    posts, next_cursor = keyset_paginate(query, Post.published_at, Post.id, cursor, per_page)
+    
+    return jsonify({
+        'posts': hydrate_posts(posts),
+        'hasNext': next_cursor is not None,
+        'nextCursor': next_cursor
+    })
+
+def legacy_page_response(query, page, per_page):
+    """Ancien mode par numéro de page (OFFSET + COUNT), à réserver aux clients non migrés"""
+    posts = query.order_by(Post.published_at.desc(), Post.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    
+    last_post = posts.items[-1] if posts.items else None
+    
+    return jsonify({
+        'posts': hydrate_posts(posts.items),
+        'hasNext': posts.has_next,
+        'nextPage': posts.next_num if posts.has_next else None,
+        'nextCursor': encode_cursor(last_post.published_at, last_post.id) if posts.has_next and last_post else None,
+        'totalPages': posts.pages,
+        'currentPage': page
+    })
@@ -3,16 +3,19 @@ from models import db
 from models.reply import Reply
 from models.post import Post
 from models.comment import Comment
-from models.notification import Notification
+from services.notifications import record_notification
 from models.user import User
 from models.reply_media import ReplyMedia
-from models.reply_like import ReplyLike
 from models.comment_media import CommentMedia
-from models.comment_like import CommentLike
 from models.post_media import PostMedia
-from models.like import Like
 from models.category import Category
-from services.file_upload import upload_file, determine_media_type
+from services.media_pipeline import request_media_files, prepare_media, add_media_rows, start_pending_uploads
+from services.upload_tickets import request_asset_ids, claim_assets, prepared_from_assets
+from services.counters import increment_counter
+from services.threads import (
+    thread_limits, load_users, load_reply_media, load_reply_subtrees,
+    load_reply_ancestors, page_reply_children, serialize_reply
+)
 
 replies_api = Blueprint('replies_api', __name__)
 
@@ -26,21 +29,15 @@ def create_replie():
             replies_id = data.get('replies_id')
             user_id = data.get('user_id')
             media_files = []
+            asset_ids = request_asset_ids(data)
         else:
             content = request.form.get('content')
             comment_id = request.form.get('comment_id')
             replies_id = request.form.get('replies_id')
             user_id = request.form.get('user_id')
             
-            media_files = []
-            if 'file' in request.files:
-                file = request.files['file']
-                if file.filename:
-                    media_files.append(file)
-                    
-            if 'files[]' in request.files:
-                files = request.files.getlist('files[]')
-                media_files.extend(files)
+            media_files = request_media_files(request.files, 'file', 'files[]')
+            asset_ids = request_asset_ids()
 
         if not content:
             return jsonify({'error': 'Content is required'}), 400
@@ -51,6 +48,9 @@ def create_replie():
         if comment_id and replies_id:
             return jsonify({'error': 'Cannot have both comment_id and replies_id'}), 400
         
+        claimed = prepared_from_assets(claim_assets(user_id, asset_ids, ['reply']))
+        prepared = claimed + prepare_media(media_files)
+
         new_replie = Reply(
             content=content, 
             comment_id=comment_id,
@@ -58,26 +58,14 @@ def create_replie():
             user_id=user_id
         )
         db.session.add(new_replie)
+        if comment_id:
+            increment_counter(Comment, comment_id, 'replies_count', 1)
+        else:
+            increment_counter(Reply, replies_id, 'replies_count', 1)
+        db.session.flush()
+        pending = add_media_rows(ReplyMedia, 'replies_id', new_replie.id, prepared)
         db.session.commit()
-
-        for file in media_files:
-            url, file_type = upload_file(file)
-            
-            if not url:
-                continue
-                
-            media_type = determine_media_type(file_type)
-            if not media_type:
-                continue
-                
-            reply_media = ReplyMedia(
-                replies_id=new_replie.id,
-                media_url=url,
-                media_type=media_type
-            )
-            db.session.add(reply_media)
-
-        db.session.commit()
+        start_pending_uploads(pending)
         
         # Notification adaptée selon le type de réponse
         if comment_id:
@@ -92,10 +80,11 @@ def create_replie():
             'id': m.id,
             'url': m.media_url,
             'type': m.media_type,
+            'status': m.status,
             'created_at': m.created_at.isoformat()
         } for m in reply_media_list]
 
-        likes_count = ReplyLike.query.filter_by(replies_id=new_replie.id).count()
+        likes_count = new_replie.likes_count
         
         return jsonify({
             'message': 'Reply created successfully',
@@ -118,6 +107,9 @@ def create_replie():
             }
         }), 201
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to create reply: {str(e)}'}), 500
@@ -126,16 +118,15 @@ def notify_user_on_new_replie(reply):
     try:
         comment = Comment.query.get(reply.comment_id)
         if comment:
-            notification = Notification(
+            record_notification(
+                comment.user_id,
+                "reply",
+                reply.user_id,
+                group_target=f"comment:{comment.id}",
                 post_id=comment.post_id,  
                 comments_id=comment.id,
-                user_id=comment.user_id,
-                replie_id=reply.id,
-                follow_id=None,
-                type="reply"
+                replie_id=reply.id
             )
-            db.session.add(notification)
-            db.session.commit()
 
             print(f"Notification envoyée à l'utilisateur {comment.user_id} pour une réponse au commentaire {comment.id}.")
         else:
@@ -148,13 +139,13 @@ def notify_user_on_reply_to_reply(reply):
     try:
         parent_reply = Reply.query.get(reply.replies_id)
         if parent_reply:
-            notification = Notification(
-                replie_id=reply.id,
-                user_id=parent_reply.user_id,
-                type="reply_to_reply"
+            record_notification(
+                parent_reply.user_id,
+                "reply_to_reply",
+                reply.user_id,
+                group_target=f"reply:{parent_reply.id}",
+                replie_id=reply.id
             )
-            db.session.add(notification)
-            db.session.commit()
 
             print(f"Notification envoyée à l'utilisateur {parent_reply.user_id} pour une réponse à sa réponse {parent_reply.id}.")
         else:
@@ -192,6 +183,10 @@ def delete_replie(replie_id):
         return jsonify({'error': 'Reply not found'}), 404
 
     db.session.delete(reply)
+    if reply.comment_id:
+        increment_counter(Comment, reply.comment_id, 'replies_count', -1)
+    elif reply.replies_id:
+        increment_counter(Reply, reply.replies_id, 'replies_count', -1)
     db.session.commit()
 
     return jsonify({'message': 'Reply deleted successfully'}), 200
@@ -203,96 +198,44 @@ def get_replie(replie_id):
         if not reply:
             return jsonify({'error': 'Reply not found'}), 404
 
-        user = User.query.get(reply.user_id)
-        
-        reply_media_list = ReplyMedia.query.filter_by(replies_id=reply.id).all()
-        media = [{
-            'id': m.id,
-            'url': m.media_url,
-            'type': m.media_type,
-            'created_at': m.created_at.isoformat()
-        } for m in reply_media_list]
-
-        likes_count = ReplyLike.query.filter_by(replies_id=reply.id).count()
-
-        sub_replies = Reply.query.filter_by(replies_id=reply.id).order_by(Reply.created_at.asc()).all()
-        sub_replies_data = []
-        
-        for sub_reply in sub_replies:
-            sub_reply_user = User.query.get(sub_reply.user_id)
-            sub_reply_media = ReplyMedia.query.filter_by(replies_id=sub_reply.id).all()
-            sub_reply_likes = ReplyLike.query.filter_by(replies_id=sub_reply.id).count()
-            
-            sub_sub_replies = Reply.query.filter_by(replies_id=sub_reply.id).order_by(Reply.created_at.asc()).all()
-            sub_sub_replies_data = []
-            
-            for sub_sub_reply in sub_sub_replies:
-                sub_sub_reply_user = User.query.get(sub_sub_reply.user_id)
-                sub_sub_reply_media = ReplyMedia.query.filter_by(replies_id=sub_sub_reply.id).all()
-                sub_sub_reply_likes = ReplyLike.query.filter_by(replies_id=sub_sub_reply.id).count()
-                
-                sub_sub_replies_data.append({
-                    'id': sub_sub_reply.id,
-                    'content': sub_sub_reply.content,
-                    'created_at': sub_sub_reply.created_at.isoformat(),
-                    'likes_count': sub_sub_reply_likes,
-                    'media': [{
-                        'id': m.id,
-                        'url': m.media_url,
-                        'type': m.media_type
-                    } for m in sub_sub_reply_media],
-                    'user': {
-                        'id': sub_sub_reply_user.id if sub_sub_reply_user else None,
-                        'pseudo': sub_sub_reply_user.pseudo if sub_sub_reply_user else None,
-                        'first_name': sub_sub_reply_user.first_name if sub_sub_reply_user else None,
-                        'last_name': sub_sub_reply_user.last_name if sub_sub_reply_user else None,
-                        'profile_picture': sub_sub_reply_user.profile_picture if sub_sub_reply_user else None
-                    }
-                })
-            
-            sub_replies_data.append({
-                'id': sub_reply.id,
-                'content': sub_reply.content,
-                'created_at': sub_reply.created_at.isoformat(),
-                'likes_count': sub_reply_likes,
-                'media': [{
-                    'id': m.id,
-                    'url': m.media_url,
-                    'type': m.media_type
-                } for m in sub_reply_media],
-                'sub_replies': sub_sub_replies_data,
-                'user': {
-                    'id': sub_reply_user.id if sub_reply_user else None,
-                    'pseudo': sub_reply_user.pseudo if sub_reply_user else None,
-                    'first_name': sub_reply_user.first_name if sub_reply_user else None,
-                    'last_name': sub_reply_user.last_name if sub_reply_user else None,
-                    'profile_picture': sub_reply_user.profile_picture if sub_reply_user else None
-                }
-            })
-
-        replie_data = {
-            'id': reply.id,
-            'content': reply.content,
-            'comment_id': reply.comment_id,
-            'replies_id': reply.replies_id,
-            'user_id': reply.user_id,
-            'created_at': reply.created_at.isoformat(),
-            'likes_count': likes_count,
-            'media': media,
-            'sub_replies': sub_replies_data,
-            'user': {
-                'id': user.id if user else None,
-                'pseudo': user.pseudo if user else None,
-                'first_name': user.first_name if user else None,
-                'last_name': user.last_name if user else None,
-                'profile_picture': user.profile_picture if user else None
-            }
-        }
+        depth, fanout = thread_limits(request.args, default_depth=2)
+        replie_data = load_reply_with_subtree(reply, depth, fanout)
 
         return jsonify({'reply': replie_data}), 200
     except Exception as e:
         return jsonify({'error': f'Failed to get reply: {str(e)}'}), 500
 
+def load_reply_with_subtree(reply, depth, fanout):
+    users = load_users([reply.user_id])
+    media = load_reply_media([reply.id])
+    sub_replies = load_reply_subtrees(reply_ids=[reply.id], depth=depth, fanout=fanout)
+
+    reply_data = serialize_reply(reply, users, media)
+    reply_data['sub_replies'] = sub_replies.get(('reply', reply.id), [])
+    reply_data['has_more_replies'] = reply.replies_count > len(reply_data['sub_replies'])
+    return reply_data
+
+@replies_api.route('/api/replies/<int:reply_id>/replies', methods=['GET'])
+def get_reply_children(reply_id):
+    """Page suivante des réponses directes d'une réponse (?cursor=, ?limit=, ?depth=)"""
+    try:
+        reply = Reply.query.get(reply_id)
+        if not reply:
+            return jsonify({'error': 'Reply not found'}), 404
+
+        depth, fanout = thread_limits(request.args, default_depth=1)
+        limit = min(max(request.args.get('limit', fanout, type=int) or fanout, 1), 100)
+
+        replies, next_cursor = page_reply_children(
+            ('reply', reply_id), request.args.get('cursor'), limit, depth, fanout
+        )
+
+        return jsonify({'replies': replies, 'nextCursor': next_cursor}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to get replies: {str(e)}'}), 500
+
 @replies_api.route('/api/replies/<int:replie_id>/comments', methods=['GET'])
 def get_replie_comments(replie_id):
     reply = Reply.query.get(replie_id)
@@ -319,130 +262,23 @@ def get_reply_thread(reply_id):
             'post': None
         }
 
-        main_reply_user = User.query.get(main_reply.user_id)
-        main_reply_media = ReplyMedia.query.filter_by(replies_id=main_reply.id).all()
-        main_reply_likes = ReplyLike.query.filter_by(replies_id=main_reply.id).count()
-        sub_replies = Reply.query.filter_by(replies_id=main_reply.id).order_by(Reply.created_at.asc()).all()
-        
-        sub_replies_data = []
-        for sub_reply in sub_replies:
-            sub_reply_user = User.query.get(sub_reply.user_id)
-            sub_reply_media = ReplyMedia.query.filter_by(replies_id=sub_reply.id).all()
-            sub_reply_likes = ReplyLike.query.filter_by(replies_id=sub_reply.id).count()
-            
-            sub_sub_replies = Reply.query.filter_by(replies_id=sub_reply.id).order_by(Reply.created_at.asc()).all()
-            sub_sub_replies_data = []
-            
-            for sub_sub_reply in sub_sub_replies:
-                sub_sub_reply_user = User.query.get(sub_sub_reply.user_id)
-                sub_sub_reply_media = ReplyMedia.query.filter_by(replies_id=sub_sub_reply.id).all()
-                sub_sub_reply_likes = ReplyLike.query.filter_by(replies_id=sub_sub_reply.id).count()
-                
-                sub_sub_replies_data.append({
-                    'id': sub_sub_reply.id,
-                    'content': sub_sub_reply.content,
-                    'created_at': sub_sub_reply.created_at.isoformat(),
-                    'likes_count': sub_sub_reply_likes,
-                    'media': [{
-                        'id': m.id,
-                        'url': m.media_url,
-                        'type': m.media_type
-                    } for m in sub_sub_reply_media],
-                    'user': {
-                        'id': sub_sub_reply_user.id if sub_sub_reply_user else None,
-                        'pseudo': sub_sub_reply_user.pseudo if sub_sub_reply_user else None,
-                        'first_name': sub_sub_reply_user.first_name if sub_sub_reply_user else None,
-                        'last_name': sub_sub_reply_user.last_name if sub_sub_reply_user else None,
-                        'profile_picture': sub_sub_reply_user.profile_picture if sub_sub_reply_user else None
-                    }
-                })
-            
-            sub_replies_data.append({
-                'id': sub_reply.id,
-                'content': sub_reply.content,
-                'created_at': sub_reply.created_at.isoformat(),
-                'likes_count': sub_reply_likes,
-                'media': [{
-                    'id': m.id,
-                    'url': m.media_url,
-                    'type': m.media_type
-                } for m in sub_reply_media],
-                'sub_replies': sub_sub_replies_data,
-                'user': {
-                    'id': sub_reply_user.id if sub_reply_user else None,
-                    'pseudo': sub_reply_user.pseudo if sub_reply_user else None,
-                    'first_name': sub_reply_user.first_name if sub_reply_user else None,
-                    'last_name': sub_reply_user.last_name if sub_reply_user else None,
-                    'profile_picture': sub_reply_user.profile_picture if sub_reply_user else None
-                }
-            })
-
-        thread['reply'] = {
-            'id': main_reply.id,
-            'content': main_reply.content,
-            'created_at': main_reply.created_at.isoformat(),
-            'likes_count': main_reply_likes,
-            'comment_id': main_reply.comment_id,
-            'replies_id': main_reply.replies_id,
-            'media': [{
-                'id': m.id,
-                'url': m.media_url,
-                'type': m.media_type
-            } for m in main_reply_media],
-            'sub_replies': sub_replies_data,
-            'user': {
-                'id': main_reply_user.id if main_reply_user else None,
-                'pseudo': main_reply_user.pseudo if main_reply_user else None,
-                'first_name': main_reply_user.first_name if main_reply_user else None,
-                'last_name': main_reply_user.last_name if main_reply_user else None,
-                'profile_picture': main_reply_user.profile_picture if main_reply_user else None
-            }
-        }
+        depth, fanout = thread_limits(request.args, default_depth=2)
+        thread['reply'] = load_reply_with_subtree(main_reply, depth, fanout)
 
-        current_reply = main_reply
-        parent_replies = []
-        
-        while current_reply.replies_id:
-            parent_reply = Reply.query.get(current_reply.replies_id)
-            if not parent_reply:
-                break
-                
-            parent_reply_user = User.query.get(parent_reply.user_id)
-            parent_reply_media = ReplyMedia.query.filter_by(replies_id=parent_reply.id).all()
-            parent_reply_likes = ReplyLike.query.filter_by(replies_id=parent_reply.id).count()
-            
-            parent_replies.append({
-                'id': parent_reply.id,
-                'content': parent_reply.content,
-                'created_at': parent_reply.created_at.isoformat(),
-                'likes_count': parent_reply_likes,
-                'comment_id': parent_reply.comment_id,
-                'replies_id': parent_reply.replies_id,
-                'media': [{
-                    'id': m.id,
-                    'url': m.media_url,
-                    'type': m.media_type
-                } for m in parent_reply_media],
-                'user': {
-                    'id': parent_reply_user.id if parent_reply_user else None,
-                    'pseudo': parent_reply_user.pseudo if parent_reply_user else None,
-                    'first_name': parent_reply_user.first_name if parent_reply_user else None,
-                    'last_name': parent_reply_user.last_name if parent_reply_user else None,
-                    'profile_picture': parent_reply_user.profile_picture if parent_reply_user else None
-                }
-            })
-            
-            current_reply = parent_reply
+        ancestors = load_reply_ancestors(main_reply)
+        users = load_users([ancestor.user_id for ancestor in ancestors])
+        media = load_reply_media([ancestor.id for ancestor in ancestors])
+        thread['parent_replies'] = [serialize_reply(ancestor, users, media) for ancestor in ancestors]
 
-        thread['parent_replies'] = list(reversed(parent_replies))
+        current_reply = ancestors[0] if ancestors else main_reply
 
         if current_reply.comment_id:
             comment = Comment.query.get(current_reply.comment_id)
             if comment:
                 comment_user = User.query.get(comment.user_id)
                 comment_media = CommentMedia.query.filter_by(comment_id=comment.id).all()
-                comment_likes = CommentLike.query.filter_by(comment_id=comment.id).count()
-                comment_replies = Reply.query.filter_by(comment_id=comment.id).order_by(Reply.created_at.asc()).all()
+                comment_likes = comment.likes_count
+                comment_replies = Reply.query.filter_by(comment_id=comment.id).order_by(Reply.created_at.asc()).limit(fanout).all()
                 
                 thread['comment'] = {
                     'id': comment.id,
@@ -459,8 +295,9 @@ def get_reply_thread(reply_id):
                         'id': r.id,
                         'content': r.content,
                         'created_at': r.created_at.isoformat(),
-                        'likes_count': ReplyLike.query.filter_by(replies_id=r.id).count()
+                        'likes_count': r.likes_count
                     } for r in comment_replies],
+                    'replies_count': comment.replies_count,
                     'user': {
                         'id': comment_user.id if comment_user else None,
                         'pseudo': comment_user.pseudo if comment_user else None,
@@ -474,8 +311,8 @@ def get_reply_thread(reply_id):
                 if post:
                     post_user = User.query.get(post.user_id)
                     post_media = PostMedia.query.filter_by(post_id=post.id).all()
-                    post_likes = Like.query.filter_by(post_id=post.id).count()
-                    post_comments = Comment.query.filter_by(post_id=post.id).count()
+                    post_likes = post.likes_count
+                    post_comments = post.comments_count
                     category = Category.query.get(post.category_id) if post.category_id else None
                     
                     thread['post'] = {
@@ -3,6 +3,7 @@ from models import db
 from models.reply_like import ReplyLike
 from models.reply import Reply
 from models.user import User
+from services.counters import increment_counter
 
 reply_likes_bp = Blueprint('reply_likes', __name__)
 
@@ -28,9 +29,10 @@ def toggle_reply_like(reply_id):
         
         if existing_like:
             db.session.delete(existing_like)
+            increment_counter(Reply, reply_id, 'likes_count', -1)
             db.session.commit()
             
-            likes_count = ReplyLike.query.filter_by(replies_id=reply_id).count()
+            likes_count = reply.likes_count
             
             return jsonify({
                 'message': 'Like retiré',
@@ -40,9 +42,10 @@ def toggle_reply_like(reply_id):
         else:
             new_like = ReplyLike(user_id=user_id, replies_id=reply_id)
             db.session.add(new_like)
+            increment_counter(Reply, reply_id, 'likes_count', 1)
             db.session.commit()
             
-            likes_count = ReplyLike.query.filter_by(replies_id=reply_id).count()
+            likes_count = reply.likes_count
             
             return jsonify({
                 'message': 'Réponse likée',
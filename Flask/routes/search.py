@@ -1,21 +1,64 @@
 from flask import Blueprint, request, jsonify
 from models.user import User
-from models.category import Category
+from services.search import SEARCH_KINDS, search_documents, hydrate_results
 
 search_bp = Blueprint('search', __name__)
 
+def search_page_args():
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int) or 20, 1), 50)
+    return page, per_page
+
+@search_bp.route('/api/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    page, per_page = search_page_args()
+
+    requested_types = [kind.strip() for kind in request.args.get('type', '').split(',') if kind.strip()]
+    invalid_types = [kind for kind in requested_types if kind not in SEARCH_KINDS]
+    if invalid_types:
+        return jsonify({'error': f"Type de recherche invalide: {', '.join(invalid_types)}"}), 400
+    kinds = requested_types or list(SEARCH_KINDS)
+
+    if not query:
+        return jsonify({'query': query, 'types': kinds, 'results': [], 'page': page, 'per_page': per_page, 'has_more': False})
+
+    try:
+        viewer_id = request.args.get('user_id', type=int)
+        matches, has_more = search_documents(query, kinds, page, per_page, viewer_id)
+        return jsonify({
+            'query': query,
+            'types': kinds,
+            'results': hydrate_results(matches),
+            'page': page,
+            'per_page': per_page,
+            'has_more': has_more
+        })
+    except Exception as e:
+        print(f"Erreur lors de la recherche '{query}': {e}")
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
 @search_bp.route('/api/users/search', methods=['GET'])
 def search_users():
     query = request.args.get('q', '')
     if not query:
         return jsonify({'users': []})
-    users = User.query.filter(User.pseudo.ilike(f"%{query}%")).all()
-    return jsonify({'users': [u.to_dict() for u in users]})
+    page, per_page = search_page_args()
+    # Recherche par sous-chaîne du pseudo comme avant l'index, les pseudos qui commencent par la requête en premier
+    users = (
+        User.query.filter(User.pseudo.icontains(query, autoescape=True))
+        .order_by(User.pseudo.istartswith(query, autoescape=True).desc(), User.pseudo.asc(), User.id.asc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return jsonify({'users': [user.to_dict() for user in users]})
 
 @search_bp.route('/api/categories/search', methods=['GET'])
 def search_categories():
     query = request.args.get('q', '')
     if not query:
         return jsonify({'categories': []})
-    categories = Category.query.filter(Category.name.ilike(f"%{query}%")).all()
-    return jsonify({'categories': [ {"id": c.id, "name": c.name} for c in categories ]})
\ No newline at end of file
+    page, per_page = search_page_args()
+    matches, _ = search_documents(query, ['category'], page, per_page)
+    return jsonify({'categories': [{"id": result['item']['id'], "name": result['item']['name']} for result in hydrate_results(matches)]})
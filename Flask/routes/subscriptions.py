@@ -5,6 +5,7 @@ from models import db
 from models.subscription import Subscription
 from models.user import User
 from datetime import datetime
+from services.cache import invalidate_profile
 
 subscriptions_bp = Blueprint('subscriptions', __name__)
 
@@ -162,6 +163,7 @@ def handle_checkout_completed(session):
             
             if plan_key in SUBSCRIPTION_TYPES:
                 user.subscription = plan_key 
+                invalidate_profile(user.id)
                 current_app.logger.info(f"DEBUG - User.subscription changé de '{old_subscription}' à '{user.subscription}'")
             else:
                 raise ValueError(f"Type d'abonnement invalide pour ENUM: {plan_key}")
@@ -271,6 +273,7 @@ def cancel_subscription(user_id):
             old_subscription = user.subscription
             validate_subscription_type('free')
             user.subscription = 'free'
+            invalidate_profile(user.id)
             current_app.logger.info(f"DEBUG - Utilisateur {user_id} passé de '{old_subscription}' à 'free'")
         
         db.session.commit()
@@ -0,0 +1,70 @@
+from flask import Blueprint, request, jsonify
+from models import db
+from services.storage import LocalStorage, get_storage
+from services.upload_tickets import issue_ticket, serialize_ticket, load_ticket, store_local_upload, complete_ticket
+
+uploads_bp = Blueprint('uploads', __name__)
+
+def serialize_asset(asset):
+    return {
+        'asset_id': asset.id,
+        'url': asset.url,
+        'content_type': asset.content_type,
+        'size': asset.size
+    }
+
+@uploads_bp.route('/api/uploads/tickets', methods=['POST'])
+def create_upload_ticket():
+    """
+    Première étape d'un téléversement direct : le client annonce l'usage, le type et la taille
+    du fichier et reçoit la requête à envoyer au stockage (URL, champs signés, en-têtes).
+    """
+    data = request.get_json() or {}
+    if not data.get('purpose') or not data.get('content_type'):
+        return jsonify({'error': 'purpose et content_type sont requis'}), 400
+
+    try:
+        ticket, token = issue_ticket(data.get('user_id'), data['purpose'], data['content_type'], data.get('size'))
+        return jsonify(serialize_ticket(ticket, token)), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors de la création du ticket de téléversement: {e}")
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@uploads_bp.route('/api/uploads/local/<token>', methods=['PUT'])
+def local_upload(token):
+    """Réception directe du substitut local : le jeton signé tient lieu d'URL pré-signée"""
+    if not isinstance(get_storage(), LocalStorage):
+        return jsonify({'error': 'Stockage local désactivé'}), 404
+
+    try:
+        ticket = load_ticket(token)
+        if request.content_length and request.content_length > ticket.max_size:
+            return jsonify({'error': 'Le fichier dépasse la taille autorisée par le ticket'}), 413
+        asset = store_local_upload(ticket, request.stream, request.content_type)
+        return jsonify(serialize_asset(asset)), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors de la réception du fichier: {e}")
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
+
+@uploads_bp.route('/api/uploads/complete', methods=['POST'])
+def complete_upload():
+    """Seconde étape : confirme le dépôt auprès du stockage et retourne l'asset à envoyer avec le post"""
+    data = request.get_json() or {}
+    if not data.get('ticket_id'):
+        return jsonify({'error': 'ticket_id est requis'}), 400
+
+    try:
+        asset = complete_ticket(data['ticket_id'], data.get('user_id'))
+        return jsonify(serialize_asset(asset)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors de la confirmation du téléversement: {e}")
+        return jsonify({'error': f'Erreur serveur: {str(e)}'}), 500
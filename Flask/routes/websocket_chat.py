@@ -1,26 +1,42 @@
 import os
-from flask import request
+from flask import request, current_app
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from models import db
 from models.user import User
 from models.chat import Chat
+from services.conversations import conversation_id_for, record_message, mark_conversation_read
+from services.notifications import notification_state, init_notification_buffer
+from services.polls import init_poll_results, poll_results_snapshot
+from services.presence import create_presence_registry, get_presence
+from services.socket_queue import message_queue_options
+from services.message_writer import MessageWriter
 import json
 from datetime import datetime, timezone, timedelta
 
 # Initialiser SocketIO globalement
 socketio = SocketIO()
 
-# Stockage des utilisateurs connectés
-connected_users = {}
-
 def init_socketio(app):
     """Initialiser SocketIO avec l'application Flask"""
     frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+
+    # Registre de présence partagé et file de messages : les émissions vers les rooms
+    # user_{id} et conv_{id} atteignent les clients connectés à n'importe quel worker
+    app.extensions['presence'] = create_presence_registry(app.config.get('SOCKETIO_PRESENCE_URL'))
+    queue_options = message_queue_options(
+        app.config.get('SOCKETIO_MESSAGE_QUEUE'),
+        app.config.get('SOCKETIO_CHANNEL', 'flask-socketio')
+    )
     
     socketio.init_app(app, 
                      cors_allowed_origins=[frontend_url, "http://127.0.0.1:3000", "http://localhost:8080", "null"],
                      logger=True, 
-                     engineio_logger=True)
+                     engineio_logger=True,
+                     async_mode=app.config.get('SOCKETIO_ASYNC_MODE'),
+                     **queue_options)
+    init_message_writer(app)
+    init_notification_buffer(app, socketio)
+    init_poll_results(app, socketio)
     return socketio
 
 @socketio.on('connect')
@@ -31,20 +47,20 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f'Client déconnecté: {request.sid}')
-    # Supprimer l'utilisateur de la liste des connectés
-    for user_id, sid in list(connected_users.items()):
-        if sid == request.sid:
-            del connected_users[user_id]
-            break
+    # Index inverse sid -> utilisateur : pas de parcours des utilisateurs connectés
+    get_presence().remove_sid(request.sid)
 
 @socketio.on('join_user')
 def handle_join_user(data):
     """L'utilisateur rejoint sa room personnelle"""
     user_id = data.get('user_id')
     if user_id:
-        connected_users[user_id] = request.sid
+        get_presence().add(user_id, request.sid)
         join_room(f"user_{user_id}")
         emit('status', {'message': f'Rejoint la room user_{user_id}'})
+        # Le client compare latest_seq à la dernière notification reçue pour savoir s'il doit rattraper
+        latest_seq, unread = notification_state(user_id)
+        emit('notification_state', {'latest_seq': latest_seq, 'unread_count': unread})
         print(f'Utilisateur {user_id} a rejoint sa room')
 
 @socketio.on('join_conversation')
@@ -55,6 +71,7 @@ def handle_join_conversation(data):
     
     if conversation_id and user_id:
         join_room(f"conv_{conversation_id}")
+        mark_conversation_read(conversation_id, user_id)
         emit('status', {'message': f'Rejoint la conversation {conversation_id}'})
         print(f'Utilisateur {user_id} a rejoint la conversation {conversation_id}')
 
@@ -69,13 +86,152 @@ def handle_leave_conversation(data):
         emit('status', {'message': f'Quitté la conversation {conversation_id}'})
         print(f'Utilisateur {user_id} a quitté la conversation {conversation_id}')
 
+@socketio.on('join_poll')
+def handle_join_poll(data):
+    """Le client suit les résultats d'un sondage et reçoit aussitôt le dernier instantané"""
+    poll_id = data.get('poll_id')
+    if poll_id:
+        join_room(f"poll_{poll_id}")
+        snapshot = poll_results_snapshot(int(poll_id))
+        if snapshot:
+            emit('poll_results', snapshot)
+
+@socketio.on('leave_poll')
+def handle_leave_poll(data):
+    poll_id = data.get('poll_id')
+    if poll_id:
+        leave_room(f"poll_{poll_id}")
+
+def format_timestamp(value):
+    return value.isoformat().replace('+00:00', 'Z') if value else None
+
+def save_message(job):
+    """
+    Enregistre un message dans la session courante (sans commit).
+    Retourne (chat, doublon) ; un message identique envoyé dans les 5 dernières secondes
+    est renvoyé tel quel au lieu d'être dupliqué.
+    """
+    recent_threshold = datetime.now(timezone.utc) - timedelta(seconds=5)
+    existing_message = Chat.query.filter(
+        Chat.conversation_id == job['conversation_id'],
+        Chat.sender_id == job['sender_id'],
+        Chat.content == job['content'],
+        Chat.send_at >= recent_threshold
+    ).first()
+
+    if existing_message:
+        print(f"⚠️ Duplicate message detected, returning existing message: {existing_message.id}")
+        return existing_message, True
+
+    new_chat = Chat(
+        conversation_id=job['conversation_id'],
+        sender_id=job['sender_id'],
+        content=job['content'],
+        reply_to_id=None
+    )
+    db.session.add(new_chat)
+    record_message(new_chat, participant_ids=[job['sender_id'], job['recipient_id']])
+    return new_chat, False
+
+def deliver_message(job, chat, sender, duplicate):
+    """Diffuse un message enregistré et confirme l'envoi à l'expéditeur"""
+    message_data = {
+        'id': chat.id,
+        'conversation_id': job['conversation_id'],
+        'sender_id': job['sender_id'],
+        'content': job['content'],
+        'send_at': format_timestamp(chat.send_at),
+        'sender_info': {
+            'id': sender.id,
+            'first_name': getattr(sender, 'first_name', ''),
+            'last_name': getattr(sender, 'last_name', ''),
+            'email': sender.email
+        }
+    }
+
+    if not duplicate:
+        # Envoyer le message aux participants de la conversation (sauf l'expéditeur)
+        socketio.emit('new_message', message_data, to=f"conv_{job['conversation_id']}", skip_sid=job['sid'])
+
+        # Envoyer notification au destinataire
+        socketio.emit('message_notification', {
+            'conversation_id': job['conversation_id'],
+            'sender_id': job['sender_id'],
+            'content': job['content'],
+            'timestamp': format_timestamp(chat.send_at)
+        }, to=f"user_{job['recipient_id']}")
+
+    # Confirmer l'envoi à l'expéditeur
+    socketio.emit('message_sent', {
+        'success': True,
+        'message_id': chat.id,
+        'conversation_id': job['conversation_id'],
+        'timestamp': format_timestamp(chat.send_at),
+        'tempId': job['temp_id'],
+        'message_data': message_data
+    }, to=job['sid'])
+
+def persist_messages(jobs):
+    """
+    Enregistre un lot de messages en une seule transaction puis les diffuse.
+    Si le lot échoue, chaque message est rejoué seul pour isoler le message fautif.
+    """
+    users = {
+        user.id: user for user in
+        User.query.filter(User.id.in_({job['sender_id'] for job in jobs} | {job['recipient_id'] for job in jobs})).all()
+    }
+
+    valid_jobs = []
+    for job in jobs:
+        if job['sender_id'] in users and job['recipient_id'] in users:
+            valid_jobs.append(job)
+        else:
+            socketio.emit('error', {'message': 'Utilisateur non trouvé', 'tempId': job['temp_id']}, to=job['sid'])
+
+    try:
+        saved = [(job, *save_message(job)) for job in valid_jobs]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(valid_jobs) > 1:
+            for job in valid_jobs:
+                persist_messages([job])
+            return
+        for job in valid_jobs:
+            print(f"💥 Error saving message from {job['sender_id']}: {str(e)}")
+            socketio.emit('error', {'message': f'Erreur lors de l\'envoi: {str(e)}', 'tempId': job['temp_id']}, to=job['sid'])
+        return
+
+    for job, chat, duplicate in saved:
+        deliver_message(job, chat, users[job['sender_id']], duplicate)
+
+def init_message_writer(app):
+    """
+    File d'écriture différée des messages, désactivable avec CHAT_WRITE_BEHIND=false.
+    Les messages sont répartis entre les workers par conversation : ceux d'une même conversation
+    sont enregistrés dans l'ordre d'envoi (ids et dates croissants, pagination before_id/after_id)
+    et la détection des doublons ne se fait jamais en concurrence.
+    """
+    if not app.config.get('CHAT_WRITE_BEHIND', True):
+        return
+    app.extensions['message_writer'] = MessageWriter(
+        app,
+        socketio,
+        persist_messages,
+        maxsize=app.config.get('CHAT_WRITE_QUEUE_SIZE', 10000),
+        workers=app.config.get('CHAT_WRITE_WORKERS', 4),
+        batch_size=app.config.get('CHAT_WRITE_BATCH_SIZE', 100),
+        key=lambda job: job['conversation_id']
+    )
+
 @socketio.on('send_message')
 def handle_send_message(data):
-    """Envoi d'un message via WebSocket"""
+    """
+    Envoi d'un message via WebSocket.
+    Le message est déposé dans la file d'écriture différée et l'événement est acquitté
+    immédiatement ; la diffusion et la confirmation message_sent suivent l'enregistrement.
+    """
     try:
-        print(f"\n🚀 === SENDING MESSAGE VIA WEBSOCKET ===")
-        print(f"📨 Received data: {data}")
-        
         sender_id = data.get('sender_id')
         recipient_id = data.get('recipient_id')
         content = data.get('content')
@@ -83,124 +239,42 @@ def handle_send_message(data):
         temp_id = data.get('tempId')
 
         if not all([sender_id, recipient_id, content]):
-            print("❌ Missing required data")
             emit('error', {'message': 'Données manquantes'})
             return
 
-        sender = User.query.get(sender_id)
-        recipient = User.query.get(recipient_id)
-        
-        if not sender or not recipient:
-            print("❌ User not found")
+        try:
+            sender_id = int(sender_id)
+            recipient_id = int(recipient_id)
+        except (ValueError, TypeError):
             emit('error', {'message': 'Utilisateur non trouvé'})
             return
 
         # Générer l'ID de conversation
         if not conversation_id or isinstance(conversation_id, str):
-            sorted_ids = sorted([sender_id, recipient_id])
-            conversation_id = int(f"{sorted_ids[0]}{sorted_ids[1]:03d}")
+            conversation_id = conversation_id_for(sender_id, recipient_id)
         
         try:
             conversation_id = int(conversation_id)
         except (ValueError, TypeError):
-            sorted_ids = sorted([sender_id, recipient_id])
-            conversation_id = int(f"{sorted_ids[0]}{sorted_ids[1]:03d}")
-
-        print(f"💡 Final conversation_id: {conversation_id}")
-
-        # VÉRIFICATION ANTI-DOUBLON : Regarder s'il n'y a pas déjà un message identique récent
-        recent_threshold = datetime.now(timezone.utc) - timedelta(seconds=5)
-        existing_message = Chat.query.filter(
-            Chat.conversation_id == conversation_id,
-            Chat.sender_id == sender_id,
-            Chat.content == content,
-            Chat.send_at >= recent_threshold
-        ).first()
-        
-        if existing_message:
-            print(f"⚠️ Duplicate message detected, returning existing message: {existing_message.id}")
-            
-            # Retourner le message existant au lieu d'en créer un nouveau
-            message_data = {
-                'id': existing_message.id,
-                'conversation_id': conversation_id,
-                'sender_id': sender_id,
-                'content': content,
-                'send_at': existing_message.send_at.isoformat().replace('+00:00', 'Z'),
-                'sender_info': {
-                    'id': sender.id,
-                    'first_name': getattr(sender, 'first_name', ''),
-                    'last_name': getattr(sender, 'last_name', ''),
-                    'email': sender.email
-                }
-            }
-            
-            # Confirmer l'envoi à l'expéditeur avec le message existant
-            emit('message_sent', {
-                'success': True,
-                'message_id': existing_message.id,
-                'conversation_id': conversation_id,
-                'timestamp': existing_message.send_at.isoformat().replace('+00:00', 'Z'),
-                'tempId': temp_id,
-                'message_data': message_data
-            })
-            
-            return
+            conversation_id = conversation_id_for(sender_id, recipient_id)
 
-        new_chat = Chat(
-            conversation_id=conversation_id,
-            sender_id=sender_id,
-            content=content,
-            reply_to_id=None
-        )
-        
-        new_chat.send_at = datetime.now(timezone.utc)
-        
-        db.session.add(new_chat)
-        db.session.commit()
-        
-        print(f"💾 NEW message saved to DB with ID: {new_chat.id}")
-
-        message_data = {
-            'id': new_chat.id,
-            'conversation_id': conversation_id,
+        job = {
+            'sid': request.sid,
             'sender_id': sender_id,
-            'content': content,
-            'send_at': new_chat.send_at.isoformat().replace('+00:00', 'Z'),
-            'sender_info': {
-                'id': sender.id,
-                'first_name': getattr(sender, 'first_name', ''),
-                'last_name': getattr(sender, 'last_name', ''),
-                'email': sender.email
-            }
-        }
-
-        # Envoyer le message aux participants de la conversation
-        room_name = f"conv_{conversation_id}"
-        print(f"📡 Broadcasting to room: {room_name}")
-        socketio.emit('new_message', message_data, room=room_name, include_self=False)
-        
-        # Envoyer notification au destinataire
-        user_room = f"user_{recipient_id}"
-        socketio.emit('message_notification', {
+            'recipient_id': recipient_id,
             'conversation_id': conversation_id,
-            'sender_id': sender_id,
             'content': content,
-            'timestamp': new_chat.send_at.isoformat().replace('+00:00', 'Z')
-        }, room=user_room)
+            'temp_id': temp_id
+        }
 
-        # Confirmer l'envoi à l'expéditeur
-        emit('message_sent', {
-            'success': True,
-            'message_id': new_chat.id,
-            'conversation_id': conversation_id,
-            'timestamp': new_chat.send_at.isoformat().replace('+00:00', 'Z'),
-            'tempId': temp_id,
-            'message_data': message_data
-        })
+        writer = current_app.extensions.get('message_writer')
+        if writer and writer.submit(job):
+            emit('message_queued', {'tempId': temp_id, 'conversation_id': conversation_id})
+            return {'queued': True, 'tempId': temp_id}
 
-        print(f"✅ Message successfully sent from {sender_id} to {recipient_id}")
-        print(f"=== END SENDING MESSAGE ===\n")
+        # File désactivée ou pleine : enregistrement synchrone
+        persist_messages([job])
+        return {'queued': False, 'tempId': temp_id}
 
     except Exception as e:
         db.session.rollback()
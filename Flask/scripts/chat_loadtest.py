@@ -0,0 +1,153 @@
+"""
+Banc de charge du chat temps réel.
+
+Connecte N clients Socket.IO simulés, groupés par paires d'utilisateurs existants,
+chacun envoyant M messages à son partenaire. Mesure le débit (messages livrés par
+seconde) et la latence de livraison (envoi -> réception de new_message chez le
+destinataire) : p50, p95, p99 et max.
+
+    python scripts/chat_loadtest.py --url http://localhost:5000 --user-ids 1-200 --clients 200 --messages 50
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+import socketio
+
+def parse_user_ids(value):
+    if '-' in value:
+        first, last = value.split('-', 1)
+        return list(range(int(first), int(last) + 1))
+    return [int(user_id) for user_id in value.split(',') if user_id]
+
+def percentile(values, ratio):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(ratio * len(ordered))) - 1))
+    return ordered[index]
+
+def conversation_id_for(user_a, user_b):
+    sorted_ids = sorted([int(user_a), int(user_b)])
+    return int(f"{sorted_ids[0]}{sorted_ids[1]:03d}")
+
+class SimulatedClient:
+    def __init__(self, url, origin, user_id, partner_id, results):
+        self.url = url
+        self.user_id = user_id
+        self.partner_id = partner_id
+        self.conversation_id = conversation_id_for(user_id, partner_id)
+        self.results = results
+        # Le serveur n'accepte que les origines CORS configurées (FRONTEND_URL)
+        self.sio = socketio.Client(reconnection=False, websocket_extra_options={'origin': origin})
+        self.sio.on('new_message', self.on_new_message)
+        self.sio.on('error', self.on_error)
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'])
+        self.sio.emit('join_user', {'user_id': self.user_id})
+        self.sio.emit('join_conversation', {'conversation_id': self.conversation_id, 'user_id': self.user_id})
+
+    def on_new_message(self, data):
+        received_at = time.perf_counter()
+        if data.get('sender_id') == self.user_id:
+            return
+        # Un message peut atteindre plusieurs clients du même utilisateur : seule la première livraison compte
+        sent_at = self.results.sent.pop(data.get('content'), None)
+        if sent_at is not None:
+            self.results.record_delivery(received_at - sent_at)
+
+    def on_error(self, data):
+        self.results.record_error(data)
+
+    def send_messages(self, count, interval):
+        for _ in range(count):
+            content = f"loadtest:{uuid.uuid4().hex}"
+            self.results.sent[content] = time.perf_counter()
+            self.sio.emit('send_message', {
+                'sender_id': self.user_id,
+                'recipient_id': self.partner_id,
+                'conversation_id': self.conversation_id,
+                'content': content,
+                'tempId': content
+            })
+            if interval:
+                time.sleep(interval)
+
+    def disconnect(self):
+        self.sio.disconnect()
+
+class Results:
+    def __init__(self):
+        self.sent = {}
+        self.latencies = []
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def record_delivery(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def record_error(self, data):
+        with self._lock:
+            self.errors.append(data)
+
+def run(url, origin, user_ids, clients_count, messages, interval, drain_timeout):
+    if len(user_ids) < 2:
+        raise SystemExit("Au moins deux utilisateurs sont nécessaires")
+
+    results = Results()
+    clients = []
+    for index in range(clients_count - clients_count % 2):
+        user_id = user_ids[index % len(user_ids)]
+        partner_id = user_ids[(index + 1 if index % 2 == 0 else index - 1) % len(user_ids)]
+        clients.append(SimulatedClient(url, origin, user_id, partner_id, results))
+
+    for client in clients:
+        client.connect()
+    print(f"{len(clients)} clients connectés à {url}")
+
+    expected = len(clients) * messages
+    started_at = time.perf_counter()
+    senders = [threading.Thread(target=client.send_messages, args=(messages, interval)) for client in clients]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    sent_duration = time.perf_counter() - started_at
+
+    deadline = time.perf_counter() + drain_timeout
+    while len(results.latencies) < expected and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    total_duration = time.perf_counter() - started_at
+
+    for client in clients:
+        client.disconnect()
+
+    delivered = len(results.latencies)
+    print(f"Messages envoyés   : {expected} en {sent_duration:.2f}s ({expected / sent_duration:.0f} msg/s)")
+    print(f"Messages livrés    : {delivered} en {total_duration:.2f}s ({delivered / total_duration:.0f} msg/s)")
+    if results.latencies:
+        latencies_ms = [latency * 1000 for latency in results.latencies]
+        print(f"Latence p50        : {percentile(latencies_ms, 0.50):.1f} ms")
+        print(f"Latence p95        : {percentile(latencies_ms, 0.95):.1f} ms")
+        print(f"Latence p99        : {percentile(latencies_ms, 0.99):.1f} ms")
+        print(f"Latence max        : {max(latencies_ms):.1f} ms")
+        print(f"Latence moyenne    : {statistics.mean(latencies_ms):.1f} ms")
+    print(f"Erreurs            : {len(results.errors)}")
+    if delivered < expected:
+        print(f"⚠️ {expected - delivered} message(s) non livré(s) après {drain_timeout}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc de charge du chat Socket.IO")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--origin', default='http://localhost:3000', help="Origine acceptée par le serveur (FRONTEND_URL)")
+    parser.add_argument('--user-ids', default='1-10', help="Plage (1-200) ou liste (1,2,3) d'utilisateurs existants")
+    parser.add_argument('--clients', type=int, default=10, help="Nombre de clients simulés (arrondi au nombre pair)")
+    parser.add_argument('--messages', type=int, default=20, help="Messages envoyés par client")
+    parser.add_argument('--interval', type=float, default=0.0, help="Pause entre deux messages d'un client (s)")
+    parser.add_argument('--drain-timeout', type=float, default=30.0, help="Attente maximale des livraisons (s)")
+    args = parser.parse_args()
+
+    run(args.url, args.origin, parse_user_ids(args.user_ids), args.clients, args.messages, args.interval, args.drain_timeout)
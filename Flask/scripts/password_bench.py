@@ -0,0 +1,120 @@
+"""
+Banc des connexions (bcrypt).
+
+Sans --url : mesure en local le coût d'une vérification bcrypt pour chaque coût demandé,
+puis le débit de vérifications concurrentes à travers un pool de N threads système (le
+calcul libère le GIL), rapporté au nombre de cœurs : c'est le plafond de connexions par
+seconde et par cœur d'un worker pour ce coût.
+
+Avec --url : envoie des connexions concurrentes à /api/login avec un compte existant et
+rapporte le débit, les connexions par seconde et par cœur (--cores : cœurs alloués au
+serveur) et la latence : p50, p95, p99 et max.
+
+    python scripts/password_bench.py --rounds 10,12 --concurrency 1,4,16
+    python scripts/password_bench.py --url http://localhost:5000 --email a@b.fr --password 'Motdepasse1!' --requests 200 --concurrency 16 --cores 4
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def percentile(values, ratio):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(ratio * len(ordered))) - 1))
+    return ordered[index]
+
+def parse_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+def report(label, count, duration, cores, latencies):
+    print(f"{label:<28}: {count / duration:8.1f} connexions/s, {count / duration / cores:7.1f}/s/cœur, "
+          f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, p95 {percentile(latencies, 0.95) * 1000:7.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms, max {max(latencies) * 1000:7.1f} ms")
+
+def run_local(rounds_list, concurrency_list, checks, cores):
+    import bcrypt
+
+    print(f"{cores} cœur(s), {checks} vérifications par mesure")
+    for rounds in rounds_list:
+        password = b'Motdepasse1!'
+        password_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+        print(f"\nCoût {rounds}")
+        for concurrency in concurrency_list:
+            latencies = []
+            lock = threading.Lock()
+
+            def check(_):
+                started_at = time.perf_counter()
+                if not bcrypt.checkpw(password, password_hash):
+                    raise SystemExit("Vérification bcrypt incorrecte")
+                elapsed = time.perf_counter() - started_at
+                with lock:
+                    latencies.append(elapsed)
+
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(check, range(checks)))
+            report(f"pool de {concurrency} thread(s)", checks, time.perf_counter() - started_at, cores, latencies)
+
+def login(url, email, password):
+    data = json.dumps({'email': email, 'password': password}).encode()
+    request = urllib.request.Request(f"{url}/api/login", data=data, method='POST', headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def run_http(url, email, password, requests_count, concurrency, cores):
+    if login(url, email, password) != 200:
+        raise SystemExit("Connexion refusée : vérifier --email et --password")
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def attempt(_):
+        started_at = time.perf_counter()
+        status = login(url, email, password)
+        elapsed = time.perf_counter() - started_at
+        with lock:
+            latencies.append(elapsed)
+            outcomes[status] += 1
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(attempt, range(requests_count)))
+    duration = time.perf_counter() - started_at
+
+    print(f"Réponses                    : {dict(sorted(outcomes.items()))}")
+    report(f"{concurrency} client(s), {cores} cœur(s)", requests_count, duration, cores, latencies)
+    return outcomes[200] == requests_count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc des connexions et du coût bcrypt")
+    parser.add_argument('--url', help="Serveur à tester ; sans --url, mesure bcrypt en local")
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    parser.add_argument('--requests', type=int, default=200, help="Connexions envoyées (avec --url)")
+    parser.add_argument('--rounds', default='10,12', help="Coûts bcrypt mesurés en local : '10,12'")
+    parser.add_argument('--checks', type=int, default=64, help="Vérifications par mesure (en local)")
+    parser.add_argument('--concurrency', default='1,4,16', help="Vérifications ou connexions en parallèle : '1,4,16'")
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1, help="Cœurs alloués au serveur")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.email or not args.password:
+            parser.error("--email et --password sont requis avec --url")
+        ok = True
+        for concurrency in parse_list(args.concurrency):
+            ok = run_http(args.url.rstrip('/'), args.email, args.password, args.requests, concurrency, args.cores) and ok
+        raise SystemExit(0 if ok else 1)
+
+    run_local(parse_list(args.rounds), parse_list(args.concurrency), args.checks, args.cores)
@@ -0,0 +1,112 @@
+"""
+Banc de concurrence des votes de sondage.
+
+Fait voter en parallèle N utilisateurs existants sur un même sondage (chacun vote
+--attempts fois, les votes en double doivent être refusés), puis compare les totaux
+retournés par l'API aux votes acceptés : aucun vote ne doit être perdu ni compté deux fois.
+Mesure aussi le débit et la latence des votes : p50, p95, p99 et max.
+
+    python scripts/poll_vote_bench.py --url http://localhost:5000 --poll-id 1 --user-ids 1-500 --concurrency 200
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_user_ids(value):
+    if '-' in value:
+        first, last = value.split('-', 1)
+        return list(range(int(first), int(last) + 1))
+    return [int(user_id) for user_id in value.split(',') if user_id]
+
+def percentile(values, ratio):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(ratio * len(ordered))) - 1))
+    return ordered[index]
+
+def request_json(method, url, payload=None, timeout=30):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def read_votes(url, poll_id):
+    # Paramètre unique : la lecture contourne le cache de réponses local des autres workers
+    status, body = request_json('GET', f"{url}/api/polls/{poll_id}?t={time.time()}")
+    if status != 200:
+        raise SystemExit(f"Sondage {poll_id} introuvable (HTTP {status})")
+    return body['poll']['votes']
+
+def run(url, poll_id, user_ids, concurrency, attempts):
+    before = read_votes(url, poll_id)
+    options = len(before)
+    start = threading.Event()
+    lock = threading.Lock()
+    outcomes = Counter()
+    accepted = Counter()
+    accepted_users = Counter()
+    latencies = []
+
+    def vote(user_id):
+        option = user_id % options
+        # Les premiers votes partent ensemble pour maximiser les conflits
+        start.wait()
+        started_at = time.perf_counter()
+        status, _ = request_json('POST', f"{url}/api/polls/{poll_id}/vote", {'user_id': user_id, 'option': option})
+        elapsed = time.perf_counter() - started_at
+        with lock:
+            latencies.append(elapsed)
+            outcomes[status] += 1
+            if status == 200:
+                accepted[option] += 1
+                accepted_users[user_id] += 1
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(vote, user_id) for _ in range(attempts) for user_id in user_ids]
+        start.set()
+        for future in futures:
+            future.result()
+    duration = time.perf_counter() - started_at
+
+    after = read_votes(url, poll_id)
+    counted = [after[option] - before[option] for option in range(options)]
+    expected = [accepted[option] for option in range(options)]
+
+    print(f"Votes envoyés       : {sum(outcomes.values())} ({len(user_ids)} utilisateurs x {attempts}) en {duration:.2f} s, "
+          f"{sum(outcomes.values()) / duration:.0f} votes/s")
+    print(f"Réponses            : {dict(sorted(outcomes.items()))}")
+    print(f"Latence (ms)        : p50 {percentile(latencies, 0.5) * 1000:.1f}, p95 {percentile(latencies, 0.95) * 1000:.1f}, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}, max {max(latencies) * 1000:.1f}")
+    print(f"Acceptés par option : {expected}")
+    print(f"Comptés par option  : {counted}")
+
+    if counted != expected:
+        print(f"ÉCHEC : {sum(expected) - sum(counted)} vote(s) perdu(s) ou compté(s) en trop")
+        return False
+    if any(count > 1 for count in accepted_users.values()):
+        print("ÉCHEC : un utilisateur a voté plusieurs fois")
+        return False
+    print("OK : aucun vote perdu ni compté deux fois")
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc de concurrence des votes de sondage")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--poll-id', type=int, required=True)
+    parser.add_argument('--user-ids', required=True, help="Utilisateurs existants n'ayant pas encore voté : '1-500' ou '1,2,3'")
+    parser.add_argument('--concurrency', type=int, default=200, help="Votes envoyés en parallèle")
+    parser.add_argument('--attempts', type=int, default=2, help="Votes par utilisateur (les suivants doivent être refusés)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.url.rstrip('/'), args.poll_id, parse_user_ids(args.user_ids), args.concurrency, args.attempts) else 1)
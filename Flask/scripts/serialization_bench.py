@@ -0,0 +1,86 @@
+"""
+Banc de sérialisation d'une page de fil.
+
+Compare, pour un payload de la forme de serialize_feed_post, l'encodeur JSON par défaut
+de Flask (json, clés triées) et orjson (temps CPU par réponse), puis la taille transmise :
+brute, gzip, brotli, et avec ?fields= réduit aux champs d'une carte de post.
+
+    python scripts/serialization_bench.py --posts 20 --iterations 2000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.serialization import orjson, brotli, parse_fields, select_fields, ORJSON_OPTIONS
+from flask.json.provider import _default
+
+def feed_page(posts_count):
+    published_at = datetime(2025, 1, 1)
+    posts = []
+    for index in range(posts_count):
+        posts.append({
+            'id': index + 1,
+            'title': f"Titre du post numéro {index}",
+            'content': "Contenu d'un post de démonstration, avec quelques phrases de texte. " * 4,
+            'publishedAt': (published_at - timedelta(minutes=index)).isoformat(),
+            'media': [{
+                'id': index * 2 + media_index,
+                'url': f"https://res.cloudinary.com/demo/image/upload/v1/posts/{index}_{media_index}.jpg",
+                'type': 'image'
+            } for media_index in range(2)],
+            'userId': index % 7,
+            'categoryId': index % 3,
+            'likes': index * 3,
+            'comments': index,
+            'user': {
+                'id': index % 7,
+                'pseudo': f"utilisateur{index % 7}",
+                'profilePicture': f"https://res.cloudinary.com/demo/image/upload/v1/avatars/{index % 7}.png",
+                'firstName': 'Prénom',
+                'lastName': 'Nom'
+            },
+            'category': {'id': index % 3, 'name': 'Catégorie', 'description': 'Description de la catégorie'}
+        })
+    return {'posts': posts, 'nextCursor': 'MjAyNS0wMS0wMVQwMDowMDowMHwxMjM'}
+
+def measure(label, encode, payload, iterations):
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        body = encode(payload)
+    elapsed = (time.perf_counter() - started_at) / iterations
+    print(f"{label:<24}: {elapsed * 1e6:8.1f} µs/réponse, {len(body):7d} octets")
+    return body
+
+def run(posts_count, iterations):
+    payload = feed_page(posts_count)
+
+    flask_default = lambda obj: json.dumps(obj, default=_default, sort_keys=True, separators=(',', ':')).encode()
+    body = measure('json (Flask par défaut)', flask_default, payload, iterations)
+    if orjson:
+        body = measure('orjson', lambda obj: orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS), payload, iterations)
+    else:
+        print("orjson n'est pas installé")
+
+    print(f"{'gzip (niveau 5)':<24}: {len(gzip.compress(body, compresslevel=5)):7d} octets")
+    if brotli:
+        print(f"{'brotli (qualité 4)':<24}: {len(brotli.compress(body, quality=4)):7d} octets")
+    else:
+        print("brotli n'est pas installé")
+
+    sparse = select_fields(payload, parse_fields('id,title,publishedAt,user.pseudo,media.url'))
+    sparse_body = flask_default(sparse)
+    print(f"{'?fields= (brut)':<24}: {len(sparse_body):7d} octets")
+    print(f"{'?fields= + gzip':<24}: {len(gzip.compress(sparse_body, compresslevel=5)):7d} octets")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Banc de sérialisation JSON et de compression d'une page de fil")
+    parser.add_argument('--posts', type=int, default=20, help="Posts par page")
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    run(args.posts, args.iterations)
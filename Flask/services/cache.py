@@ -0,0 +1,314 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request, make_response, has_app_context, g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.user import User
+
+class MemoryCache:
+    """Cache LRU local au processus, avec durée de vie par entrée"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = max(1, maxsize)
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Versions des entités : jamais évincées, sinon une entrée périmée redeviendrait valide
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+class MemoryRedis:
+    """
+    Client factice au sous-ensemble de l'API Redis utilisé par RedisCache (get, set ex=, mget, incr).
+    Sélectionné avec CACHE_REDIS_URL=memory:// : la couche partagée est exercée sans serveur Redis.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+class RedisCache:
+    """
+    Couche partagée entre workers, dans Redis ou un serveur compatible :
+    - {prefix}:r:<clé> : réponse sérialisée (type MIME, saut de ligne, corps), avec expiration
+    - {prefix}:v:<entité>:<id> : version de l'entité, incrémentée à chaque invalidation
+    """
+
+    def __init__(self, url=None, prefix='cache', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("Le paquet 'redis' est requis pour un cache Redis")
+            client = redis.Redis.from_url(url, socket_timeout=0.25)
+
+        self.redis = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.redis.get(f"{self.prefix}:r:{key}")
+
+    def set(self, key, value, ttl):
+        self.redis.set(f"{self.prefix}:r:{key}", value, ex=ttl)
+
+    def versions(self, tags):
+        values = self.redis.mget([f"{self.prefix}:v:{tag}" for tag in tags])
+        return [int(value) if value else 0 for value in values]
+
+    def bump(self, tags):
+        for tag in tags:
+            self.redis.incr(f"{self.prefix}:v:{tag}")
+
+class ResponseCache:
+    """
+    Cache de réponses à lecture traversante : LRU local, puis couche partagée, puis la vue.
+    Les clés contiennent la version de chaque entité dont dépend la réponse : invalider
+    revient à incrémenter une version, les anciennes entrées ne sont plus jamais lues et
+    expirent d'elles-mêmes. Avec une couche partagée, les versions y sont lues (un MGET)
+    pour qu'une invalidation faite par un worker soit vue par tous les autres.
+    """
+
+    def __init__(self, local, shared=None, default_ttl=60):
+        self.local = local
+        self.shared = shared
+        self.default_ttl = default_ttl
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, outcome):
+        with self._stats_lock:
+            counters = self._stats.setdefault(name, {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'errors': 0})
+            counters[outcome] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            endpoints = {name: dict(counters) for name, counters in self._stats.items()}
+        for counters in endpoints.values():
+            lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+            counters['hit_ratio'] = round((lookups - counters['misses']) / lookups, 3) if lookups else None
+        return {
+            'backend': 'redis' if self.shared else 'memory',
+            'local_entries': len(self.local),
+            'endpoints': endpoints
+        }
+
+    def _versions(self, name, tags):
+        if self.shared:
+            try:
+                return self.shared.versions(tags)
+            except Exception as e:
+                print(f"Erreur de lecture des versions du cache: {e}")
+                self._count(name, 'errors')
+                return None
+        return self.local.versions(tags)
+
+    def key(self, name, tags, view_args):
+        """Clé de la réponse, ou None si les versions sont illisibles (le cache est alors contourné)"""
+        versions = self._versions(name, tags)
+        if versions is None:
+            return None
+        tag_part = ','.join(f"{tag}@{version}" for tag, version in zip(tags, versions))
+        args_part = '&'.join(f"{arg}={view_args[arg]}" for arg in sorted(view_args))
+        query_part = '&'.join(f"{arg}={value}" for arg, value in sorted(request.args.items(multi=True)))
+        # ETag calculé par @conditional : une entrée n'est servie que si la base n'a pas changé depuis
+        etag_part = g.get('etag', '')
+        return f"{name}|{tag_part}|{args_part}|{query_part}|{etag_part}"
+
+    def get(self, name, key, ttl=None):
+        value = self.local.get(key)
+        if value is not None:
+            self._count(name, 'local_hits')
+            return value
+
+        if self.shared:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                print(f"Erreur de lecture du cache partagé: {e}")
+                self._count(name, 'errors')
+            if value is not None:
+                self._count(name, 'shared_hits')
+                # Copie locale pour les lectures suivantes de ce worker
+                self.local.set(key, value, ttl or self.default_ttl)
+                return value
+
+        self._count(name, 'misses')
+        return None
+
+    def set(self, name, key, value, ttl):
+        self.local.set(key, value, ttl)
+        if self.shared:
+            try:
+                self.shared.set(key, value, ttl)
+            except Exception as e:
+                print(f"Erreur d'écriture du cache partagé: {e}")
+                self._count(name, 'errors')
+
+    def bump(self, tags):
+        tags = list(tags)
+        if self.shared:
+            try:
+                self.shared.bump(tags)
+            except Exception as e:
+                # Les entrées de la couche partagée expireront avec leur TTL
+                print(f"Erreur lors de l'invalidation du cache partagé: {e}")
+        self.local.bump(tags)
+
+def create_cache(app):
+    """Couche partagée pour CACHE_REDIS_URL redis:// ou rediss:// (memory:// : client factice), LRU local seul sinon"""
+    url = app.config.get('CACHE_REDIS_URL')
+    prefix = app.config.get('CACHE_KEY_PREFIX', 'cache')
+    shared = None
+    if url == 'memory://':
+        shared = RedisCache(prefix=prefix, client=MemoryRedis())
+    elif url and url.startswith(('redis://', 'rediss://')):
+        shared = RedisCache(url, prefix=prefix)
+    return ResponseCache(
+        MemoryCache(app.config.get('CACHE_LOCAL_SIZE', 1024)),
+        shared,
+        app.config.get('CACHE_DEFAULT_TTL', 60)
+    )
+
+def init_cache(app):
+    app.extensions['cache'] = create_cache(app) if app.config.get('CACHE_ENABLED', True) else None
+
+def get_cache():
+    """Cache de réponses de l'application courante, None s'il est désactivé"""
+    return current_app.extensions.get('cache')
+
+def _serialize(response):
+    return response.mimetype.encode() + b'\n' + response.get_data()
+
+def _deserialize(value):
+    mimetype, body = value.split(b'\n', 1)
+    return current_app.response_class(body, status=200, mimetype=mimetype.decode())
+
+def cached(name, tags, ttl=None):
+    """
+    Active le cache de réponses sur un endpoint GET (à placer sous @route).
+    tags(**view_args) retourne les (entité, id) dont dépend la réponse ; seules les réponses 200 sont gardées.
+    ttl : durée de vie en secondes ou nom d'une clé de configuration (CACHE_DEFAULT_TTL par défaut).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            cache = get_cache()
+            if cache is None or request.method != 'GET':
+                return view(**view_args)
+
+            # Versions lues avant d'exécuter la vue : si une écriture a lieu pendant le calcul,
+            # la réponse est rangée sous l'ancienne version et ne sera jamais servie
+            key = cache.key(name, [f"{entity}:{entity_id}" for entity, entity_id in tags(**view_args)], view_args)
+            if key is None:
+                return view(**view_args)
+
+            lifetime = current_app.config.get(ttl) if isinstance(ttl, str) else ttl
+            lifetime = lifetime or cache.default_ttl
+            value = cache.get(name, key, lifetime)
+            if value is not None:
+                response = _deserialize(value)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(**view_args))
+            if response.status_code == 200 and not response.direct_passthrough:
+                cache.set(name, key, _serialize(response), lifetime)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def invalidate(entity, entity_id='*'):
+    """
+    Invalide les réponses qui dépendent d'une entité, et les listes de ce type d'entité ('*').
+    L'invalidation est appliquée après le commit de la transaction en cours (abandonnée en
+    cas de rollback) : une lecture concurrente ne peut pas remettre en cache l'état d'avant.
+    """
+    pending = db.session.info.setdefault('cache_invalidations', set())
+    pending.add(f"{entity}:{entity_id}")
+    pending.add(f"{entity}:*")
+
+def invalidate_profile(*user_ids):
+    """Invalide le profil public (indexé par pseudo) des utilisateurs donnés ; à appeler avant un changement de pseudo"""
+    for user_id in user_ids:
+        user = db.session.get(User, int(user_id)) if user_id is not None else None
+        if user and user.pseudo:
+            invalidate('profile', user.pseudo)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    tags = session.info.pop('cache_invalidations', None)
+    if not tags or not has_app_context():
+        return
+    cache = get_cache()
+    if cache is not None:
+        cache.bump(tags)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidations', None)
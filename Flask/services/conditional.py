@@ -0,0 +1,215 @@
+import functools
+import hashlib
+from flask import current_app, request, make_response, g
+from werkzeug.http import is_resource_modified
+from models import db
+from models.user import User
+from models.post import Post
+from models.post_media import PostMedia
+from models.comment import Comment
+from models.comment_media import CommentMedia
+from models.reply import Reply
+from models.reply_media import ReplyMedia
+from models.follow import Follow
+from models.notification import Notification
+from models.media_asset import MediaAsset
+from services.threads import thread_limits
+
+def make_etag(parts):
+    """Empreinte de l'état du validateur, de l'URL et de ses paramètres (?fields=, curseur, depth...)"""
+    fingerprint = repr((
+        current_app.config.get('ETAG_VERSION', '1'),
+        request.path,
+        sorted(request.args.items(multi=True)),
+        tuple(parts)
+    ))
+    return hashlib.blake2b(fingerprint.encode(), digest_size=12).hexdigest()
+
+def latest(*dates):
+    """Plus récente des dates non nulles (Last-Modified), None si aucune"""
+    dates = [date for date in dates if date is not None]
+    return max(dates) if dates else None
+
+def conditional(validator, private=False):
+    """
+    GET conditionnel sur un endpoint (à placer sous @route, au-dessus de @cached).
+    validator(**view_args) retourne (valeurs, last_modified) à partir d'une requête d'agrégats,
+    ou None si la ressource n'existe pas (la vue répond alors elle-même). Si If-None-Match
+    correspond, la réponse est un 304 sans exécuter la vue ; sinon la réponse 200 reçoit
+    l'ETag et Last-Modified. L'ETag est faible : le corps varie avec la compression.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            if request.method not in ('GET', 'HEAD') or not current_app.config.get('CONDITIONAL_GET_ENABLED', True):
+                return view(**view_args)
+
+            try:
+                state = validator(**view_args)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erreur lors du calcul du validateur de {request.path}: {e}")
+                return view(**view_args)
+            if state is None:
+                return view(**view_args)
+
+            parts, last_modified = state
+            etag = make_etag(parts)
+            # Repris dans la clé du cache de réponses : un corps en cache correspond toujours à cet ETag
+            g.etag = etag
+
+            if is_resource_modified(request.environ, etag=f'W/"{etag}"', last_modified=last_modified):
+                response = make_response(view(**view_args))
+                if response.status_code != 200:
+                    return response
+            else:
+                response = current_app.response_class(status=304)
+                response.vary.add('Accept-Encoding')
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Le client garde la réponse mais la revalide à chaque fois (pas de fraîcheur heuristique)
+            response.cache_control.no_cache = True
+            if private:
+                response.cache_control.private = True
+            return response
+        return wrapper
+    return decorator
+
+def _media_state(model, *conditions):
+    """Nombre, dernier id, médias prêts et déclinaisons prêtes, dernière date d'ajout"""
+    return (
+        db.select(
+            db.func.count(model.id).label('count'),
+            db.func.max(model.id).label('last_id'),
+            db.func.count(db.case((model.status == 'ready', 1))).label('ready'),
+            db.func.count(MediaAsset.placeholder).label('derived'),
+            db.func.max(model.created_at).label('last_created_at')
+        )
+        .outerjoin(MediaAsset, model.asset_id == MediaAsset.id)
+        .where(*conditions)
+        .subquery()
+    )
+
+def _thread_rows_state(model, *conditions):
+    """Nombre, dernier id, dernière modification et somme des compteurs des commentaires ou réponses"""
+    return (
+        db.select(
+            db.func.count(model.id).label('count'),
+            db.func.max(model.id).label('last_id'),
+            db.func.max(model.updated_at).label('updated_at'),
+            db.func.coalesce(db.func.sum(model.likes_count), 0).label('likes'),
+            db.func.coalesce(db.func.sum(model.replies_count), 0).label('replies')
+        )
+        .where(*conditions)
+        .subquery()
+    )
+
+def _single_row(*subqueries):
+    """Une seule requête : chaque sous-requête d'agrégats retourne exactement une ligne"""
+    statement = db.select(*[column for subquery in subqueries for column in subquery.c]).select_from(subqueries[0])
+    for subquery in subqueries[1:]:
+        statement = statement.join(subquery, db.true())
+    return db.session.execute(statement).one()
+
+def post_state(post_id):
+    """Validateur de GET /api/posts/<id> : date d'édition du post et état de ses médias"""
+    media = _media_state(PostMedia, PostMedia.post_id == post_id)
+    row = db.session.execute(
+        db.select(Post.published_at, Post.edited_at, *media.c)
+        .select_from(Post)
+        .join(media, db.true())
+        .where(Post.id == post_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row), latest(row.published_at, row.edited_at, row.last_created_at)
+
+def profile_state(pseudo):
+    """
+    Validateur de GET /api/users/profile/<pseudo> : ligne de l'utilisateur (updated_at suit aussi
+    ses compteurs), nombre d'abonnés et d'abonnements, état de ses posts et de leurs médias.
+    """
+    user_id = db.select(User.id).where(User.pseudo == pseudo).order_by(User.id).limit(1).scalar_subquery()
+    follows = db.select(
+        db.select(db.func.count(Follow.id)).where(Follow.followed_id == user_id).scalar_subquery().label('followers'),
+        db.select(db.func.count(Follow.id)).where(Follow.follower_id == user_id).scalar_subquery().label('following')
+    ).subquery()
+    posts = (
+        db.select(
+            db.func.count(Post.id).label('posts'),
+            db.func.max(Post.id).label('last_post_id'),
+            db.func.max(Post.published_at).label('last_published_at'),
+            db.func.max(Post.edited_at).label('last_edited_at')
+        )
+        .where(Post.user_id == user_id)
+        .subquery()
+    )
+    media = _media_state(PostMedia, PostMedia.post_id.in_(db.select(Post.id).where(Post.user_id == user_id)))
+    row = db.session.execute(
+        db.select(User.id, User.updated_at, *follows.c, *posts.c, *media.c)
+        .select_from(User)
+        .join(follows, db.true())
+        .join(posts, db.true())
+        .join(media, db.true())
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row), latest(row.updated_at, row.last_published_at, row.last_edited_at, row.last_created_at)
+
+def thread_state(post_id):
+    """
+    Validateur de GET /api/posts/<id>/comments : commentaires du post et réponses jusqu'à la
+    profondeur demandée (au-delà, seul replies_count du parent apparaît dans la réponse), avec
+    leurs médias. Les changements de profil des auteurs ne sont pas suivis.
+    """
+    depth, _ = thread_limits(request.args, default_depth=1)
+    comment_ids = db.select(Comment.id).where(Comment.post_id == post_id)
+
+    tree = (
+        db.select(Reply.id, db.literal_column('1').label('depth'))
+        .where(Reply.comment_id.in_(comment_ids))
+        .cte('reply_state_tree', recursive=True)
+    )
+    child = db.aliased(Reply)
+    tree = tree.union_all(
+        db.select(child.id, tree.c.depth + 1)
+        .where(child.replies_id == tree.c.id, tree.c.depth < depth)
+    )
+    reply_ids = db.select(tree.c.id)
+
+    comments = _thread_rows_state(Comment, Comment.post_id == post_id)
+    replies = _thread_rows_state(Reply, Reply.id.in_(reply_ids))
+    comment_media = _media_state(CommentMedia, CommentMedia.comment_id.in_(comment_ids))
+    reply_media = _media_state(ReplyMedia, ReplyMedia.replies_id.in_(reply_ids))
+    row = _single_row(comments, replies, comment_media, reply_media)._mapping
+    return tuple(row.values()), latest(
+        row[comments.c.updated_at], row[replies.c.updated_at],
+        row[comment_media.c.last_created_at], row[reply_media.c.last_created_at]
+    )
+
+def notifications_state(user_id):
+    """
+    Validateur des notifications d'un utilisateur : séquence (avance à chaque notification ou
+    regroupement), compteur de non lues, nombre de notifications (suppressions) et dernière lecture.
+    """
+    notifications = (
+        db.select(
+            db.func.count(Notification.id).label('count'),
+            db.func.max(Notification.date).label('last_date'),
+            db.func.max(Notification.read_at).label('last_read_at')
+        )
+        .where(Notification.user_id == user_id)
+        .subquery()
+    )
+    row = db.session.execute(
+        db.select(User.notifications_seq, User.unread_notifications_count, *notifications.c)
+        .select_from(User)
+        .join(notifications, db.true())
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row), latest(row.last_date, row.last_read_at)
@@ -0,0 +1,254 @@
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.chat import Chat
+from models.user import User
+from models.conversation import Conversation, ConversationParticipant
+
+def conversation_id_for(user_a, user_b):
+    """Identifiant de conversation privée entre deux utilisateurs"""
+    sorted_ids = sorted([int(user_a), int(user_b)])
+    return int(f"{sorted_ids[0]}{sorted_ids[1]:03d}")
+
+def _upsert_insert(model):
+    """insert() avec ON CONFLICT sous PostgreSQL et SQLite, None pour les autres bases"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+def _upsert_conversation(chat):
+    """
+    Crée la conversation ou y reporte le message en un seul INSERT ... ON CONFLICT DO UPDATE :
+    deux premiers messages simultanés ne tentent pas de créer deux fois la même conversation
+    """
+    last_message = {'last_message_id': chat.id, 'last_message_at': chat.send_at}
+    insert = _upsert_insert(Conversation)
+    if insert is not None:
+        statement = insert.values(id=chat.conversation_id, messages_count=1, **last_message)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['id'],
+            set_={**last_message, 'messages_count': Conversation.messages_count + 1}
+        ))
+        return
+
+    def update():
+        return db.session.query(Conversation).filter(Conversation.id == chat.conversation_id).update({
+            Conversation.last_message_id: chat.id,
+            Conversation.last_message_at: chat.send_at,
+            Conversation.messages_count: Conversation.messages_count + 1
+        }, synchronize_session=False)
+
+    if update():
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(Conversation(id=chat.conversation_id, messages_count=1, **last_message))
+    except IntegrityError:
+        # Créée au même moment par un autre message
+        update()
+
+def _add_participants(conversation_id, user_ids):
+    """Ajoute les participants absents, sans erreur si un message concurrent les a déjà ajoutés"""
+    insert = _upsert_insert(ConversationParticipant)
+    for user_id in user_ids:
+        if insert is not None:
+            db.session.execute(
+                insert.values(conversation_id=conversation_id, user_id=user_id)
+                .on_conflict_do_nothing(index_elements=['conversation_id', 'user_id'])
+            )
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(ConversationParticipant(conversation_id=conversation_id, user_id=user_id))
+        except IntegrityError:
+            pass
+
+def record_message(chat, participant_ids=None):
+    """
+    Met à jour l'index de conversation pour un nouveau message : dernier message,
+    nombre de messages et compteurs de non-lus des autres participants.
+    Ne commit pas : à appeler dans la transaction qui enregistre le message.
+    """
+    db.session.flush()
+    _upsert_conversation(chat)
+
+    if participant_ids:
+        existing_ids = {
+            user_id for (user_id,) in
+            db.session.query(ConversationParticipant.user_id).filter_by(conversation_id=chat.conversation_id).all()
+        }
+        _add_participants(chat.conversation_id, {int(user_id) for user_id in participant_ids} - existing_ids)
+
+    db.session.query(ConversationParticipant).filter(
+        ConversationParticipant.conversation_id == chat.conversation_id
+    ).update({
+        ConversationParticipant.last_message_at: chat.send_at,
+        ConversationParticipant.unread_count: db.case(
+            (ConversationParticipant.user_id != chat.sender_id, ConversationParticipant.unread_count + 1),
+            else_=ConversationParticipant.unread_count
+        )
+    }, synchronize_session=False)
+
+def record_message_deleted(chat):
+    """Met à jour l'index après la suppression d'un message (sans commit)"""
+    conversation = Conversation.query.get(chat.conversation_id)
+    if not conversation:
+        return
+
+    last_chat = (
+        Chat.query.filter(Chat.conversation_id == chat.conversation_id, Chat.id != chat.id)
+        .order_by(Chat.send_at.desc(), Chat.id.desc())
+        .first()
+    )
+    conversation.messages_count = max((conversation.messages_count or 0) - 1, 0)
+    conversation.last_message_id = last_chat.id if last_chat else None
+    conversation.last_message_at = last_chat.send_at if last_chat else None
+
+    db.session.query(ConversationParticipant).filter(
+        ConversationParticipant.conversation_id == chat.conversation_id
+    ).update({ConversationParticipant.last_message_at: conversation.last_message_at}, synchronize_session=False)
+
+def mark_conversation_read(conversation_id, user_id):
+    """Remet à zéro les non-lus d'un participant"""
+    try:
+        db.session.query(ConversationParticipant).filter_by(
+            conversation_id=int(conversation_id), user_id=int(user_id)
+        ).update({
+            ConversationParticipant.unread_count: 0,
+            ConversationParticipant.last_read_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors du marquage de la conversation {conversation_id} comme lue: {e}")
+
+def chat_page_limit(args):
+    """Lit ?limit= en le bornant par CHAT_MAX_PAGE_SIZE"""
+    default = current_app.config.get('CHAT_PAGE_SIZE', 50)
+    limit = args.get('limit', default, type=int) or default
+    return max(1, min(limit, current_app.config.get('CHAT_MAX_PAGE_SIZE', 200)))
+
+def _anchor_position(message_id):
+    anchor = db.session.query(Chat.send_at, Chat.id).filter(Chat.id == message_id).first()
+    if not anchor:
+        raise ValueError(f"Message de référence introuvable: {message_id}")
+    return tuple(anchor)
+
+def page_messages(query, before_id=None, after_id=None, since=None, limit=50):
+    """
+    Page de messages sur l'index (conversation_id, send_at, id), dans l'ordre chronologique.
+    - after_id / since : les `limit` messages suivants (rattrapage incrémental)
+    - before_id : les `limit` messages précédents (remontée de l'historique)
+    - sans ancre : les `limit` messages les plus récents
+    Retourne (messages, has_more) ; has_more indique s'il reste des messages dans le sens parcouru.
+    """
+    position = db.tuple_(Chat.send_at, Chat.id)
+
+    if after_id or since:
+        if after_id:
+            query = query.filter(position > _anchor_position(after_id))
+        if since:
+            query = query.filter(Chat.send_at > since)
+        rows = query.order_by(Chat.send_at.asc(), Chat.id.asc()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    if before_id:
+        query = query.filter(position < _anchor_position(before_id))
+    rows = query.order_by(Chat.send_at.desc(), Chat.id.desc()).limit(limit + 1).all()
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+def serialize_chat_user(user):
+    return {
+        'id': user.id,
+        'username': user.pseudo,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'profile_picture': user.profile_picture,
+        'subscription': user.subscription
+    }
+
+def load_conversation_participants(conversation_id, messages=()):
+    """
+    Participants d'une conversation en une requête : ceux de l'index des conversations,
+    complétés par les expéditeurs de la page pour les conversations non encore indexées.
+    """
+    user_ids = {
+        user_id for (user_id,) in
+        db.session.query(ConversationParticipant.user_id).filter_by(conversation_id=conversation_id).all()
+    }
+    user_ids.update(message.sender_id for message in messages)
+    if not user_ids:
+        return []
+    return User.query.filter(User.id.in_(user_ids)).order_by(User.id.asc()).all()
+
+def participants_from_conversation_id(conv_id):
+    """
+    Retrouve les deux participants encodés dans un ancien identifiant de conversation.
+    Utilisé uniquement pour reconstruire l'index à partir de l'historique.
+    """
+    conv_str = str(conv_id)
+
+    if len(conv_str) >= 4:
+        user1_id = int(conv_str[:-3])
+        user2_id = int(conv_str[-3:])
+        if user1_id > 0 and user2_id > 0:
+            return [user1_id, user2_id]
+
+    for split_pos in range(1, len(conv_str)):
+        user1_id = int(conv_str[:split_pos])
+        user2_id = int(conv_str[split_pos:])
+        if user1_id > 0 and user2_id > 0 and conv_str[split_pos] != '0':
+            return [user1_id, user2_id]
+
+    return []
+
+def rebuild_conversation_index():
+    """Reconstruit entièrement l'index des conversations à partir de la table chats"""
+    ConversationParticipant.query.delete()
+    Conversation.query.delete()
+
+    stats = (
+        db.session.query(Chat.conversation_id, db.func.count(Chat.id), db.func.max(Chat.id))
+        .group_by(Chat.conversation_id)
+        .all()
+    )
+    last_chats = {
+        chat.id: chat for chat in Chat.query.filter(Chat.id.in_([last_id for _, _, last_id in stats])).all()
+    } if stats else {}
+
+    senders = {}
+    for conversation_id, sender_id in db.session.query(Chat.conversation_id, Chat.sender_id).distinct().all():
+        senders.setdefault(conversation_id, set()).add(sender_id)
+
+    existing_user_ids = {user_id for (user_id,) in db.session.query(User.id).all()}
+
+    for conversation_id, messages_count, last_id in stats:
+        last_chat = last_chats.get(last_id)
+        db.session.add(Conversation(
+            id=conversation_id,
+            last_message_id=last_id,
+            last_message_at=last_chat.send_at if last_chat else None,
+            messages_count=messages_count
+        ))
+
+        participant_ids = set(senders.get(conversation_id, set()))
+        encoded_ids = set(participants_from_conversation_id(conversation_id))
+        if participant_ids <= encoded_ids:
+            participant_ids |= encoded_ids
+
+        for user_id in participant_ids & existing_user_ids:
+            db.session.add(ConversationParticipant(
+                conversation_id=conversation_id,
+                user_id=user_id,
+                last_message_at=last_chat.send_at if last_chat else None
+            ))
+
+    db.session.commit()
+    return len(stats)
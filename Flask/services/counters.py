@@ -0,0 +1,115 @@
+from models import db
+from models.post import Post
+from models.comment import Comment
+from models.reply import Reply
+from models.like import Like
+from models.favorite import Favorite
+from models.comment_like import CommentLike
+from models.reply_like import ReplyLike
+from models.user import User
+from models.follow import Follow
+from models.notification import Notification
+from models.media_asset import MediaAsset
+from models.pollvote import PollVote
+from models.poll_tally import PollTally
+from services.media_assets import reference_counts
+
+def increment_counter(model, row_id, column_name, delta=1):
+    """
+    Met à jour un compteur dénormalisé avec un UPDATE ... SET col = col + delta atomique.
+    Ne commit pas : l'appelant l'inclut dans la transaction qui crée ou supprime la ligne comptée.
+    """
+    column = getattr(model, column_name)
+    query = db.session.query(model).filter(model.id == row_id)
+    if delta < 0:
+        # Un compteur ne descend jamais sous zéro, même en cas de dérive
+        query = query.filter(column >= -delta)
+    return query.update({column: column + delta}, synchronize_session=False)
+
+def upsert_increment(model, keys, column_name, delta=1):
+    """
+    Ajoute delta au compteur de la ligne identifiée par `keys` (clé primaire), en la créant au besoin,
+    avec un INSERT ... ON CONFLICT DO UPDATE atomique sous PostgreSQL et SQLite. Ne commit pas.
+    """
+    column = getattr(model, column_name)
+    dialect = db.engine.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(model).values(**keys, **{column_name: delta})
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column_name: column + statement.excluded[column_name]}
+        )
+        db.session.execute(statement)
+        return
+
+    updated = db.session.query(model).filter_by(**keys).update({column: column + delta}, synchronize_session=False)
+    if not updated:
+        db.session.add(model(**keys, **{column_name: delta}))
+        db.session.flush()
+
+def _count_of(model, foreign_key, target_id):
+    return db.select(db.func.count(model.id)).where(foreign_key == target_id).scalar_subquery()
+
+def _repair(model, counters):
+    """Réécrit les compteurs divergents d'une table, retourne le nombre de lignes corrigées"""
+    drift = db.or_(*[getattr(model, name) != expected for name, expected in counters.items()])
+    result = db.session.execute(
+        db.update(model).where(drift).values(**counters).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def _repair_poll_tallies():
+    """Aligne les totaux des sondages sur poll_vote et crée ceux qui manquent (sondages antérieurs aux totaux)"""
+    actual = db.select(db.func.count(PollVote.id)).where(
+        PollVote.poll_id == PollTally.poll_id, PollVote.option == PollTally.option
+    ).scalar_subquery()
+    repaired = _repair(PollTally, {'votes': actual})
+
+    missing = (
+        db.select(PollVote.poll_id, PollVote.option, db.func.count(PollVote.id))
+        .outerjoin(PollTally, db.and_(PollTally.poll_id == PollVote.poll_id, PollTally.option == PollVote.option))
+        .where(PollTally.poll_id.is_(None))
+        .group_by(PollVote.poll_id, PollVote.option)
+    )
+    created = db.session.execute(db.insert(PollTally).from_select(['poll_id', 'option', 'votes'], missing))
+    return repaired + created.rowcount
+
+def reconcile_counters():
+    """Recalcule les compteurs d'engagement, d'abonnés, de notifications non lues, de références des médias et les totaux des sondages à partir des tables sources et corrige la dérive"""
+    repaired = {
+        'posts': _repair(Post, {
+            'likes_count': _count_of(Like, Like.post_id, Post.id),
+            'comments_count': _count_of(Comment, Comment.post_id, Post.id),
+            'favorites_count': _count_of(Favorite, Favorite.post_id, Post.id)
+        }),
+        'comments': _repair(Comment, {
+            'likes_count': _count_of(CommentLike, CommentLike.comment_id, Comment.id),
+            'replies_count': _count_of(Reply, Reply.comment_id, Comment.id)
+        })
+    }
+
+    child_reply = db.aliased(Reply)
+    repaired['replies'] = _repair(Reply, {
+        'likes_count': _count_of(ReplyLike, ReplyLike.replies_id, Reply.id),
+        'replies_count': db.select(db.func.count(child_reply.id)).where(child_reply.replies_id == Reply.id).scalar_subquery()
+    })
+
+    repaired['users'] = _repair(User, {
+        'followers_count': db.select(db.func.count(Follow.id)).where(
+            Follow.followed_id == User.id, Follow.status == 'accepted'
+        ).scalar_subquery(),
+        'unread_notifications_count': db.select(db.func.count(Notification.id)).where(
+            Notification.user_id == User.id, Notification.read_at.is_(None)
+        ).scalar_subquery()
+    })
+
+    repaired['media_assets'] = _repair(MediaAsset, {'ref_count': reference_counts()})
+    repaired['poll_tallies'] = _repair_poll_tallies()
+
+    db.session.commit()
+    return repaired
@@ -0,0 +1,92 @@
+from collections import defaultdict
+from models.user import User
+from models.category import Category
+from models.post_media import PostMedia
+from services.media_derivatives import serialize_derivatives
+
+def load_post_relations(posts):
+    """
+    Charge en lot les auteurs, catégories et médias d'une liste de posts.
+    Le nombre de requêtes est fixe quel que soit le nombre de posts de la page ;
+    les compteurs sont lus directement sur les colonnes dénormalisées du post.
+    """
+    post_ids = [post.id for post in posts]
+    user_ids = {post.user_id for post in posts}
+    category_ids = {post.category_id for post in posts if post.category_id}
+
+    relations = {
+        'users': {},
+        'categories': {},
+        'media': defaultdict(list)
+    }
+
+    if not post_ids:
+        return relations
+
+    relations['users'] = {
+        user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()
+    }
+
+    if category_ids:
+        relations['categories'] = {
+            category.id: category for category in Category.query.filter(Category.id.in_(category_ids)).all()
+        }
+
+    # Les médias encore en cours de téléversement (ou en échec) ne sont pas servis
+    media_list = (
+        PostMedia.query.filter(PostMedia.post_id.in_(post_ids), PostMedia.status == 'ready')
+        .order_by(PostMedia.id.asc())
+        .all()
+    )
+    for item in media_list:
+        relations['media'][item.post_id].append(item)
+
+    return relations
+
+def serialize_media(item, with_date=False):
+    media_data = {
+        'id': item.id,
+        'url': item.media_url,
+        'type': item.media_type,
+        **serialize_derivatives(item.asset)
+    }
+    if with_date:
+        media_data['created_at'] = item.created_at.isoformat() if item.created_at else None
+    return media_data
+
+def serialize_author(user):
+    return {
+        'id': user.id if user else None,
+        'pseudo': user.pseudo if user else 'Utilisateur supprimé',
+        'profilePicture': user.profile_picture if user else None,
+        'firstName': user.first_name if user else None,
+        'lastName': user.last_name if user else None
+    }
+
+def serialize_category(category):
+    return {
+        'id': category.id if category else None,
+        'name': category.name if category else 'Catégorie supprimée',
+        'description': category.description if category else None
+    }
+
+def serialize_feed_post(post, relations, media_with_date=False):
+    """Construit le payload standard d'un post de fil à partir des relations préchargées"""
+    return {
+        'id': post.id,
+        'title': post.title,
+        'content': post.content,
+        'publishedAt': post.published_at.isoformat() if post.published_at else None,
+        'media': [serialize_media(m, media_with_date) for m in relations['media'].get(post.id, [])],
+        'userId': post.user_id,
+        'categoryId': post.category_id,
+        'likes': post.likes_count,
+        'comments': post.comments_count,
+        'user': serialize_author(relations['users'].get(post.user_id)),
+        'category': serialize_category(relations['categories'].get(post.category_id))
+    }
+
+def hydrate_posts(posts, media_with_date=False):
+    """Hydrate une liste de posts en payloads de fil avec un nombre constant de requêtes"""
+    relations = load_post_relations(posts)
+    return [serialize_feed_post(post, relations, media_with_date) for post in posts]
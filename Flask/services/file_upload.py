@@ -1,23 +1,12 @@
-import cloudinary
-import cloudinary.uploader
-from flask import current_app
+from services.media_assets import store_media
 
-def init_cloudinary(app):
-    """Initialize Cloudinary with app configuration"""
-    cloudinary.config(
-        cloud_name=app.config['CLOUDINARY_CLOUD_NAME'],
-        api_key=app.config['CLOUDINARY_API_KEY'],
-        api_secret=app.config['CLOUDINARY_API_SECRET']
-    )
-
-def upload_file(file):
-    """Upload a file to Cloudinary and return URL and file type"""
+def upload_file(file, timeout=None):
+    """Store a file (deduplicated by content hash) and return URL and file type"""
     if not file:
         return None, None
         
     file_type = file.content_type
-    response = cloudinary.uploader.upload(file, resource_type='auto')
-    url = response['secure_url']
+    url = store_media(file, timeout=timeout).url
     
     return url, file_type
 
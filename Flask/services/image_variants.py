@@ -0,0 +1,50 @@
+"""
+Calcul des déclinaisons d'une image (miniatures WebP, aperçu flou).
+Ce module est exécuté dans les processus du pool de media_derivatives : il ne dépend
+ni de Flask ni de la base, pour rester léger à importer et sérialisable.
+"""
+import base64
+import io
+from PIL import Image, ImageFilter, ImageOps
+
+def _normalize(image):
+    """Applique l'orientation EXIF et ramène l'image en RGB (ou RGBA si elle est transparente)"""
+    image = ImageOps.exif_transpose(image)
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+def _encode_webp(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+def render_variants(data, widths, quality=80, placeholder_width=16):
+    """
+    Décode l'image et retourne :
+    {'content_type', 'width', 'height', 'variants': [(largeur, hauteur, octets WebP)], 'placeholder'}.
+    Une déclinaison est produite pour chaque largeur inférieure à celle de l'original, plus
+    un réencodage WebP en pleine taille ; placeholder est une data URI de quelques centaines d'octets.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        content_type = Image.MIME.get(original.format)
+        image = _normalize(original)
+
+    width, height = image.size
+    variants = []
+    for target in sorted({target for target in widths if 0 < target < width}):
+        resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+        variants.append((resized.width, resized.height, _encode_webp(resized, quality)))
+    variants.append((width, height, _encode_webp(image, quality)))
+
+    tiny = image.copy()
+    tiny.thumbnail((placeholder_width, placeholder_width))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    placeholder = 'data:image/webp;base64,' + base64.b64encode(_encode_webp(tiny, 30)).decode('ascii')
+
+    return {
+        'content_type': content_type,
+        'width': width,
+        'height': height,
+        'variants': variants,
+        'placeholder': placeholder
+    }
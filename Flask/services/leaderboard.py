@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from models import db
+from models.user import User
+from models.leaderboard import FollowerRollup
+from services.counters import increment_counter, upsert_increment
+from services.cache import invalidate
+
+PERIODS = ('week', 'month')
+
+def period_start(period, moment=None):
+    """Premier jour de la semaine (lundi) ou du mois contenant `moment`"""
+    day = (moment or datetime.now(timezone.utc)).date()
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Période invalide: {period}")
+
+def record_follow_change(followed_id, delta):
+    """
+    Répercute un suivi accepté (+1) ou retiré (-1) sur le compteur d'abonnés
+    et sur les cumuls de la semaine et du mois en cours. Ne commit pas.
+    """
+    increment_counter(User, followed_id, 'followers_count', delta)
+    invalidate('leaderboard')
+    now = datetime.now(timezone.utc)
+    for period in PERIODS:
+        upsert_increment(
+            FollowerRollup,
+            {'period': period, 'period_start': period_start(period, now), 'user_id': followed_id},
+            'followers_gained',
+            delta
+        )
+
+def top_users(limit=10, period=None):
+    """
+    Les `limit` utilisateurs les plus suivis (tous temps) ou ayant gagné le plus d'abonnés
+    sur la période en cours, lus sur l'index du compteur. Retourne [(user, compteur)].
+    """
+    if not period:
+        users = User.query.order_by(User.followers_count.desc(), User.id.asc()).limit(limit).all()
+        return [(user, user.followers_count) for user in users]
+
+    return (
+        db.session.query(User, FollowerRollup.followers_gained)
+        .join(FollowerRollup, FollowerRollup.user_id == User.id)
+        .filter(
+            FollowerRollup.period == period,
+            FollowerRollup.period_start == period_start(period),
+            FollowerRollup.followers_gained > 0
+        )
+        .order_by(FollowerRollup.followers_gained.desc(), FollowerRollup.user_id.asc())
+        .limit(limit)
+        .all()
+    )
+
+def user_rank(user_id, period=None):
+    """
+    Rang d'un utilisateur (les ex æquo partagent le même rang) : 1 + nombre d'utilisateurs
+    ayant un compteur strictement supérieur, compté sur l'index plutôt qu'en triant tout le monde.
+    Retourne (user, rang, compteur) ou None si l'utilisateur n'existe pas.
+    """
+    user = User.query.get(user_id)
+    if not user:
+        return None
+
+    if not period:
+        ahead = db.session.query(db.func.count(User.id)).filter(User.followers_count > user.followers_count).scalar()
+        return user, ahead + 1, user.followers_count
+
+    start = period_start(period)
+    rollup = FollowerRollup.query.get((period, start, user_id))
+    gained = rollup.followers_gained if rollup else 0
+    ahead = db.session.query(db.func.count()).select_from(FollowerRollup).filter(
+        FollowerRollup.period == period,
+        FollowerRollup.period_start == start,
+        FollowerRollup.followers_gained > gained
+    ).scalar()
+    return user, ahead + 1, gained
@@ -0,0 +1,143 @@
+import hashlib
+from datetime import datetime, timedelta
+from models import db
+from models.media_asset import MediaAsset
+from models.post_media import PostMedia
+from models.comment_media import CommentMedia
+from models.reply_media import ReplyMedia
+from models.user import User
+from services.storage import get_storage, CHUNK_SIZE
+from services.media_derivatives import derivatives_enabled, schedule_derivatives, derivative_urls
+
+MEDIA_MODELS = (PostMedia, CommentMedia, ReplyMedia)
+
+def hash_file(file):
+    """SHA-256 et taille du fichier, lus par blocs ; le fichier est rembobiné pour le téléversement"""
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+def _insert_asset(values):
+    """INSERT sans conflit sur digest, dans sa propre transaction pour ne pas commiter celle de l'appelant"""
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(MediaAsset).values(**values).on_conflict_do_nothing(index_elements=['digest'])
+    else:
+        statement = db.insert(MediaAsset).values(**values)
+
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(statement)
+    except db.exc.IntegrityError:
+        # Même contenu enregistré au même moment par un autre worker
+        pass
+
+def register_asset(digest, url, content_type=None, size=None):
+    """
+    Enregistre un fichier stocké sous son empreinte, ou retourne l'asset existant.
+    Retourne (asset, created) : created est False si le contenu était déjà connu,
+    l'appelant peut alors retirer sa copie du stockage.
+    """
+    existing = MediaAsset.query.filter_by(digest=digest).first()
+    if existing:
+        return existing, False
+    _insert_asset({
+        'digest': digest,
+        'url': url,
+        'content_type': content_type,
+        'size': size,
+        'ref_count': 0,
+        'created_at': datetime.utcnow()
+    })
+    asset = MediaAsset.query.filter_by(digest=digest).one()
+    return asset, asset.url == url
+
+def discard_duplicate(url, storage=None):
+    """Retire du stockage une copie devenue inutile (contenu enregistré entre-temps sous une autre URL)"""
+    try:
+        (storage or get_storage()).delete(url)
+    except Exception as e:
+        print(f"Erreur lors de la suppression du doublon {url}: {e}")
+
+def store_media(file, timeout=None):
+    """
+    Retourne le MediaAsset correspondant au contenu du fichier. Un contenu déjà connu
+    n'est pas renvoyé au stockage : son URL est réutilisée. Le nouvel asset est créé
+    avec ref_count = 0 ; ce sont les lignes de médias qui le référencent qui le comptent.
+    Les déclinaisons d'une nouvelle image sont calculées en arrière-plan.
+    """
+    digest, size = hash_file(file)
+    asset = MediaAsset.query.filter_by(digest=digest).first()
+    if asset:
+        return asset
+
+    storage = get_storage()
+    url = storage.save(file, timeout=timeout)
+    asset, created = register_asset(digest, url, file.content_type, size)
+    if not created:
+        # Même contenu enregistré au même moment par un autre worker : sa copie fait foi
+        discard_duplicate(url, storage)
+    elif derivatives_enabled(asset.content_type):
+        file.seek(0)
+        schedule_derivatives(asset, file.read())
+    return asset
+
+def _referenced_asset_ids():
+    return db.union(*[db.select(model.asset_id).where(model.asset_id.isnot(None)) for model in MEDIA_MODELS])
+
+def reference_counts():
+    """Nombre réel de références de chaque asset, pour reconcile_counters"""
+    references = db.union_all(*[
+        db.select(model.asset_id.label('asset_id')).where(model.asset_id.isnot(None)) for model in MEDIA_MODELS
+    ]).subquery()
+    return db.select(db.func.count()).select_from(references).where(references.c.asset_id == MediaAsset.id).scalar_subquery()
+
+def collect_unreferenced_assets(grace_seconds=24 * 3600, batch_size=500):
+    """
+    Retire du stockage et de la table les assets sans référence depuis plus de grace_seconds.
+    Le compteur n'est qu'un filtre : l'absence de référence (médias, photos de profil,
+    bannières) est revérifiée avant chaque suppression.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    user_urls = db.union(
+        db.select(User.profile_picture).where(User.profile_picture.isnot(None)),
+        db.select(User.banner).where(User.banner.isnot(None))
+    )
+    candidates = (
+        MediaAsset.query
+        .filter(
+            MediaAsset.ref_count == 0,
+            MediaAsset.created_at < cutoff,
+            MediaAsset.id.notin_(_referenced_asset_ids()),
+            MediaAsset.url.notin_(user_urls)
+        )
+        .order_by(MediaAsset.id.asc())
+        .limit(batch_size)
+        .all()
+    )
+
+    storage = get_storage()
+    removed = 0
+    for asset in candidates:
+        try:
+            for url in [asset.url] + derivative_urls(asset):
+                storage.delete(url)
+        except Exception as e:
+            print(f"Erreur lors de la suppression du fichier {asset.url}: {e}")
+            continue
+        db.session.delete(asset)
+        removed += 1
+    db.session.commit()
+    return removed
@@ -0,0 +1,120 @@
+import io
+import multiprocessing
+import threading
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from models import db
+from models.media_asset import MediaAsset
+from services.storage import get_storage
+
+try:
+    from services.image_variants import render_variants
+except ImportError:
+    # Pillow absent : les médias sont servis sans déclinaisons
+    render_variants = None
+
+# Le GIF est exclu : une miniature perdrait l'animation
+DERIVABLE_TYPES = ('image/jpeg', 'image/jpg', 'image/png', 'image/webp')
+
+_executor_lock = threading.Lock()
+
+def derivatives_enabled(content_type):
+    return (
+        render_variants is not None
+        and current_app.config.get('MEDIA_DERIVATIVES', True)
+        and (content_type or '').lower() in DERIVABLE_TYPES
+    )
+
+def get_derivative_executor(app):
+    """
+    Pool de processus partagé (MEDIA_DERIVATIVE_WORKERS) : le décodage et l'encodage des images
+    n'occupent ni le thread de la requête ni le GIL des workers web. Les processus sont lancés
+    en 'spawn' pour ne pas hériter des threads, sockets et greenlets du serveur.
+    """
+    executor = app.extensions.get('derivative_executor')
+    if executor is None:
+        with _executor_lock:
+            executor = app.extensions.get('derivative_executor')
+            if executor is None:
+                executor = ProcessPoolExecutor(
+                    max_workers=app.config.get('MEDIA_DERIVATIVE_WORKERS', 2),
+                    mp_context=multiprocessing.get_context(app.config.get('MEDIA_DERIVATIVE_START_METHOD', 'spawn'))
+                )
+                app.extensions['derivative_executor'] = executor
+    return executor
+
+def _download(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+def _store_variant(storage, digest, width, data):
+    file = FileStorage(stream=io.BytesIO(data), filename=f"{digest[:16]}_{width}.webp", content_type='image/webp')
+    return storage.save(file)
+
+def _derive(app, asset_id, data):
+    """Thread du pool de téléversement : attend le calcul du pool de processus puis stocke le résultat"""
+    with app.app_context():
+        try:
+            asset = MediaAsset.query.get(asset_id)
+            if not asset or asset.variants:
+                return
+            timeout = app.config.get('MEDIA_DERIVATIVE_TIMEOUT', 60)
+            if data is None:
+                # Téléversement direct : le fichier n'est jamais passé par l'API
+                data = _download(asset.url, timeout)
+
+            future = get_derivative_executor(app).submit(
+                render_variants,
+                data,
+                app.config.get('MEDIA_DERIVATIVE_WIDTHS', [320, 640, 1280]),
+                app.config.get('MEDIA_DERIVATIVE_QUALITY', 80),
+                app.config.get('MEDIA_PLACEHOLDER_WIDTH', 16)
+            )
+            result = future.result(timeout=timeout)
+
+            storage = get_storage()
+            variants = [
+                {'width': width, 'height': height, 'type': 'image/webp', 'url': _store_variant(storage, asset.digest, width, variant)}
+                for width, height, variant in result['variants']
+            ]
+            db.session.query(MediaAsset).filter(MediaAsset.id == asset_id).update({
+                MediaAsset.variants: variants,
+                MediaAsset.placeholder: result['placeholder'],
+                MediaAsset.width: result['width'],
+                MediaAsset.height: result['height'],
+                # Type réel lu dans le fichier, pas celui annoncé par le client
+                MediaAsset.content_type: result['content_type'] or asset.content_type
+            }, synchronize_session=False)
+            db.session.commit()
+        except FutureTimeout:
+            print(f"Délai dépassé pour les déclinaisons du média {asset_id}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erreur lors du calcul des déclinaisons du média {asset_id}: {e}")
+
+def schedule_derivatives(asset, data=None):
+    """
+    Programme le calcul des miniatures, du WebP et de l'aperçu flou d'un nouvel asset image.
+    Retourne immédiatement ; sans data, le fichier est relu depuis son URL.
+    """
+    if not derivatives_enabled(asset.content_type):
+        return
+    from services.media_pipeline import get_upload_executor
+    app = current_app._get_current_object()
+    get_upload_executor(app).submit(_derive, app, asset.id, data)
+
+def derivative_urls(asset):
+    return [variant['url'] for variant in asset.variants or []]
+
+def serialize_derivatives(asset):
+    """Champs ajoutés aux médias des fils et des threads quand les déclinaisons sont prêtes"""
+    if not asset or not asset.variants:
+        return {}
+    return {
+        'width': asset.width,
+        'height': asset.height,
+        'placeholder': asset.placeholder,
+        'variants': asset.variants
+    }
@@ -0,0 +1,160 @@
+import math
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from models import db
+from models.media_asset import MediaAsset
+from services.file_upload import determine_media_type
+from services.media_assets import store_media
+from services.counters import increment_counter
+from services.cache import invalidate
+
+_executor_lock = threading.Lock()
+
+def request_media_files(files, *fields):
+    """Fichiers non vides envoyés sous les champs donnés ('file', 'files[]', ...), dans l'ordre"""
+    media_files = []
+    for field in fields:
+        media_files.extend(file for file in files.getlist(field) if file and file.filename)
+    return media_files
+
+def get_upload_executor(app):
+    """Pool de threads borné partagé par les téléversements (MEDIA_UPLOAD_WORKERS)"""
+    executor = app.extensions.get('upload_executor')
+    if executor is None:
+        with _executor_lock:
+            executor = app.extensions.get('upload_executor')
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('MEDIA_UPLOAD_WORKERS', 8),
+                    thread_name_prefix='media-upload'
+                )
+                app.extensions['upload_executor'] = executor
+    return executor
+
+def _upload_in_app(app, file, timeout):
+    with app.app_context():
+        asset = store_media(file, timeout=timeout)
+        return asset.id, asset.url, file.content_type
+
+def upload_files(files):
+    """
+    Téléverse plusieurs fichiers en parallèle sur le pool borné.
+    Un contenu déjà connu n'est pas renvoyé au stockage (déduplication par hachage).
+    Retourne [(asset_id, url, file_type)] dans l'ordre des fichiers ; (None, None, None)
+    pour un échec ou un fichier qui dépasse MEDIA_UPLOAD_TIMEOUT.
+    """
+    if not files:
+        return []
+
+    app = current_app._get_current_object()
+    executor = get_upload_executor(app)
+    timeout = app.config.get('MEDIA_UPLOAD_TIMEOUT', 30)
+    futures = [executor.submit(_upload_in_app, app, file, timeout) for file in files]
+
+    # Au-delà de MEDIA_UPLOAD_WORKERS fichiers, les suivants attendent leur tour dans le pool
+    rounds = math.ceil(len(files) / app.config.get('MEDIA_UPLOAD_WORKERS', 8))
+    deadline = time.monotonic() + timeout * rounds
+    results = []
+    for file, future in zip(files, futures):
+        try:
+            results.append(future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeout:
+            future.cancel()
+            print(f"Délai dépassé pour le téléversement de {file.filename}")
+            results.append((None, None, None))
+        except Exception as e:
+            print(f"Erreur lors du téléversement de {file.filename}: {e}")
+            results.append((None, None, None))
+    return results
+
+def _spool(file):
+    """Copie le fichier reçu hors de la requête : le flux de Werkzeug est fermé à la fin de celle-ci"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=current_app.config.get('MEDIA_SPOOL_MAX_MEMORY', 1024 * 1024))
+    file.stream.seek(0)
+    shutil.copyfileobj(file.stream, spooled)
+    spooled.seek(0)
+    return FileStorage(stream=spooled, filename=file.filename, content_type=file.content_type)
+
+def prepare_media(files):
+    """
+    Première étape, avant toute écriture en base. En mode synchrone les fichiers sont téléversés
+    en parallèle ; en mode différé (MEDIA_UPLOAD_ASYNC) ils sont seulement copiés en attente du worker.
+    Retourne la liste des médias exploitables : {'url', 'media_type', 'file', 'asset_id'}.
+    """
+    if current_app.config.get('MEDIA_UPLOAD_ASYNC', False):
+        prepared = []
+        for file in files:
+            media_type = determine_media_type(file.content_type or '')
+            if media_type:
+                prepared.append({'url': None, 'media_type': media_type, 'file': _spool(file), 'asset_id': None})
+        return prepared
+
+    prepared = []
+    for asset_id, url, file_type in upload_files(files):
+        media_type = determine_media_type(file_type or '') if url else None
+        if media_type:
+            prepared.append({'url': url, 'media_type': media_type, 'file': None, 'asset_id': asset_id})
+    return prepared
+
+def add_media_rows(model, owner_field, owner_id, prepared):
+    """
+    Crée les lignes de médias du propriétaire (post, commentaire, réponse). Ne commit pas.
+    Retourne les téléversements différés à lancer avec start_pending_uploads() après le commit.
+    """
+    pending = []
+    for item in prepared:
+        media = model(**{
+            owner_field: owner_id,
+            'media_url': item['url'] or '',
+            'media_type': item['media_type'],
+            'status': 'ready' if item['url'] else 'pending',
+            'asset_id': item['asset_id']
+        })
+        db.session.add(media)
+        if item['file'] is not None:
+            pending.append((media, item['file']))
+
+    if pending:
+        db.session.flush()
+    return [(model, media.id, file) for media, file in pending]
+
+def _finalize_upload(app, model, media_id, file):
+    with app.app_context():
+        try:
+            asset = store_media(file, timeout=app.config.get('MEDIA_UPLOAD_TIMEOUT', 30))
+        except Exception as e:
+            print(f"Erreur lors du téléversement différé du média {media_id}: {e}")
+            asset = None
+        finally:
+            file.close()
+
+        try:
+            updated = db.session.query(model).filter(model.id == media_id).update({
+                model.media_url: asset.url if asset else '',
+                model.status: 'ready' if asset else 'failed',
+                model.asset_id: asset.id if asset else None
+            }, synchronize_session=False)
+            # UPDATE en masse : les événements ORM ne comptent pas cette référence
+            if asset and updated:
+                increment_counter(MediaAsset, asset.id, 'ref_count', 1)
+            media = db.session.get(model, media_id)
+            if media is not None and getattr(media, 'post_id', None):
+                invalidate('post', media.post_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erreur lors de la finalisation du média {media_id}: {e}")
+
+def start_pending_uploads(pending):
+    """Confie les médias 'pending' déjà commités au pool ; le worker les passe à 'ready' ou 'failed'"""
+    if not pending:
+        return
+    app = current_app._get_current_object()
+    executor = get_upload_executor(app)
+    for model, media_id, file in pending:
+        executor.submit(_finalize_upload, app, model, media_id, file)
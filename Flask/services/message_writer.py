@@ -0,0 +1,82 @@
+import queue
+import threading
+import time
+
+class MessageWriter:
+    """
+    File d'écriture différée (write-behind) bornée (messages du chat, notifications).
+    L'événement Socket.IO dépose le message et acquitte immédiatement ; des workers
+    lancés avec socketio.start_background_task (thread, greenlet eventlet ou gevent)
+    vident la file par lots et appellent `persist(jobs)` dans un contexte d'application.
+    Quand la file est pleine, submit() retourne False et l'appelant persiste lui-même :
+    la mémoire reste bornée et aucun message n'est perdu par saturation.
+    Avec linger > 0, un worker attend jusqu'à linger secondes de compléter son lot,
+    ce qui permet à persist() de fusionner les événements proches.
+    Avec `key`, chaque worker a sa propre file et un travail va au worker hash(key(job)) % workers :
+    les travaux d'une même clé (une conversation) sont enregistrés un par un, dans l'ordre d'envoi.
+    """
+
+    def __init__(self, app, socketio, persist, maxsize=10000, workers=4, batch_size=100, linger=0.0, key=None, put_timeout=5.0):
+        self.app = app
+        self.socketio = socketio
+        self.persist = persist
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.linger = max(0.0, linger)
+        self.key = key
+        self.put_timeout = put_timeout
+        if key is None:
+            self.queues = [queue.Queue(maxsize=maxsize)] * self.workers
+        else:
+            self.queues = [queue.Queue(maxsize=max(1, maxsize // self.workers)) for _ in range(self.workers)]
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            for worker_queue in self.queues:
+                self.socketio.start_background_task(self._run, worker_queue)
+            self._started = True
+
+    def submit(self, job):
+        """Dépose un message à enregistrer, retourne False si la file est pleine"""
+        self.start()
+        worker_queue = self.queues[hash(self.key(job)) % self.workers] if self.key else self.queues[0]
+        try:
+            if self.key:
+                # Enregistré par l'appelant, le travail passerait devant ceux de sa clé encore en file :
+                # on attend une place (contre-pression) avant de se rabattre sur l'écriture synchrone
+                worker_queue.put(job, timeout=self.put_timeout)
+            else:
+                worker_queue.put_nowait(job)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self):
+        return sum(worker_queue.qsize() for worker_queue in set(self.queues))
+
+    def _next_batch(self, worker_queue):
+        batch = [worker_queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(worker_queue.get(timeout=remaining) if remaining > 0 else worker_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, worker_queue):
+        while True:
+            batch = self._next_batch(worker_queue)
+            try:
+                with self.app.app_context():
+                    self.persist(batch)
+            except Exception as e:
+                print(f"Erreur lors de l'enregistrement différé de {len(batch)} message(s): {e}")
+            finally:
+                for _ in batch:
+                    worker_queue.task_done()
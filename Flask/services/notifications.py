@@ -0,0 +1,445 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db
+from models.notification import Notification
+from models.notification_actor import NotificationActor
+from models.user import User
+from models.follow import Follow
+from models.comment import Comment
+from models.reply import Reply
+from services.counters import increment_counter
+from services.cache import invalidate
+from services.pagination import keyset_paginate
+from services.message_writer import MessageWriter
+
+FOLLOW_TYPES = ('follow', 'follow_request', 'follow_request_accepted')
+REPLY_TYPES = ('reply', 'reply_to_reply')
+# Types fusionnés par cible dans la fenêtre NOTIFICATIONS_GROUP_WINDOW ; les demandes de suivi
+# restent individuelles car elles portent une action (accepter, refuser) sur un suivi précis
+GROUPED_TYPES = ('follow', 'comment', 'reply', 'reply_to_reply')
+
+def notification_page_limit(args):
+    """Lit ?limit= en le bornant par NOTIFICATIONS_MAX_PAGE_SIZE"""
+    default = current_app.config.get('NOTIFICATIONS_PAGE_SIZE', 20)
+    limit = args.get('limit', default, type=int) or default
+    return max(1, min(limit, current_app.config.get('NOTIFICATIONS_MAX_PAGE_SIZE', 100)))
+
+def next_notification_seq(user_id, unread=True):
+    """
+    Attribue le numéro de séquence suivant du destinataire et, si unread, incrémente son compteur de non lues.
+    L'UPDATE verrouille la ligne utilisateur jusqu'au commit : deux notifications concurrentes
+    pour le même utilisateur ne peuvent pas recevoir le même numéro.
+    """
+    values = {User.notifications_seq: User.notifications_seq + 1}
+    if unread:
+        values[User.unread_notifications_count] = User.unread_notifications_count + 1
+    db.session.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
+    return db.session.query(User.notifications_seq).filter(User.id == user_id).scalar()
+
+def create_notification(user_id, type, **fields):
+    """
+    Ajoute une notification non lue, numérotée dans la séquence du destinataire.
+    Ne commit pas : l'appelant l'inclut dans sa transaction puis appelle push_notification().
+    """
+    notification = Notification(user_id=user_id, type=type, seq=next_notification_seq(user_id), **fields)
+    db.session.add(notification)
+    return notification
+
+def parse_actor_ids(value):
+    return [int(actor_id) for actor_id in (value or '').split(',') if actor_id]
+
+def _sample_actors(actor_ids):
+    return ','.join(str(actor_id) for actor_id in actor_ids[:current_app.config.get('NOTIFICATIONS_SAMPLE_ACTORS', 3)])
+
+def _record_actors(group, actor_ids):
+    """
+    Range les acteurs (du plus récent au plus ancien) dans notification_actors : les nouveaux
+    sont ajoutés, ceux déjà présents remontent en tête. Retourne les acteurs qui n'y figuraient pas.
+    """
+    known = {
+        row.actor_id: row for row in
+        NotificationActor.query.filter(NotificationActor.notification_id == group.id, NotificationActor.actor_id.in_(actor_ids)).all()
+    }
+    now = datetime.utcnow()
+    added = []
+    # Du plus ancien au plus récent : le plus récent reçoit la date la plus grande
+    for offset, actor_id in enumerate(reversed(actor_ids)):
+        date = now + timedelta(microseconds=offset)
+        if actor_id in known:
+            known[actor_id].date = date
+        else:
+            db.session.add(NotificationActor(notification_id=group.id, actor_id=actor_id, date=date))
+            added.append(actor_id)
+    return added
+
+def apply_notification_group(user_id, type, group_key, actor_ids, refs):
+    """
+    Fusionne des événements (acteurs du plus récent au plus ancien) dans le groupe ouvert
+    (même destinataire, même clé, dans la fenêtre) ou crée le groupe. Ne commit pas.
+    actor_count n'augmente que pour les acteurs absents du groupe : un même utilisateur
+    qui commente plusieurs fois de suite ne compte qu'une fois.
+    """
+    actor_ids = list(dict.fromkeys(actor_ids))
+    window_start = datetime.utcnow() - timedelta(seconds=current_app.config.get('NOTIFICATIONS_GROUP_WINDOW', 6 * 3600))
+    group = (
+        Notification.query
+        .filter(Notification.user_id == user_id, Notification.group_key == group_key, Notification.date >= window_start)
+        .order_by(Notification.date.desc())
+        .with_for_update()
+        .first()
+    )
+
+    if group is None:
+        group = create_notification(
+            user_id, type,
+            group_key=group_key,
+            actor_id=actor_ids[0],
+            actor_count=len(actor_ids),
+            sample_actor_ids=_sample_actors(actor_ids),
+            **refs
+        )
+        db.session.flush()
+        _record_actors(group, actor_ids)
+        return group
+
+    known = parse_actor_ids(group.sample_actor_ids)
+    # Les groupes antérieurs à notification_actors n'ont que leur échantillon
+    added = len([actor_id for actor_id in _record_actors(group, actor_ids) if actor_id not in known])
+    # Une activité nouvelle sur un groupe déjà lu le rend de nouveau non lu
+    group.seq = next_notification_seq(user_id, unread=group.read_at is not None)
+    group.read_at = None
+    group.date = datetime.utcnow()
+    group.actor_id = actor_ids[0]
+    group.sample_actor_ids = _sample_actors(list(dict.fromkeys(actor_ids + known)))
+    if added:
+        group.actor_count = Notification.actor_count + added
+    for name, value in refs.items():
+        setattr(group, name, value)
+    return group
+
+def _coalesce(events):
+    """Regroupe les événements d'un lot par (destinataire, clé de groupe), en conservant l'ordre d'arrivée"""
+    groups = {}
+    singles = []
+    for event in events:
+        if not event['group_key']:
+            singles.append(event)
+            continue
+        key = (event['user_id'], event['group_key'])
+        if key not in groups:
+            groups[key] = {**event, 'actor_ids': []}
+        group = groups[key]
+        group['actor_ids'].insert(0, event['actor_id'])
+        group['refs'] = event['refs']
+    return list(groups.values()), singles
+
+def _drop_deleted_follows(events):
+    """
+    Écarte les événements dont le suivi a été supprimé pendant leur attente dans le tampon.
+    Les suivis restants sont verrouillés jusqu'au commit : un désabonnement concurrent attend
+    l'écriture de la notification, puis la retire.
+    """
+    follow_ids = {event['refs']['follow_id'] for event in events if event['refs'].get('follow_id')}
+    if not follow_ids:
+        return events
+    existing = {
+        follow_id for (follow_id,) in
+        db.session.query(Follow.id).filter(Follow.id.in_(follow_ids)).with_for_update().all()
+    }
+    return [event for event in events if not event['refs'].get('follow_id') or event['refs']['follow_id'] in existing]
+
+def flush_notification_events(events):
+    """
+    Écrit un lot d'événements de notification en une transaction : un upsert par groupe
+    distinct au lieu d'une ligne par événement, puis pousse les notifications résultantes.
+    Si le lot échoue, chaque événement est rejoué seul.
+    """
+    try:
+        groups, singles = _coalesce(_drop_deleted_follows(events))
+        notifications = [
+            apply_notification_group(group['user_id'], group['type'], group['group_key'], group['actor_ids'], group['refs'])
+            for group in groups
+        ]
+        notifications += [
+            create_notification(event['user_id'], event['type'], actor_id=event['actor_id'], **event['refs'])
+            for event in singles
+        ]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(events) > 1:
+            for event in events:
+                flush_notification_events([event])
+            return []
+        print(f"Erreur lors de l'enregistrement de la notification {events[0]['type']} pour l'utilisateur {events[0]['user_id']}: {e}")
+        return []
+
+    for notification in notifications:
+        push_notification(notification)
+    return notifications
+
+def record_notification(user_id, type, actor_id, group_target=None, **refs):
+    """
+    Point d'entrée des notifications. Les types agrégeables passent par le tampon d'écriture
+    (fusion des événements proches, upsert différé) ; les autres, ou tout événement si le tampon
+    est désactivé ou plein, sont écrits et poussés immédiatement.
+    Retourne les notifications écrites immédiatement ([] si l'événement a été mis en tampon).
+    """
+    event = {
+        'user_id': user_id,
+        'type': type,
+        'actor_id': actor_id,
+        'group_key': (f"{type}:{group_target}" if group_target is not None else type) if type in GROUPED_TYPES else None,
+        'refs': refs
+    }
+    buffer = current_app.extensions.get('notification_buffer')
+    if event['group_key'] and buffer is not None and buffer.submit(event):
+        return []
+    return flush_notification_events([event])
+
+def init_notification_buffer(app, socketio):
+    """Tampon d'agrégation des notifications, désactivable avec NOTIFICATIONS_BUFFERED=false"""
+    if not app.config.get('NOTIFICATIONS_BUFFERED', True):
+        return
+    # Un seul worker : tous les événements d'un même groupe sont fusionnés dans le même lot
+    app.extensions['notification_buffer'] = MessageWriter(
+        app,
+        socketio,
+        flush_notification_events,
+        maxsize=app.config.get('NOTIFICATIONS_BUFFER_SIZE', 10000),
+        workers=1,
+        batch_size=app.config.get('NOTIFICATIONS_BATCH_SIZE', 500),
+        linger=app.config.get('NOTIFICATIONS_FLUSH_INTERVAL', 1.0)
+    )
+
+def notification_state(user_id):
+    """(dernière séquence, non lues) d'un utilisateur, ou (0, 0) s'il n'existe pas"""
+    row = db.session.query(User.notifications_seq, User.unread_notifications_count).filter(User.id == user_id).first()
+    return tuple(row) if row else (0, 0)
+
+def _emit(event, payload, user_id):
+    socketio = current_app.extensions.get('socketio')
+    if socketio is None:
+        return
+    try:
+        socketio.emit(event, payload, to=f"user_{user_id}")
+    except Exception as e:
+        # La notification est enregistrée : le client la récupérera au rattrapage
+        print(f"Erreur lors de l'envoi temps réel à l'utilisateur {user_id}: {e}")
+
+def push_notification(notification):
+    """
+    Pousse une notification déjà commitée dans la room user_{id} du destinataire.
+    Le client conserve le dernier seq reçu et, après une reconnexion, ne demande que
+    les notifications suivantes (GET /api/user_notifications/<id>?after_seq=N).
+    """
+    if notification is None:
+        return
+    payload = hydrate_notifications([notification])[0]
+    payload['unread_count'] = notification_state(notification.user_id)[1]
+    _emit('notification', payload, notification.user_id)
+
+def push_notification_state(user_id):
+    """Synchronise le compteur de non lues et la dernière séquence sur tous les clients de l'utilisateur"""
+    latest_seq, unread = notification_state(user_id)
+    _emit('notification_state', {'latest_seq': latest_seq, 'unread_count': unread}, user_id)
+
+def delete_notifications(query):
+    """
+    Supprime les notifications de la requête en retirant les non lues des compteurs de leurs destinataires.
+    Ne commit pas. Retourne le nombre de notifications supprimées.
+    """
+    unread = (
+        query.filter(Notification.read_at.is_(None))
+        .with_entities(Notification.user_id, db.func.count(Notification.id))
+        .group_by(Notification.user_id)
+        .all()
+    )
+    for user_id, count in unread:
+        increment_counter(User, user_id, 'unread_notifications_count', -count)
+    notification_ids = query.with_entities(Notification.id).subquery()
+    NotificationActor.query.filter(NotificationActor.notification_id.in_(db.select(notification_ids.c.id))).delete(synchronize_session=False)
+    return query.delete(synchronize_session=False)
+
+def _remove_group_actor(group, actor_id):
+    """
+    Retire un acteur d'une notification groupée : compte, échantillon et acteur affiché.
+    La notification reçoit un nouveau seq, sans changer le compteur de non lues, pour que
+    l'ETag de la boîte de réception change et que les clients la remplacent. Ne commit pas.
+    """
+    NotificationActor.query.filter_by(notification_id=group.id, actor_id=actor_id).delete(synchronize_session=False)
+    remaining = [
+        row.actor_id for row in
+        NotificationActor.query.filter_by(notification_id=group.id)
+        .order_by(NotificationActor.date.desc())
+        .limit(current_app.config.get('NOTIFICATIONS_SAMPLE_ACTORS', 3))
+        .all()
+    ]
+    sample = list(dict.fromkeys(remaining + [sample_id for sample_id in parse_actor_ids(group.sample_actor_ids) if sample_id != actor_id]))
+    group.actor_count = Notification.actor_count - 1
+    group.sample_actor_ids = _sample_actors(sample)
+    if group.actor_id == actor_id:
+        group.actor_id = sample[0] if sample else None
+    group.seq = next_notification_seq(group.user_id, unread=False)
+    invalidate('notifications', group.user_id)
+
+def remove_follow_notifications(follow):
+    """
+    Retire les notifications d'un suivi supprimé. Le suiveur est retiré des groupes « X et N autres »
+    de l'utilisateur suivi, qui sont conservés et détachés de ce suivi ; un groupe dont il était le
+    dernier acteur et les autres notifications du suivi sont supprimés. Ne commit pas.
+    Retourne les groupes modifiés, à pousser après le commit avec push_follow_removal().
+    """
+    groups = (
+        Notification.query
+        .join(NotificationActor, NotificationActor.notification_id == Notification.id)
+        .filter(
+            Notification.user_id == follow.followed_id,
+            Notification.type == 'follow',
+            NotificationActor.actor_id == follow.follower_id
+        )
+        .with_for_update()
+        .all()
+    )
+    updated, emptied = [], []
+    for group in groups:
+        if group.actor_count > 1:
+            _remove_group_actor(group, follow.follower_id)
+            updated.append(group)
+        else:
+            emptied.append(group.id)
+
+    Notification.query.filter(
+        Notification.follow_id == follow.id,
+        Notification.actor_count > 1,
+        Notification.id.notin_(emptied)
+    ).update({Notification.follow_id: None}, synchronize_session=False)
+    if delete_notifications(Notification.query.filter(db.or_(Notification.follow_id == follow.id, Notification.id.in_(emptied)))):
+        invalidate('notifications', follow.followed_id)
+    return updated
+
+def push_follow_removal(user_id, groups):
+    """Après le commit de remove_follow_notifications : pousse les groupes modifiés puis le nouvel état de l'utilisateur"""
+    for group in groups:
+        push_notification(group)
+    push_notification_state(user_id)
+
+def mark_notifications_read(user_id, notification_ids=None):
+    """
+    Marque comme lues les notifications données (ou toutes) et décrémente le compteur d'autant.
+    Retourne le nombre de notifications marquées.
+    """
+    query = Notification.query.filter(Notification.user_id == user_id, Notification.read_at.is_(None))
+    if notification_ids is not None:
+        query = query.filter(Notification.id.in_(notification_ids))
+
+    marked = query.update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    if notification_ids is None:
+        # Tout est lu : le compteur revient à zéro, ce qui corrige au passage une éventuelle dérive
+        db.session.query(User).filter(User.id == user_id).update({User.unread_notifications_count: 0}, synchronize_session=False)
+    elif marked:
+        increment_counter(User, user_id, 'unread_notifications_count', -marked)
+    db.session.commit()
+    return marked
+
+def unread_count(user_id):
+    return db.session.query(User.unread_notifications_count).filter(User.id == user_id).scalar()
+
+def page_notifications(query, cursor=None, limit=20):
+    """Page (date, id) décroissante de notifications, retourne (notifications, next_cursor)"""
+    return keyset_paginate(query, Notification.date, Notification.id, cursor, limit)
+
+def notifications_after_seq(user_id, after_seq, limit=20):
+    """Notifications de séquence > after_seq, de la plus ancienne à la plus récente. Retourne (notifications, has_more)"""
+    rows = (
+        Notification.query
+        .filter(Notification.user_id == user_id, Notification.seq > after_seq)
+        .order_by(Notification.seq.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+def load_notification_relations(notifications):
+    """
+    Charge en une requête IN par type les suivis, commentaires et réponses référencés,
+    puis tous les utilisateurs acteurs en une dernière requête.
+    """
+    follow_ids = {n.follow_id for n in notifications if n.type in FOLLOW_TYPES and n.follow_id}
+    comment_ids = {n.comments_id for n in notifications if n.type == 'comment' and n.comments_id}
+    reply_ids = {n.replie_id for n in notifications if n.type in REPLY_TYPES and n.replie_id}
+
+    follows = {f.id: f for f in Follow.query.filter(Follow.id.in_(follow_ids)).all()} if follow_ids else {}
+    comments = {c.id: c for c in Comment.query.filter(Comment.id.in_(comment_ids)).all()} if comment_ids else {}
+    replies = {r.id: r for r in Reply.query.filter(Reply.id.in_(reply_ids)).all()} if reply_ids else {}
+
+    actor_ids = (
+        {f.follower_id for f in follows.values()}
+        | {c.user_id for c in comments.values()}
+        | {r.user_id for r in replies.values()}
+        | {n.actor_id for n in notifications if n.actor_id}
+        | {actor_id for n in notifications for actor_id in parse_actor_ids(n.sample_actor_ids)}
+    )
+    users = {u.id: u for u in User.query.filter(User.id.in_(actor_ids)).all()} if actor_ids else {}
+
+    return {'follows': follows, 'comments': comments, 'replies': replies, 'users': users}
+
+def notification_actor(notification, relations):
+    """Utilisateur à l'origine de la notification (le plus récent pour un groupe), ou None"""
+    if notification.actor_id:
+        return relations['users'].get(notification.actor_id)
+    if notification.type in FOLLOW_TYPES:
+        follow = relations['follows'].get(notification.follow_id)
+        return relations['users'].get(follow.follower_id) if follow else None
+    if notification.type == 'comment':
+        comment = relations['comments'].get(notification.comments_id)
+        return relations['users'].get(comment.user_id) if comment else None
+    if notification.type in REPLY_TYPES:
+        reply = relations['replies'].get(notification.replie_id)
+        return relations['users'].get(reply.user_id) if reply else None
+    return None
+
+def serialize_actor(user):
+    if not user:
+        return None
+    return {
+        'id': user.id,
+        'pseudo': user.pseudo,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'profile_picture': user.profile_picture,
+        'subscription': user.subscription,
+        'email': user.email
+    }
+
+def serialize_notification(notification, relations):
+    notification_data = {
+        'id': notification.id,
+        'post_id': notification.post_id,
+        'comments_id': notification.comments_id,
+        'replie_id': notification.replie_id,
+        'follow_id': notification.follow_id,
+        'user_id': notification.user_id,
+        'type': notification.type,
+        'date': notification.date.isoformat() if notification.date else None,
+        'read_at': notification.read_at.isoformat() if notification.read_at else None,
+        'seq': notification.seq,
+        'actor_user': serialize_actor(notification_actor(notification, relations)),
+        'actor_count': notification.actor_count or 1,
+        'sample_actors': [
+            serialize_actor(relations['users'][actor_id])
+            for actor_id in parse_actor_ids(notification.sample_actor_ids)
+            if actor_id in relations['users']
+        ]
+    }
+
+    if notification.type == 'comment':
+        comment = relations['comments'].get(notification.comments_id)
+        if comment and notification_data['actor_user']:
+            notification_data['comment_data'] = {'content': comment.content}
+
+    return notification_data
+
+def hydrate_notifications(notifications):
+    relations = load_notification_relations(notifications)
+    return [serialize_notification(notification, relations) for notification in notifications]
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from models import db
+
+def encode_cursor(published_at, item_id):
+    """Encode la position (published_at, id) d'un élément en curseur opaque"""
+    payload = json.dumps([published_at.isoformat(), item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Décode un curseur opaque, lève ValueError s'il est invalide"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        published_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(published_at), int(item_id)
+    except Exception:
+        raise ValueError(f"Curseur invalide: {cursor}")
+
+def apply_cursor(query, date_column, id_column, cursor=None):
+    """Restreint la requête aux lignes strictement après le curseur dans l'ordre décroissant"""
+    if not cursor:
+        return query
+    cursor_date, cursor_id = decode_cursor(cursor)
+    return query.filter(db.tuple_(date_column, id_column) < (cursor_date, cursor_id))
+
+def keyset_paginate(query, date_column, id_column, cursor=None, per_page=20):
+    """
+    Pagination par clé (date_column, id_column) décroissante.
+    Aucune requête COUNT n'est exécutée : on lit per_page + 1 lignes pour savoir s'il reste une page.
+    Retourne (items, next_cursor).
+    """
+    query = apply_cursor(query, date_column, id_column, cursor)
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+
+    return items, next_cursor
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask_bcrypt import Bcrypt
+from models import db
+from models.user import User
+
+bcrypt = Bcrypt()
+
+_pool_lock = threading.Lock()
+
+def init_passwords(app):
+    """Coût bcrypt de l'environnement (BCRYPT_LOG_ROUNDS, 12 par défaut)"""
+    bcrypt.init_app(app)
+
+def _async_mode(app):
+    socketio = app.extensions.get('socketio')
+    return getattr(socketio, 'async_mode', None) or 'threading'
+
+def get_hash_pool(app):
+    """
+    Pool borné de vrais threads système (PASSWORD_HASH_WORKERS) pour bcrypt, qui libère le GIL :
+    tpool sous eventlet et le pool de threads de gevent, car un thread « vert » bloquerait la
+    boucle de tous les clients du worker pendant le calcul ; ThreadPoolExecutor sinon.
+    """
+    pool = app.extensions.get('password_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get('password_pool')
+            if pool is None:
+                workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+                mode = _async_mode(app)
+                if mode == 'eventlet':
+                    from eventlet import tpool
+                    tpool.set_num_threads(workers)
+                    pool = tpool.execute
+                elif mode == 'gevent':
+                    from gevent.threadpool import ThreadPool
+                    gevent_pool = ThreadPool(workers)
+                    pool = lambda function, *args: gevent_pool.apply(function, args)
+                else:
+                    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                    pool = lambda function, *args: executor.submit(function, *args).result()
+                app.extensions['password_pool'] = pool
+    return pool
+
+def _offload(function, *args):
+    return get_hash_pool(current_app._get_current_object())(function, *args)
+
+def release_session():
+    """
+    Rend la connexion au pool avant un calcul bcrypt (plusieurs centaines de ms) : les objets
+    déjà chargés restent lisibles, une requête suivante ouvre une nouvelle transaction.
+    """
+    db.session.close()
+
+def hash_password(password):
+    return _offload(bcrypt.generate_password_hash, password).decode('utf-8')
+
+def check_password(password_hash, password):
+    return _offload(bcrypt.check_password_hash, password_hash, password)
+
+def hash_rounds(password_hash):
+    """Coût d'un hachage bcrypt ($2b$12$...), None s'il est illisible"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(password_hash):
+    return hash_rounds(password_hash) != bcrypt._log_rounds
+
+def rehash_password(user_id, password_hash, password):
+    """
+    Recalcule le hachage au coût courant après une connexion réussie. Ne remplace que
+    l'ancien hachage : un mot de passe changé entre-temps n'est pas écrasé.
+    """
+    try:
+        new_hash = hash_password(password)
+        db.session.query(User).filter(User.id == user_id, User.password == password_hash).update(
+            {User.password: new_hash}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors du rehachage du mot de passe de l'utilisateur {user_id}: {e}")
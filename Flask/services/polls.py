@@ -0,0 +1,155 @@
+import threading
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.poll import Poll
+from models.pollvote import PollVote
+from models.poll_tally import PollTally
+from services.counters import upsert_increment
+from services.cache import MemoryCache
+from services.message_writer import MessageWriter
+
+def _insert_vote(values):
+    """INSERT ... ON CONFLICT DO NOTHING sur _poll_user_uc : retourne False si l'utilisateur a déjà voté"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(PollVote).values(**values).on_conflict_do_nothing(constraint='_poll_user_uc')
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(PollVote).values(**values).on_conflict_do_nothing(index_elements=['poll_id', 'user_id'])
+    else:
+        try:
+            with db.session.begin_nested():
+                db.session.add(PollVote(**values))
+            return True
+        except IntegrityError:
+            return False
+    return db.session.execute(statement).rowcount == 1
+
+def cast_vote(poll_id, user_id, option):
+    """
+    Enregistre le vote et incrémente le total de l'option, sans lire ni réécrire le sondage :
+    deux votes concurrents ne se perdent pas et un second vote du même utilisateur est ignoré
+    par la contrainte unique. Retourne False si l'utilisateur avait déjà voté. Ne commit pas.
+    """
+    if not _insert_vote({'poll_id': poll_id, 'user_id': user_id, 'option': option}):
+        return False
+    upsert_increment(PollTally, {'poll_id': poll_id, 'option': option}, 'votes')
+    return True
+
+def poll_tallies(poll_ids):
+    """Totaux des sondages donnés en une requête : {poll_id: {option: votes}}"""
+    tallies = {}
+    if poll_ids:
+        for tally in PollTally.query.filter(PollTally.poll_id.in_(set(poll_ids))).all():
+            tallies.setdefault(tally.poll_id, {})[tally.option] = tally.votes
+    return tallies
+
+def vote_counts(poll, tallies=None):
+    """Votes par option, dans l'ordre des options du sondage"""
+    if tallies is None:
+        tallies = poll_tallies([poll.id])
+    counts = tallies.get(poll.id, {})
+    return [counts.get(option, 0) for option in range(len(poll.options))]
+
+def results_snapshot(poll, tallies=None):
+    """Résultats diffusés dans la room poll_{id}"""
+    votes = vote_counts(poll, tallies)
+    return {'poll_id': poll.id, 'votes': votes, 'total': sum(votes)}
+
+def delete_votes(query):
+    """
+    Supprime les votes de la requête en les retirant des totaux de leurs options.
+    Ne commit pas. Retourne le nombre de votes supprimés.
+    """
+    removed = (
+        query.with_entities(PollVote.poll_id, PollVote.option, db.func.count(PollVote.id))
+        .group_by(PollVote.poll_id, PollVote.option)
+        .all()
+    )
+    for poll_id, option, count in removed:
+        db.session.query(PollTally).filter(
+            PollTally.poll_id == poll_id, PollTally.option == option, PollTally.votes >= count
+        ).update({PollTally.votes: PollTally.votes - count}, synchronize_session=False)
+    return query.delete(synchronize_session=False)
+
+def delete_poll_votes(poll_id):
+    """Supprime les votes et les totaux d'un sondage. Ne commit pas."""
+    PollVote.query.filter_by(poll_id=poll_id).delete(synchronize_session=False)
+    PollTally.query.filter_by(poll_id=poll_id).delete(synchronize_session=False)
+
+class PollResultsPublisher:
+    """
+    Diffusion des résultats dans la room poll_{id}, regroupée par sondage : un sondage voté
+    n'est mis en file qu'une fois tant que sa diffusion n'a pas eu lieu, et le worker attend
+    `interval` secondes pour regrouper les sondages votés. Un sondage très actif coûte donc
+    au plus une lecture des totaux et une émission par intervalle, quel que soit le débit des votes.
+    Le dernier instantané diffusé est gardé pour les clients qui rejoignent la room.
+    """
+
+    def __init__(self, app, socketio, interval=0.5, snapshot_ttl=2.0, maxsize=10000):
+        self.socketio = socketio
+        self.snapshot_ttl = snapshot_ttl
+        self.snapshots = MemoryCache(maxsize)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.writer = MessageWriter(app, socketio, self.publish, maxsize=maxsize, workers=1, batch_size=maxsize, linger=interval)
+
+    def schedule(self, poll_id):
+        with self._lock:
+            if poll_id in self._pending:
+                return
+            self._pending.add(poll_id)
+        if not self.writer.submit(poll_id):
+            # File pleine : diffusion immédiate plutôt que perdue
+            self.publish([poll_id])
+
+    def load(self, poll_ids):
+        """Instantanés {poll_id: {'poll_id', 'votes', 'total'}} en deux requêtes, rangés pour les nouveaux venus"""
+        polls = Poll.query.filter(Poll.id.in_(set(poll_ids))).all()
+        tallies = poll_tallies([poll.id for poll in polls])
+        snapshots = {}
+        for poll in polls:
+            snapshots[poll.id] = results_snapshot(poll, tallies)
+            self.snapshots.set(poll.id, snapshots[poll.id], self.snapshot_ttl)
+        return snapshots
+
+    def publish(self, poll_ids):
+        with self._lock:
+            # Retirés avant la lecture : un vote arrivé pendant la diffusion en programme une nouvelle
+            self._pending.difference_update(poll_ids)
+        for poll_id, snapshot in self.load(poll_ids).items():
+            try:
+                self.socketio.emit('poll_results', snapshot, to=f"poll_{poll_id}")
+            except Exception as e:
+                print(f"Erreur lors de la diffusion des résultats du sondage {poll_id}: {e}")
+
+    def snapshot(self, poll_id):
+        """Dernier instantané diffusé, relu en base s'il a expiré ; None si le sondage n'existe pas"""
+        return self.snapshots.get(poll_id) or self.load([poll_id]).get(poll_id)
+
+def init_poll_results(app, socketio):
+    """Résultats en direct des sondages, désactivables avec POLL_RESULTS_LIVE=false"""
+    if not app.config.get('POLL_RESULTS_LIVE', True):
+        return
+    app.extensions['poll_results'] = PollResultsPublisher(
+        app,
+        socketio,
+        interval=app.config.get('POLL_RESULTS_INTERVAL', 0.5),
+        snapshot_ttl=app.config.get('POLL_SNAPSHOT_TTL', 2.0)
+    )
+
+def schedule_poll_results(poll_id):
+    """À appeler après le commit d'un vote : programme la diffusion regroupée des résultats"""
+    publisher = current_app.extensions.get('poll_results')
+    if publisher is not None:
+        publisher.schedule(poll_id)
+
+def poll_results_snapshot(poll_id):
+    """Résultats envoyés au client qui rejoint la room, None si le sondage n'existe pas"""
+    publisher = current_app.extensions.get('poll_results')
+    if publisher is not None:
+        return publisher.snapshot(poll_id)
+    poll = db.session.get(Poll, poll_id)
+    return results_snapshot(poll) if poll else None
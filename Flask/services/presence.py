@@ -0,0 +1,133 @@
+import threading
+from flask import current_app
+
+class MemoryPresenceRegistry:
+    """
+    Registre de présence local au processus : plusieurs sids par utilisateur
+    et index inverse sid -> user_id pour un nettoyage en O(1) à la déconnexion.
+    """
+
+    def __init__(self):
+        self._sids_by_user = {}
+        self._user_by_sid = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_id, sid):
+        user_id = int(user_id)
+        with self._lock:
+            previous_user_id = self._user_by_sid.get(sid)
+            if previous_user_id is not None and previous_user_id != user_id:
+                self._discard(previous_user_id, sid)
+            self._user_by_sid[sid] = user_id
+            self._sids_by_user.setdefault(user_id, set()).add(sid)
+
+    def remove_sid(self, sid):
+        """Retire un sid, retourne l'utilisateur concerné ou None si le sid était inconnu"""
+        with self._lock:
+            user_id = self._user_by_sid.pop(sid, None)
+            if user_id is not None:
+                self._discard(user_id, sid)
+            return user_id
+
+    def _discard(self, user_id, sid):
+        sids = self._sids_by_user.get(user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_user[user_id]
+
+    def sids(self, user_id):
+        with self._lock:
+            return set(self._sids_by_user.get(int(user_id), ()))
+
+    def is_online(self, user_id):
+        with self._lock:
+            return int(user_id) in self._sids_by_user
+
+    def online_user_ids(self):
+        with self._lock:
+            return set(self._sids_by_user)
+
+class RedisPresenceRegistry:
+    """
+    Registre de présence partagé entre workers, stocké dans Redis :
+    - {prefix}:user:{user_id} : ensemble des sids de l'utilisateur
+    - {prefix}:sid:{sid} : index inverse vers l'utilisateur
+    - {prefix}:online : ensemble des utilisateurs ayant au moins un sid
+    """
+
+    # Retrait atomique d'un sid : l'utilisateur n'est plus en ligne quand son dernier sid disparaît
+    REMOVE_SID_SCRIPT = """
+    local user_id = redis.call('GET', KEYS[1])
+    if not user_id then
+        return false
+    end
+    redis.call('DEL', KEYS[1])
+    local user_key = ARGV[1] .. user_id
+    redis.call('SREM', user_key, ARGV[2])
+    if redis.call('SCARD', user_key) == 0 then
+        redis.call('SREM', ARGV[3], user_id)
+    end
+    return user_id
+    """
+
+    def __init__(self, url, prefix='presence', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("Le paquet 'redis' est requis pour un registre de présence Redis")
+            client = redis.Redis.from_url(url, decode_responses=True)
+
+        self.redis = client
+        self.prefix = prefix
+        self._remove_sid = self.redis.register_script(self.REMOVE_SID_SCRIPT)
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    def _sid_key(self, sid):
+        return f"{self.prefix}:sid:{sid}"
+
+    @property
+    def _online_key(self):
+        return f"{self.prefix}:online"
+
+    def add(self, user_id, sid):
+        user_id = int(user_id)
+        previous_user_id = self.redis.get(self._sid_key(sid))
+        if previous_user_id is not None and int(previous_user_id) != user_id:
+            self.remove_sid(sid)
+
+        pipe = self.redis.pipeline()
+        pipe.set(self._sid_key(sid), user_id)
+        pipe.sadd(self._user_key(user_id), sid)
+        pipe.sadd(self._online_key, user_id)
+        pipe.execute()
+
+    def remove_sid(self, sid):
+        """Retire un sid, retourne l'utilisateur concerné ou None si le sid était inconnu"""
+        user_id = self._remove_sid(
+            keys=[self._sid_key(sid)],
+            args=[f"{self.prefix}:user:", sid, self._online_key]
+        )
+        return int(user_id) if user_id else None
+
+    def sids(self, user_id):
+        return set(self.redis.smembers(self._user_key(int(user_id))))
+
+    def is_online(self, user_id):
+        return bool(self.redis.sismember(self._online_key, int(user_id)))
+
+    def online_user_ids(self):
+        return {int(user_id) for user_id in self.redis.smembers(self._online_key)}
+
+def create_presence_registry(url=None):
+    """Registre Redis pour une URL redis:// ou rediss://, registre en mémoire sinon"""
+    if url and url.startswith(('redis://', 'rediss://')):
+        return RedisPresenceRegistry(url)
+    return MemoryPresenceRegistry()
+
+def get_presence():
+    """Registre de présence de l'application courante"""
+    return current_app.extensions['presence']
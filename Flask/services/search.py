@@ -0,0 +1,241 @@
+import re
+import unicodedata
+from collections import Counter
+from models import db
+from models.post import Post
+from models.comment import Comment
+from models.user import User
+from models.category import Category
+from models.follow import Follow
+from models.search import SearchDocument, SearchTerm
+from services.feed import hydrate_posts
+from services.threads import load_users, serialize_thread_user
+
+SEARCH_KINDS = ('post', 'comment', 'user', 'category')
+AUTHORED_KINDS = ('post', 'comment')
+TITLE_WEIGHT = 3.0
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+MAX_TERM_LENGTH = 100
+
+def normalize_text(text):
+    """Minuscules sans accents, pour que « Étoile » et « etoile » se retrouvent"""
+    folded = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return folded.lower()
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(normalize_text(text))]
+
+def uses_postgres_fts():
+    return db.engine.dialect.name == 'postgresql'
+
+def _document_fields(obj):
+    """(kind, titre, corps, auteur, date) d'un objet indexable"""
+    if isinstance(obj, Post):
+        return 'post', obj.title, obj.content, obj.user_id, obj.published_at
+    if isinstance(obj, Comment):
+        return 'comment', '', obj.content, obj.user_id, obj.created_at
+    if isinstance(obj, User):
+        full_name = ' '.join(part for part in (obj.first_name, obj.last_name) if part)
+        return 'user', obj.pseudo or '', full_name, obj.id, None
+    if isinstance(obj, Category):
+        return 'category', obj.name, obj.description or '', None, None
+    raise ValueError(f"Objet non indexable: {obj!r}")
+
+def index_document(obj):
+    """
+    Indexe ou réindexe un post, commentaire, utilisateur ou catégorie.
+    Ne commit pas : à appeler dans la transaction qui crée ou modifie l'objet.
+    """
+    if obj.id is None:
+        db.session.flush()
+
+    kind, title, body, author_id, published_at = _document_fields(obj)
+    title_terms = tokenize(title)
+    body_terms = tokenize(body)
+
+    document = SearchDocument.query.filter_by(kind=kind, target_id=obj.id).first()
+    if not document:
+        document = SearchDocument(kind=kind, target_id=obj.id)
+        db.session.add(document)
+
+    document.author_id = author_id
+    document.title = ' '.join(title_terms)
+    document.body = ' '.join(body_terms)
+    document.published_at = published_at
+    db.session.flush()
+
+    if uses_postgres_fts():
+        return document
+
+    # Index inversé : poids = occurrences, le titre comptant TITLE_WEIGHT fois plus
+    weights = Counter()
+    for term in title_terms:
+        weights[term] += TITLE_WEIGHT
+    for term in body_terms:
+        weights[term] += 1.0
+
+    SearchTerm.query.filter_by(document_id=document.id).delete(synchronize_session=False)
+    if weights:
+        db.session.execute(
+            db.insert(SearchTerm),
+            [{'term': term, 'document_id': document.id, 'weight': weight} for term, weight in weights.items()]
+        )
+    return document
+
+def remove_document(kind, target_id):
+    """Retire un objet de l'index (sans commit)"""
+    document_ids = db.session.query(SearchDocument.id).filter_by(kind=kind, target_id=target_id)
+    SearchTerm.query.filter(SearchTerm.document_id.in_(document_ids.scalar_subquery())).delete(synchronize_session=False)
+    SearchDocument.query.filter_by(kind=kind, target_id=target_id).delete(synchronize_session=False)
+
+def remove_author_documents(user_id):
+    """Retire de l'index un utilisateur et tout ce qu'il a publié (sans commit)"""
+    conditions = db.or_(SearchDocument.author_id == user_id, db.and_(SearchDocument.kind == 'user', SearchDocument.target_id == user_id))
+    document_ids = db.session.query(SearchDocument.id).filter(conditions)
+    SearchTerm.query.filter(SearchTerm.document_id.in_(document_ids.scalar_subquery())).delete(synchronize_session=False)
+    SearchDocument.query.filter(conditions).delete(synchronize_session=False)
+
+def rebuild_search_index(batch_size=500):
+    """Reconstruit entièrement l'index de recherche à partir des tables sources"""
+    SearchTerm.query.delete(synchronize_session=False)
+    SearchDocument.query.delete(synchronize_session=False)
+    db.session.commit()
+
+    counts = {}
+    for kind, model in (('post', Post), ('comment', Comment), ('user', User), ('category', Category)):
+        counts[kind] = 0
+        last_id = 0
+        while True:
+            batch = model.query.filter(model.id > last_id).order_by(model.id.asc()).limit(batch_size).all()
+            if not batch:
+                break
+            for obj in batch:
+                index_document(obj)
+            db.session.commit()
+            counts[kind] += len(batch)
+            last_id = batch[-1].id
+
+    return counts
+
+def _postgres_matches(tokens, folded_query, kinds):
+    """Recherche plein texte (tsvector + GIN), préfixe sur chaque terme ; trigrammes si rien ne correspond"""
+    vector = db.literal_column('search_documents.search_vector')
+    ts_query = db.func.to_tsquery('simple', ' & '.join(f"{token}:*" for token in tokens))
+    rank = db.func.ts_rank_cd(vector, ts_query)
+    full_text = (
+        db.select(SearchDocument.id, rank.label('score'))
+        .where(vector.op('@@')(ts_query), SearchDocument.kind.in_(kinds))
+    )
+
+    similarity = db.func.similarity(SearchDocument.title, folded_query)
+    fuzzy = (
+        db.select(SearchDocument.id, similarity.label('score'))
+        .where(SearchDocument.title.op('%')(folded_query), SearchDocument.kind.in_(kinds))
+    )
+    return full_text, fuzzy
+
+def _inverted_index_matches(tokens, kinds):
+    """Recherche sur l'index inversé : tous les termes requis, le dernier en préfixe"""
+    token_conditions = [SearchTerm.term == token for token in tokens[:-1]]
+    token_conditions.append(SearchTerm.term.like(f"{tokens[-1]}%"))
+    matched_token = db.case(*[(condition, index) for index, condition in enumerate(token_conditions)])
+
+    return (
+        db.select(SearchTerm.document_id.label('id'), db.func.sum(SearchTerm.weight).label('score'))
+        .join(SearchDocument, SearchDocument.id == SearchTerm.document_id)
+        .where(db.or_(*token_conditions), SearchDocument.kind.in_(kinds))
+        .group_by(SearchTerm.document_id)
+        .having(db.func.count(db.distinct(matched_token)) == len(token_conditions))
+    )
+
+def _visible_to(viewer_id):
+    """
+    Exclut les posts et commentaires des comptes privés, sauf pour l'auteur lui-même
+    et ses abonnés acceptés (même règle que le fil Pour vous)
+    """
+    private_authors = db.select(User.id).where(User.private == True)
+    conditions = [SearchDocument.kind.notin_(AUTHORED_KINDS), SearchDocument.author_id.notin_(private_authors)]
+    if viewer_id:
+        followed_ids = db.select(Follow.followed_id).where(Follow.follower_id == viewer_id, Follow.status == 'accepted')
+        conditions += [SearchDocument.author_id == viewer_id, SearchDocument.author_id.in_(followed_ids)]
+    return db.or_(*conditions)
+
+def _ranked_page(matches, page, per_page, viewer_id):
+    matches = matches.subquery()
+    return db.session.execute(
+        db.select(SearchDocument.kind, SearchDocument.target_id, matches.c.score)
+        .join(matches, matches.c.id == SearchDocument.id)
+        .where(_visible_to(viewer_id))
+        .order_by(matches.c.score.desc(), SearchDocument.published_at.desc().nulls_last(), SearchDocument.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+    ).all()
+
+def search_documents(query, kinds=SEARCH_KINDS, page=1, per_page=20, viewer_id=None):
+    """
+    Recherche classée dans l'index. Retourne ([(kind, target_id, score)], has_more).
+    PostgreSQL : tsvector/GIN puis trigrammes ; autres bases : index inversé search_terms.
+    viewer_id : utilisateur connecté, qui voit aussi les comptes privés qu'il suit.
+    """
+    tokens = tokenize(query)[:10]
+    if not tokens:
+        return [], False
+
+    if uses_postgres_fts():
+        full_text, fuzzy = _postgres_matches(tokens, ' '.join(tokens), kinds)
+        rows = _ranked_page(full_text, page, per_page, viewer_id)
+        if not rows and page == 1:
+            rows = _ranked_page(fuzzy, page, per_page, viewer_id)
+    else:
+        rows = _ranked_page(_inverted_index_matches(tokens, kinds), page, per_page, viewer_id)
+
+    return [tuple(row) for row in rows[:per_page]], len(rows) > per_page
+
+def serialize_search_comment(comment, users):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat() if comment.created_at else None,
+        'post_id': comment.post_id,
+        'user_id': comment.user_id,
+        'likes_count': comment.likes_count,
+        'replies_count': comment.replies_count,
+        'user': serialize_thread_user(users.get(comment.user_id))
+    }
+
+def hydrate_results(matches):
+    """
+    Charge les objets trouvés avec une requête IN par type, dans l'ordre du classement.
+    Les documents dont l'objet source a disparu sont ignorés.
+    """
+    ids_by_kind = {kind: [target_id for match_kind, target_id, _ in matches if match_kind == kind] for kind in SEARCH_KINDS}
+    payloads = {}
+
+    if ids_by_kind['post']:
+        posts = Post.query.filter(Post.id.in_(ids_by_kind['post'])).all()
+        for post, payload in zip(posts, hydrate_posts(posts)):
+            payloads[('post', post.id)] = payload
+
+    if ids_by_kind['comment']:
+        comments = Comment.query.filter(Comment.id.in_(ids_by_kind['comment'])).all()
+        users = load_users([comment.user_id for comment in comments])
+        for comment in comments:
+            payloads[('comment', comment.id)] = serialize_search_comment(comment, users)
+
+    if ids_by_kind['user']:
+        for user in User.query.filter(User.id.in_(ids_by_kind['user'])).all():
+            payloads[('user', user.id)] = user.to_dict()
+
+    if ids_by_kind['category']:
+        for category in Category.query.filter(Category.id.in_(ids_by_kind['category'])).all():
+            payloads[('category', category.id)] = {
+                'id': category.id,
+                'name': category.name,
+                'description': category.description
+            }
+
+    return [
+        {'type': kind, 'score': float(score), 'item': payloads[(kind, target_id)]}
+        for kind, target_id, score in matches
+        if (kind, target_id) in payloads
+    ]
@@ -0,0 +1,116 @@
+import gzip
+from flask import current_app, request, has_request_context
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:
+    # orjson absent : encodeur json de la bibliothèque standard (plus lent)
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+def parse_fields(value):
+    """'id,title,user.pseudo' -> {'id': {}, 'title': {}, 'user': {'pseudo': {}}}"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for part in (part.strip() for part in path.split('.')):
+            if not part:
+                break
+            node = node.setdefault(part, {})
+    return tree
+
+def _select(data, tree):
+    if isinstance(data, list):
+        return [_select(item, tree) for item in data]
+    if not isinstance(data, dict) or not tree:
+        return data
+    return {key: _select(data[key], subtree) for key, subtree in tree.items() if key in data}
+
+def select_fields(data, tree):
+    """
+    Ne garde que les champs demandés (?fields=). Ils s'appliquent à l'objet retourné, à chaque
+    élément d'une liste, ou, pour une enveloppe comme {'posts': [...], 'nextCursor': ...} dont
+    aucune clé n'est demandée, à chaque élément de ses listes (les autres clés sont conservées).
+    """
+    if not tree:
+        return data
+    if isinstance(data, dict) and not any(key in data for key in tree):
+        if not any(isinstance(value, list) for value in data.values()):
+            # Réponse d'erreur ou objet sans rapport avec les champs demandés
+            return data
+        return {key: _select(value, tree) if isinstance(value, list) else value for key, value in data.items()}
+    return _select(data, tree)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON de l'application : encodage par orjson (sans indentation ni tri des clés),
+    dates au format HTTP comme le fournisseur par défaut de Flask, et prise en charge de ?fields=
+    pour toutes les réponses produites par jsonify.
+    """
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if has_request_context() and request.args.get('fields'):
+            obj = select_fields(obj, parse_fields(request.args['fields']))
+
+        if orjson is None:
+            return super().response(obj)
+        body = orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def _negotiate_encoding():
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    return request.accept_encodings.best_match(encodings)
+
+def compress_response(response):
+    """
+    Compresse (brotli de préférence, sinon gzip) les réponses textuelles au-delà de
+    COMPRESS_MIN_SIZE octets, selon l'en-tête Accept-Encoding du client.
+    """
+    config = current_app.config
+    if response.direct_passthrough or response.mimetype not in config.get('COMPRESS_MIMETYPES', ['application/json']):
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code < 200 or response.status_code >= 300 or 'Content-Encoding' in response.headers:
+        return response
+
+    body = response.get_data()
+    if len(body) < config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    encoding = _negotiate_encoding()
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+    elif encoding == 'gzip':
+        compressed = gzip.compress(body, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 5))
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_serialization(app):
+    """Installe le fournisseur JSON rapide et, si COMPRESS_ENABLED, la compression des réponses"""
+    app.json = FastJSONProvider(app)
+    if app.config.get('COMPRESS_ENABLED', True):
+        app.after_request(compress_response)
@@ -0,0 +1,43 @@
+import queue
+import threading
+import socketio
+
+class InProcessManager(socketio.PubSubManager):
+    """
+    File de messages Socket.IO en mémoire : les serveurs Socket.IO d'un même processus
+    abonnés au même canal se relaient leurs émissions comme des workers reliés par Redis.
+    Permet de tester le fonctionnement multi-worker sans broker.
+    """
+    name = 'inprocess'
+
+    _subscribers = {}
+    _subscribers_lock = threading.Lock()
+
+    def __init__(self, channel='flask-socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.queue = queue.Queue()
+        if not write_only:
+            with self._subscribers_lock:
+                self._subscribers.setdefault(channel, []).append(self.queue)
+
+    def _publish(self, data):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.get(self.channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(data)
+
+    def _listen(self):
+        while True:
+            yield self.queue.get()
+
+def message_queue_options(url, channel='flask-socketio'):
+    """
+    Options de SocketIO.init_app pour la file de messages configurée :
+    aucune (un seul worker), le gestionnaire en mémoire pour memory://,
+    ou l'URL du broker (Redis, RabbitMQ...) transmise à Flask-SocketIO.
+    """
+    if not url:
+        return {}
+    if url.startswith('memory://'):
+        return {'client_manager': InProcessManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+from flask import current_app, url_for
+
+CHUNK_SIZE = 64 * 1024
+# Extension des fichiers stockés, déduite du type déjà validé et jamais du nom envoyé par le client ;
+# le type servi par /api/media en est déduit : un type absent est servi en application/octet-stream
+MEDIA_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+    'video/mp4': '.mp4',
+    'video/webm': '.webm',
+    'video/quicktime': '.mov',
+    'video/ogg': '.ogv'
+}
+MEDIA_MIMETYPES = {
+    '.jpg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.gif': 'image/gif',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mov': 'video/quicktime',
+    '.ogv': 'video/ogg'
+}
+LOCAL_KEY_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$')
+# https://res.cloudinary.com/<cloud>/<resource_type>/upload/v<version>/<public_id>.<ext>
+CLOUDINARY_URL_RE = re.compile(r'/(image|video|raw)/upload/(?:v\d+/)?(.+?)(?:\.[^./]+)?$')
+
+class StorageBackend:
+    """
+    Interface des backends de stockage des médias.
+    save() reçoit un fichier (FileStorage ou objet avec read, content_type, filename)
+    et retourne l'URL publique du fichier stocké.
+    """
+    name = None
+
+    def save(self, file, timeout=None):
+        raise NotImplementedError
+
+    def delete(self, url):
+        """Retire un fichier du stockage, retourne False si le backend ne sait pas le faire"""
+        return False
+
+    def direct_upload(self, ticket, token):
+        """Requête que le client doit envoyer au stockage pour ce ticket : {'method', 'url', 'fields', 'headers'}"""
+        raise NotImplementedError
+
+    def verify_direct_upload(self, ticket):
+        """Contrôle le fichier déposé pour le ticket, retourne (empreinte, url, taille) ou lève ValueError"""
+        raise NotImplementedError
+
+class CloudinaryStorage(StorageBackend):
+    name = 'cloudinary'
+
+    def __init__(self, cloud_name, api_key, api_secret):
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+
+    @staticmethod
+    def _ticket_resource(ticket):
+        return f"uploads/{ticket.id}", 'video' if ticket.content_type.startswith('video/') else 'image'
+
+    def save(self, file, timeout=None):
+        options = {'timeout': timeout} if timeout else {}
+        response = cloudinary.uploader.upload(file, resource_type='auto', **options)
+        return response['secure_url']
+
+    def delete(self, url):
+        match = CLOUDINARY_URL_RE.search(url or '')
+        if not match:
+            return False
+        resource_type, public_id = match.groups()
+        cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        return True
+
+    def direct_upload(self, ticket, token):
+        # La signature fige public_id : le client ne peut déposer qu'à l'emplacement du ticket
+        public_id, _ = self._ticket_resource(ticket)
+        params = {'public_id': public_id, 'timestamp': int(time.time())}
+        signature = cloudinary.utils.api_sign_request(params, self.api_secret)
+        return {
+            'method': 'POST',
+            'url': f"https://api.cloudinary.com/v1_1/{self.cloud_name}/auto/upload",
+            'fields': {**params, 'api_key': self.api_key, 'signature': signature},
+            'headers': {}
+        }
+
+    def verify_direct_upload(self, ticket):
+        public_id, resource_type = self._ticket_resource(ticket)
+        try:
+            resource = cloudinary.api.resource(public_id, resource_type=resource_type)
+        except cloudinary.exceptions.NotFound:
+            raise ValueError("Aucun fichier reçu pour ce ticket")
+
+        if resource['bytes'] > ticket.max_size:
+            cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+            raise ValueError("Le fichier dépasse la taille autorisée par le ticket")
+        # Cloudinary ne donne pas de SHA-256 : l'etag (MD5, 32 caractères) sert d'empreinte
+        return resource['etag'], resource['secure_url'], resource['bytes']
+
+class LocalStorage(StorageBackend):
+    """
+    Stockage sur disque adressé par contenu : le fichier est nommé d'après son SHA-256,
+    dans une arborescence ab/cd/<sha256><ext> pour borner la taille de chaque répertoire.
+    Un contenu identique n'est écrit qu'une fois. Les fichiers sont servis par /api/media/<clé>.
+    """
+    name = 'local'
+
+    def __init__(self, root, base_url):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+        self.tmp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, key):
+        """Chemin disque d'une clé, ou None si la clé est invalide"""
+        if not LOCAL_KEY_RE.match(key):
+            return None
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def url_for(self, key):
+        return f"{self.base_url}/{key}"
+
+    def delete(self, url):
+        if not (url or '').startswith(f"{self.base_url}/"):
+            return False
+        path = self.path_for(url[len(self.base_url) + 1:])
+        if path and os.path.isfile(path):
+            os.remove(path)
+        return True
+
+    def direct_upload(self, ticket, token):
+        # Substitut local d'un stockage à URL signée : le fichier est envoyé en PUT à /api/uploads/local/<jeton>
+        return {
+            'method': 'PUT',
+            'url': url_for('uploads.local_upload', token=token, _external=True),
+            'fields': {},
+            'headers': {'Content-Type': ticket.content_type}
+        }
+
+    def verify_direct_upload(self, ticket):
+        raise ValueError("Le stockage local complète le ticket à la réception du fichier")
+
+    def _extension(self, file):
+        content_type = (file.content_type or '').split(';')[0].strip().lower()
+        return MEDIA_EXTENSIONS.get(content_type, '')
+
+    @staticmethod
+    def mimetype_for(key):
+        return MEDIA_MIMETYPES.get(os.path.splitext(key)[1], 'application/octet-stream')
+
+    def save(self, file, timeout=None):
+        digest = hashlib.sha256()
+        # Écriture en flux dans un fichier temporaire du même volume, puis renommage atomique
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            key = f"{digest.hexdigest()}{self._extension(file)}"
+            path = self.path_for(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return self.url_for(key)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+def create_storage(app):
+    backend = (app.config.get('STORAGE_BACKEND') or 'cloudinary').lower()
+    if backend == 'local':
+        return LocalStorage(app.config['LOCAL_STORAGE_ROOT'], app.config['LOCAL_STORAGE_URL'])
+    if backend == 'cloudinary':
+        return CloudinaryStorage(
+            app.config.get('CLOUDINARY_CLOUD_NAME'),
+            app.config.get('CLOUDINARY_API_KEY'),
+            app.config.get('CLOUDINARY_API_SECRET')
+        )
+    raise ValueError(f"Backend de stockage inconnu: {backend}")
+
+def init_storage(app):
+    """Instancie le backend choisi par STORAGE_BACKEND ('cloudinary' ou 'local')"""
+    app.extensions['storage'] = create_storage(app)
+    return app.extensions['storage']
+
+def get_storage():
+    return current_app.extensions['storage']
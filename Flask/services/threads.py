@@ -0,0 +1,227 @@
+from collections import defaultdict
+from flask import current_app
+from models import db
+from models.user import User
+from models.reply import Reply
+from models.reply_media import ReplyMedia
+from models.comment_media import CommentMedia
+from services.pagination import encode_cursor, decode_cursor
+from services.media_derivatives import serialize_derivatives
+
+def thread_limits(args, default_depth):
+    """Lit ?depth= et ?fanout= en les bornant par la configuration"""
+    max_depth = current_app.config.get('THREAD_MAX_DEPTH', 8)
+    depth = args.get('depth', default_depth, type=int) or default_depth
+    fanout = args.get('fanout', current_app.config.get('THREAD_FANOUT', 50), type=int) or 1
+    return max(1, min(depth, max_depth)), max(1, fanout)
+
+def serialize_thread_user(user):
+    return {
+        'id': user.id if user else None,
+        'pseudo': user.pseudo if user else None,
+        'first_name': user.first_name if user else None,
+        'last_name': user.last_name if user else None,
+        'profile_picture': user.profile_picture if user else None
+    }
+
+def serialize_thread_media(item):
+    return {
+        'id': item.id,
+        'url': item.media_url,
+        'type': item.media_type,
+        'created_at': item.created_at.isoformat() if item.created_at else None,
+        **serialize_derivatives(item.asset)
+    }
+
+def load_users(user_ids):
+    if not user_ids:
+        return {}
+    return {user.id: user for user in User.query.filter(User.id.in_(set(user_ids))).all()}
+
+def load_reply_media(reply_ids):
+    media = defaultdict(list)
+    if reply_ids:
+        for item in ReplyMedia.query.filter(ReplyMedia.replies_id.in_(set(reply_ids)), ReplyMedia.status == 'ready').order_by(ReplyMedia.id.asc()).all():
+            media[item.replies_id].append(item)
+    return media
+
+def load_comment_media(comment_ids):
+    media = defaultdict(list)
+    if comment_ids:
+        for item in CommentMedia.query.filter(CommentMedia.comment_id.in_(set(comment_ids)), CommentMedia.status == 'ready').order_by(CommentMedia.id.asc()).all():
+            media[item.comment_id].append(item)
+    return media
+
+def serialize_reply(reply, users, media):
+    return {
+        'id': reply.id,
+        'content': reply.content,
+        'created_at': reply.created_at.isoformat() if reply.created_at else None,
+        'comment_id': reply.comment_id,
+        'replies_id': reply.replies_id,
+        'user_id': reply.user_id,
+        'likes_count': reply.likes_count,
+        'replies_count': reply.replies_count,
+        'media': [serialize_thread_media(m) for m in media.get(reply.id, [])],
+        'user': serialize_thread_user(users.get(reply.user_id))
+    }
+
+def _parent_key(reply):
+    return ('reply', reply.replies_id) if reply.replies_id else ('comment', reply.comment_id)
+
+def _limited_children(conditions, fanout):
+    """Réponses des parents désignés, au plus `fanout` par parent (les plus anciennes d'abord)"""
+    rank = db.func.row_number().over(
+        partition_by=[Reply.comment_id, Reply.replies_id],
+        order_by=[Reply.created_at.asc(), Reply.id.asc()]
+    ).label('sibling_rank')
+    ranked = db.select(Reply.id, Reply.comment_id, Reply.replies_id, Reply.created_at, rank).where(db.or_(*conditions)).subquery()
+    return ranked, ranked.c.sibling_rank <= fanout
+
+def _reply_tree(root_conditions, depth, fanout):
+    """
+    Une requête récursive (CTE sur replies) : la limite de largeur s'applique dans le membre
+    récursif, via une sous-requête LATERAL ... LIMIT par parent, si bien que la base ne parcourt
+    jamais les descendants des réponses écartées.
+    """
+    anchor, kept = _limited_children(root_conditions, fanout)
+    tree = (
+        db.select(anchor.c.id, anchor.c.comment_id, anchor.c.replies_id, anchor.c.created_at, db.literal_column('1').label('depth'))
+        .where(kept)
+        .cte('reply_tree', recursive=True)
+    )
+    children = (
+        db.select(Reply.id, Reply.comment_id, Reply.replies_id, Reply.created_at)
+        .where(Reply.replies_id == tree.c.id)
+        .order_by(Reply.created_at.asc(), Reply.id.asc())
+        .limit(fanout)
+        .lateral('reply_children')
+    )
+    tree = tree.union_all(
+        db.select(children.c.id, children.c.comment_id, children.c.replies_id, children.c.created_at, tree.c.depth + 1)
+        .select_from(tree)
+        .join(children, db.true())
+        .where(tree.c.depth < depth)
+    )
+    return (
+        Reply.query
+        .join(tree, Reply.id == tree.c.id)
+        .order_by(Reply.created_at.asc(), Reply.id.asc())
+        .all()
+    )
+
+def _reply_levels(root_conditions, depth, fanout):
+    """
+    Sans LATERAL (SQLite) : une requête par niveau, limitée à `fanout` enfants par parent ;
+    seuls les enfants retenus sont développés au niveau suivant.
+    """
+    replies = []
+    conditions = root_conditions
+    for _ in range(depth):
+        ranked, kept = _limited_children(conditions, fanout)
+        level = (
+            Reply.query
+            .join(ranked, Reply.id == ranked.c.id)
+            .filter(kept)
+            .order_by(Reply.created_at.asc(), Reply.id.asc())
+            .all()
+        )
+        if not level:
+            break
+        replies.extend(level)
+        conditions = [Reply.replies_id.in_([reply.id for reply in level])]
+    return replies
+
+def load_reply_subtrees(comment_ids=(), reply_ids=(), depth=1, fanout=50):
+    """
+    Charge les réponses sous les commentaires et réponses donnés, jusqu'à `depth` niveaux et
+    `fanout` enfants par parent (limite appliquée à chaque niveau dans la requête, pas après coup),
+    puis assemble l'arbre en mémoire après un chargement groupé des auteurs et médias.
+    Retourne un dict {('comment', id) | ('reply', id): [réponses sérialisées]}.
+    """
+    root_conditions = []
+    if comment_ids:
+        root_conditions.append(Reply.comment_id.in_(list(comment_ids)))
+    if reply_ids:
+        root_conditions.append(Reply.replies_id.in_(list(reply_ids)))
+    if not root_conditions:
+        return {}
+
+    if db.engine.dialect.name == 'postgresql':
+        rows = _reply_tree(root_conditions, depth, fanout)
+    else:
+        rows = _reply_levels(root_conditions, depth, fanout)
+
+    children = defaultdict(list)
+    for reply in rows:
+        children[_parent_key(reply)].append(reply)
+
+    users = load_users([reply.user_id for reply in rows])
+    media = load_reply_media([reply.id for reply in rows])
+
+    def build(reply, level):
+        data = serialize_reply(reply, users, media)
+        if level < depth:
+            data['sub_replies'] = [build(sub_reply, level + 1) for sub_reply in children.get(('reply', reply.id), [])]
+            data['has_more_replies'] = reply.replies_count > len(data['sub_replies'])
+        else:
+            data['has_more_replies'] = reply.replies_count > 0
+        return data
+
+    roots = [('comment', comment_id) for comment_id in comment_ids] + [('reply', reply_id) for reply_id in reply_ids]
+    return {key: [build(reply, 1) for reply in children.get(key, [])] for key in roots}
+
+def load_reply_ancestors(reply):
+    """Remonte la chaîne des réponses parentes en une requête récursive, de la plus ancienne à la plus proche"""
+    if not reply.replies_id:
+        return []
+
+    chain = (
+        db.select(Reply.id, Reply.replies_id, db.literal_column('1').label('height'))
+        .where(Reply.id == reply.replies_id)
+        .cte('reply_ancestors', recursive=True)
+    )
+    parent = db.aliased(Reply)
+    chain = chain.union_all(
+        db.select(parent.id, parent.replies_id, chain.c.height + 1)
+        .where(parent.id == chain.c.replies_id)
+    )
+
+    return [
+        ancestor for ancestor, _ in
+        db.session.query(Reply, chain.c.height)
+        .join(chain, Reply.id == chain.c.id)
+        .order_by(chain.c.height.desc())
+        .all()
+    ]
+
+def page_reply_children(parent_key, cursor=None, limit=20, depth=1, fanout=50):
+    """
+    Page des enfants directs d'un commentaire ou d'une réponse, au-delà de la limite de largeur.
+    Pagination par curseur (created_at, id) croissant ; retourne (réponses, next_cursor).
+    """
+    kind, parent_id = parent_key
+    query = Reply.query.filter(Reply.comment_id == parent_id if kind == 'comment' else Reply.replies_id == parent_id)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(Reply.created_at, Reply.id) > (cursor_date, cursor_id))
+
+    rows = query.order_by(Reply.created_at.asc(), Reply.id.asc()).limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+
+    users = load_users([reply.user_id for reply in page])
+    media = load_reply_media([reply.id for reply in page])
+    subtrees = load_reply_subtrees(reply_ids=[reply.id for reply in page], depth=depth - 1, fanout=fanout) if depth > 1 else {}
+
+    result = []
+    for reply in page:
+        data = serialize_reply(reply, users, media)
+        if depth > 1:
+            data['sub_replies'] = subtrees.get(('reply', reply.id), [])
+            data['has_more_replies'] = reply.replies_count > len(data['sub_replies'])
+        else:
+            data['has_more_replies'] = reply.replies_count > 0
+        result.append(data)
+
+    return result, next_cursor
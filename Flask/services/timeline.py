@@ -0,0 +1,142 @@
+from flask import current_app
+from models import db
+from models.follow import Follow
+from models.post import Post
+from models.user import User
+from models.timeline import TimelineEntry
+from services.pagination import apply_cursor, encode_cursor
+
+def fanout_limit():
+    return current_app.config.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+def fan_out_post(post):
+    """
+    Ajoute un nouveau post au fil précalculé de chaque abonné (fan-out à l'écriture).
+    Au-delà de TIMELINE_FANOUT_MAX_FOLLOWERS abonnés, l'auteur passe en fan-out à la lecture
+    pour que le coût d'écriture reste borné.
+    """
+    try:
+        author = User.query.get(post.user_id)
+        if not author:
+            return 0
+
+        if not author.fanout_on_read:
+            followers_count = Follow.query.filter_by(followed_id=author.id, status='accepted').count()
+            if followers_count > fanout_limit():
+                # Le passage est définitif : les anciens posts de l'auteur restent lus à la lecture
+                author.fanout_on_read = True
+
+        if author.fanout_on_read:
+            db.session.commit()
+            return 0
+
+        result = db.session.execute(
+            db.insert(TimelineEntry).from_select(
+                ['user_id', 'post_id', 'author_id', 'published_at'],
+                db.select(
+                    Follow.follower_id,
+                    db.literal(post.id),
+                    db.literal(author.id),
+                    db.literal(post.published_at)
+                ).where(Follow.followed_id == author.id, Follow.status == 'accepted')
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors du fan-out du post {post.id}: {e}")
+        return 0
+
+def backfill_timeline(follower_id, followed_id):
+    """Ajoute les posts récents d'un compte au fil d'un nouvel abonné"""
+    try:
+        followed = User.query.get(followed_id)
+        if not followed or followed.fanout_on_read:
+            return
+
+        TimelineEntry.query.filter_by(user_id=follower_id, author_id=followed_id).delete(synchronize_session=False)
+
+        recent_posts = (
+            db.select(
+                db.literal(int(follower_id)),
+                Post.id,
+                Post.user_id,
+                Post.published_at
+            )
+            .where(Post.user_id == followed_id)
+            .order_by(Post.published_at.desc(), Post.id.desc())
+            .limit(current_app.config.get('TIMELINE_BACKFILL_SIZE', 200))
+        )
+        db.session.execute(
+            db.insert(TimelineEntry).from_select(
+                ['user_id', 'post_id', 'author_id', 'published_at'],
+                recent_posts
+            )
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors du remplissage du fil de {follower_id} avec les posts de {followed_id}: {e}")
+
+def prune_timeline(follower_id, followed_id):
+    """Retire du fil d'un utilisateur les posts d'un compte qu'il ne suit plus"""
+    try:
+        TimelineEntry.query.filter_by(user_id=follower_id, author_id=followed_id).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erreur lors du nettoyage du fil de {follower_id}: {e}")
+
+def rebuild_timeline(user_id):
+    """Reconstruit entièrement le fil précalculé d'un utilisateur à partir de ses abonnements"""
+    TimelineEntry.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+    followed_ids = db.session.query(Follow.followed_id).filter_by(follower_id=user_id, status='accepted').all()
+    for (followed_id,) in followed_ids:
+        backfill_timeline(user_id, followed_id)
+
+    return len(followed_ids)
+
+def read_timeline(user_id, cursor=None, per_page=20):
+    """
+    Lit une page du fil Abonnements : un parcours d'index sur timeline_entries,
+    fusionné avec les posts des comptes en fan-out à la lecture.
+    Retourne (posts, next_cursor).
+    """
+    entries_query = db.session.query(TimelineEntry.published_at, TimelineEntry.post_id).filter(
+        TimelineEntry.user_id == user_id
+    )
+    rows = (
+        apply_cursor(entries_query, TimelineEntry.published_at, TimelineEntry.post_id, cursor)
+        .order_by(TimelineEntry.published_at.desc(), TimelineEntry.post_id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+
+    fanout_on_read_ids = [
+        followed_id for (followed_id,) in
+        db.session.query(Follow.followed_id)
+        .join(User, User.id == Follow.followed_id)
+        .filter(Follow.follower_id == user_id, Follow.status == 'accepted', User.fanout_on_read == True)
+        .all()
+    ]
+
+    if fanout_on_read_ids:
+        posts_query = db.session.query(Post.published_at, Post.id).filter(Post.user_id.in_(fanout_on_read_ids))
+        rows += (
+            apply_cursor(posts_query, Post.published_at, Post.id, cursor)
+            .order_by(Post.published_at.desc(), Post.id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+
+    keys = sorted({(published_at, post_id) for published_at, post_id in rows}, reverse=True)[:per_page + 1]
+    page_keys = keys[:per_page]
+    next_cursor = encode_cursor(*page_keys[-1]) if len(keys) > per_page else None
+
+    post_ids = [post_id for _, post_id in page_keys]
+    posts_by_id = {post.id: post for post in Post.query.filter(Post.id.in_(post_ids)).all()} if post_ids else {}
+
+    return [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id], next_cursor
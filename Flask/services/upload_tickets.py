@@ -0,0 +1,263 @@
+import secrets
+import tempfile
+from datetime import datetime, timedelta
+from flask import current_app, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from werkzeug.datastructures import FileStorage
+from models import db
+from models.media_asset import MediaAsset
+from models.upload_ticket import UploadTicket
+from models.user import User
+from services.file_upload import determine_media_type
+from services.media_assets import store_media, register_asset, discard_duplicate
+from services.media_derivatives import schedule_derivatives
+from services.storage import get_storage, CHUNK_SIZE
+
+# Usage du ticket -> libellé utilisé dans les messages d'erreur
+PURPOSES = {
+    'post': 'média',
+    'comment': 'média',
+    'reply': 'média',
+    'profile_picture': 'photo de profil',
+    'banner': 'bannière'
+}
+PROFILE_PURPOSES = ('profile_picture', 'banner')
+
+def image_type_error(content_type, user_subscription, file_type='image'):
+    """Message d'erreur si le type d'image n'est pas permis pour cet abonnement, None sinon"""
+    if not content_type or not content_type.startswith('image/'):
+        return f"Le fichier doit être une image pour {file_type}."
+
+    is_gif = content_type == 'image/gif'
+
+    # Si c'est un GIF et que l'utilisateur n'a pas d'abonnement premium/plus
+    if is_gif and user_subscription not in ['plus', 'premium']:
+        return f"Les GIFs ne sont disponibles que pour les abonnements Plus et Premium. Votre {file_type} doit être une image statique (JPEG, PNG, WebP)."
+
+    # Types d'images autorisés
+    allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
+    if user_subscription in ['plus', 'premium']:
+        allowed_types.append('image/gif')
+
+    if content_type not in allowed_types:
+        if user_subscription in ['plus', 'premium']:
+            return "Format non supporté. Formats autorisés: JPEG, PNG, WebP, GIF."
+        else:
+            return "Format non supporté. Formats autorisés: JPEG, PNG, WebP. Les GIFs sont réservés aux abonnements Plus et Premium."
+
+    return None
+
+def max_upload_size(user_subscription):
+    """Taille maximale d'un fichier selon l'abonnement (UPLOAD_MAX_SIZE_FREE/PLUS/PREMIUM)"""
+    level = user_subscription if user_subscription in ('plus', 'premium') else 'free'
+    return current_app.config.get(f"UPLOAD_MAX_SIZE_{level.upper()}", 10 * 1024 * 1024)
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='upload-ticket')
+
+def issue_ticket(user_id, purpose, content_type, size=None):
+    """
+    Crée un ticket de téléversement direct et retourne (ticket, jeton signé).
+    Lève ValueError si l'usage, le type ou la taille annoncée ne sont pas permis.
+    """
+    if purpose not in PURPOSES:
+        raise ValueError(f"Usage invalide: {purpose}. Valeurs autorisées: {', '.join(PURPOSES)}")
+
+    user_id = int(user_id) if user_id is not None else None
+    user = User.query.get(user_id) if user_id is not None else None
+    if user_id is not None and not user:
+        raise ValueError("Utilisateur non trouvé")
+    # Sans utilisateur (inscription), l'abonnement est 'free'
+    user_subscription = user.subscription_level if user else 'free'
+
+    if purpose in PROFILE_PURPOSES:
+        error = image_type_error(content_type, user_subscription, PURPOSES[purpose])
+        if error:
+            raise ValueError(error)
+    else:
+        if user is None:
+            raise ValueError("Un utilisateur est requis pour ce téléversement")
+        if not determine_media_type(content_type or ''):
+            raise ValueError("Le fichier doit être une image ou une vidéo")
+
+    max_size = max_upload_size(user_subscription)
+    if size is not None and int(size) > max_size:
+        raise ValueError(f"Fichier trop volumineux: {max_size // (1024 * 1024)} Mo maximum pour l'abonnement {user_subscription}")
+
+    ticket = UploadTicket(
+        id=secrets.token_urlsafe(32),
+        user_id=user_id,
+        purpose=purpose,
+        content_type=content_type,
+        max_size=max_size,
+        expires_at=datetime.utcnow() + timedelta(seconds=current_app.config.get('UPLOAD_TICKET_TTL', 600))
+    )
+    db.session.add(ticket)
+    db.session.commit()
+    return ticket, _serializer().dumps(ticket.id)
+
+def serialize_ticket(ticket, token):
+    return {
+        'ticket_id': ticket.id,
+        # Jeton signé : seule preuve de possession d'un ticket anonyme (photo de profil à l'inscription)
+        'token': token,
+        'purpose': ticket.purpose,
+        'content_type': ticket.content_type,
+        'max_size': ticket.max_size,
+        'expires_at': ticket.expires_at.isoformat(),
+        'upload': get_storage().direct_upload(ticket, token)
+    }
+
+def _open_ticket(ticket):
+    if not ticket:
+        raise ValueError("Ticket de téléversement introuvable")
+    if ticket.expires_at < datetime.utcnow():
+        raise ValueError("Ticket de téléversement expiré")
+    return ticket
+
+def load_ticket(token):
+    """Ticket désigné par un jeton signé ; lève ValueError si le jeton est invalide ou expiré"""
+    try:
+        ticket_id = _serializer().loads(token, max_age=current_app.config.get('UPLOAD_TICKET_TTL', 600))
+    except SignatureExpired:
+        raise ValueError("Ticket de téléversement expiré")
+    except BadSignature:
+        raise ValueError("Ticket de téléversement invalide")
+    return _open_ticket(UploadTicket.query.get(ticket_id))
+
+def _complete(ticket, asset):
+    ticket.asset_id = asset.id
+    ticket.completed_at = datetime.utcnow()
+    db.session.commit()
+    return asset
+
+def store_local_upload(ticket, stream, content_type):
+    """
+    Réception d'un PUT par le substitut local : le corps est copié par blocs dans un
+    fichier temporaire, en s'arrêtant dès que la taille du ticket est dépassée.
+    """
+    if ticket.completed_at:
+        return MediaAsset.query.get(ticket.asset_id)
+    if (content_type or '').split(';')[0].strip() != ticket.content_type:
+        raise ValueError(f"Type de fichier attendu: {ticket.content_type}")
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=current_app.config.get('MEDIA_SPOOL_MAX_MEMORY', 1024 * 1024))
+    try:
+        size = 0
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > ticket.max_size:
+                raise ValueError("Le fichier dépasse la taille autorisée par le ticket")
+            spooled.write(chunk)
+        if not size:
+            raise ValueError("Fichier vide")
+
+        spooled.seek(0)
+        asset = store_media(FileStorage(stream=spooled, content_type=ticket.content_type))
+    finally:
+        spooled.close()
+    return _complete(ticket, asset)
+
+def complete_ticket(ticket_id, user_id):
+    """
+    Confirme un téléversement direct : le backend vérifie le fichier reçu, qui est enregistré
+    comme asset. Si ce contenu était déjà connu, la copie déposée est retirée du stockage.
+    """
+    ticket = _open_ticket(UploadTicket.query.get(ticket_id))
+    if ticket.user_id != (int(user_id) if user_id is not None else None):
+        raise ValueError("Ce ticket n'appartient pas à cet utilisateur")
+    if ticket.completed_at:
+        return MediaAsset.query.get(ticket.asset_id)
+
+    storage = get_storage()
+    digest, url, size = storage.verify_direct_upload(ticket)
+    asset, created = register_asset(digest, url, ticket.content_type, size)
+    if not created:
+        discard_duplicate(url, storage)
+    else:
+        schedule_derivatives(asset)
+    return _complete(ticket, asset)
+
+def request_asset_ids(data=None):
+    """Identifiants d'assets envoyés avec la requête : 'asset_ids[]' (formulaire) ou 'asset_ids' (JSON)"""
+    if data is not None:
+        values = data.get('asset_ids') or []
+    else:
+        values = request.form.getlist('asset_ids[]') or request.form.getlist('asset_ids')
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValueError("asset_ids doit être une liste d'identifiants")
+
+def claim_assets(user_id, asset_ids, purposes):
+    """
+    Rattache des assets téléversés directement : chaque asset doit provenir d'un ticket complété
+    de cet utilisateur, pour l'un des usages donnés, et pas encore consommé. Ne commit pas.
+    Retourne les assets dans l'ordre demandé ; lève ValueError sinon.
+    """
+    if not asset_ids:
+        return []
+    if user_id is None:
+        # Un identifiant d'asset séquentiel ne prouve rien : voir claim_ticket_asset()
+        raise ValueError("Un utilisateur est requis pour rattacher des assets")
+
+    tickets = UploadTicket.query.filter(
+        UploadTicket.user_id == int(user_id),
+        UploadTicket.asset_id.in_(asset_ids),
+        UploadTicket.purpose.in_(purposes),
+        UploadTicket.completed_at.isnot(None),
+        UploadTicket.consumed_at.is_(None)
+    ).all()
+    ticket_by_asset = {}
+    for ticket in tickets:
+        ticket_by_asset.setdefault(ticket.asset_id, ticket)
+
+    missing = [asset_id for asset_id in asset_ids if asset_id not in ticket_by_asset]
+    if missing or len(set(asset_ids)) != len(asset_ids):
+        raise ValueError(f"Asset(s) invalide(s) ou déjà utilisé(s): {', '.join(str(asset_id) for asset_id in missing) or 'doublon'}")
+
+    # UPDATE conditionnel : deux requêtes simultanées ne peuvent pas consommer le même ticket
+    ticket_ids = [ticket_by_asset[asset_id].id for asset_id in asset_ids]
+    consumed = UploadTicket.query.filter(
+        UploadTicket.id.in_(ticket_ids),
+        UploadTicket.consumed_at.is_(None)
+    ).update({UploadTicket.consumed_at: datetime.utcnow()}, synchronize_session=False)
+    if consumed != len(ticket_ids):
+        raise ValueError("Asset(s) déjà utilisé(s)")
+
+    assets = {asset.id: asset for asset in MediaAsset.query.filter(MediaAsset.id.in_(asset_ids)).all()}
+    return [assets[asset_id] for asset_id in asset_ids]
+
+def claim_profile_asset(user_id, asset_id, purpose):
+    """URL de l'asset réclamé pour une photo de profil ou une bannière"""
+    return claim_assets(user_id, [int(asset_id)], [purpose])[0].url
+
+def claim_ticket_asset(token, purpose):
+    """
+    URL de l'asset d'un ticket anonyme (inscription), désigné par son jeton signé et non par
+    l'identifiant de l'asset : un autre visiteur ne peut pas réclamer le fichier. Ne commit pas.
+    """
+    ticket = load_ticket(token)
+    if ticket.user_id is not None or ticket.purpose != purpose:
+        raise ValueError("Ticket de téléversement invalide pour cet usage")
+    if not ticket.completed_at:
+        raise ValueError("Téléversement non terminé")
+
+    consumed = UploadTicket.query.filter(
+        UploadTicket.id == ticket.id,
+        UploadTicket.consumed_at.is_(None)
+    ).update({UploadTicket.consumed_at: datetime.utcnow()}, synchronize_session=False)
+    if consumed != 1:
+        raise ValueError("Asset déjà utilisé")
+    return MediaAsset.query.get(ticket.asset_id).url
+
+def prepared_from_assets(assets):
+    """Médias au format de prepare_media(), pour add_media_rows()"""
+    return [
+        {'url': asset.url, 'media_type': determine_media_type(asset.content_type or ''), 'file': None, 'asset_id': asset.id}
+        for asset in assets
+        if determine_media_type(asset.content_type or '')
+    ]
@@ -0,0 +1,101 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from itertools import count
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from models import db
+from models.user import User
+from models.category import Category
+from models.post import Post
+
+TEST_DIR = tempfile.mkdtemp(prefix='twitter-like-tests-')
+
+class TestConfig(Config):
+    """Base SQLite jetable ; caches, tampons et écritures différées désactivés pour des tests déterministes"""
+    TESTING = True
+    SECRET_KEY = 'test'
+    JWT_SECRET_KEY = 'test'
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    STORAGE_BACKEND = 'local'
+    LOCAL_STORAGE_ROOT = os.path.join(TEST_DIR, 'media')
+    SOCKETIO_ASYNC_MODE = 'threading'
+    SOCKETIO_MESSAGE_QUEUE = None
+    SOCKETIO_PRESENCE_URL = None
+    CACHE_ENABLED = False
+    CACHE_REDIS_URL = None
+    CONDITIONAL_GET_ENABLED = False
+    COMPRESS_ENABLED = False
+    NOTIFICATIONS_BUFFERED = False
+    CHAT_WRITE_BEHIND = False
+    POLL_RESULTS_LIVE = False
+    MEDIA_DERIVATIVES = False
+    BCRYPT_LOG_ROUNDS = 4
+
+@pytest.fixture(scope='session')
+def app():
+    app, _ = create_app(TestConfig)
+    return app
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """Tables recréées pour chaque test"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def count_queries():
+    """Compte les requêtes SQL émises dans le bloc : with count_queries() as statements: ..."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return counter
+
+_sequence = count(1)
+
+def make_user(**fields):
+    number = next(_sequence)
+    user = User(
+        email=fields.pop('email', f"user{number}@example.com"),
+        password=fields.pop('password', 'x'),
+        first_name=fields.pop('first_name', 'Test'),
+        pseudo=fields.pop('pseudo', f"user{number}"),
+        roles=fields.pop('roles', 'user'),
+        **fields
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def make_category(name='Catégorie'):
+    category = Category(name=name, description='Description')
+    db.session.add(category)
+    db.session.commit()
+    return category
+
+def make_post(user, category, **fields):
+    post = Post(title=fields.pop('title', 'Titre'), content=fields.pop('content', 'Contenu'), user_id=user.id, category_id=category.id, **fields)
+    db.session.add(post)
+    db.session.commit()
+    return post
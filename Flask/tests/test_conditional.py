@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta
+
+from conftest import make_user, make_category, make_post
+
+def test_new_post_advances_profile_last_modified(app, client):
+    author = make_user(pseudo='auteur', updated_at=datetime.utcnow() - timedelta(days=1))
+    make_post(author, make_category(), published_at=datetime.utcnow() - timedelta(days=1))
+
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    try:
+        last_modified = client.get('/api/users/profile/auteur').headers['Last-Modified']
+        assert client.get('/api/users/profile/auteur', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+        make_post(author, make_category(), published_at=datetime.utcnow())
+        response = client.get('/api/users/profile/auteur', headers={'If-Modified-Since': last_modified})
+    finally:
+        app.config['CONDITIONAL_GET_ENABLED'] = False
+
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] != last_modified
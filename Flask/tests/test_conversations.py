@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from models import db
+from models.conversation import Conversation, ConversationParticipant
+from services.conversations import conversation_id_for
+from conftest import make_user
+
+def send(client, sender, recipient, content):
+    response = client.post('/api/chats/private', json={'sender_id': sender.id, 'recipient_id': recipient.id, 'content': content})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['chat']
+
+def unread(conversation_id, user):
+    db.session.expire_all()
+    return db.session.get(ConversationParticipant, (conversation_id, user.id)).unread_count
+
+def test_messages_update_conversation_index(client):
+    alice, bob = make_user(), make_user()
+    conversation_id = conversation_id_for(alice.id, bob.id)
+
+    send(client, alice, bob, 'Bonjour')
+    last = send(client, alice, bob, 'Ça va ?')
+
+    conversation = db.session.get(Conversation, conversation_id)
+    assert (conversation.last_message_id, conversation.messages_count) == (last['id'], 2)
+    assert (unread(conversation_id, bob), unread(conversation_id, alice)) == (2, 0)
+
+    send(client, bob, alice, 'Oui')
+    assert (unread(conversation_id, bob), unread(conversation_id, alice)) == (2, 1)
+
+    client.post(f"/api/chats/conversations/{conversation_id}/read", json={'user_id': bob.id})
+    assert unread(conversation_id, bob) == 0
+
+def test_inbox_is_ordered_by_last_message(client):
+    me = make_user()
+    others = [make_user() for _ in range(3)]
+    for other in others:
+        send(client, other, me, f"Message de {other.pseudo}")
+    send(client, others[0], me, 'Relance')
+
+    body = client.get(f"/api/chats/conversations/{me.id}").get_json()
+
+    assert [conversation['other_user']['id'] for conversation in body['conversations']] == [others[0].id, others[2].id, others[1].id]
+    assert body['conversations'][0]['last_message']['content'] == 'Relance'
+    assert body['conversations'][0]['unread_count'] == 2
+
+def inbox_cost(client, count_queries, size):
+    me = make_user()
+    for _ in range(size):
+        send(client, make_user(), me, 'Bonjour')
+    me_id = me.id
+    db.session.remove()
+    with count_queries() as statements:
+        body = client.get(f"/api/chats/conversations/{me_id}").get_json()
+    assert len(body['conversations']) == size
+    return len(statements)
+
+def test_inbox_cost_does_not_grow_with_conversations(client, count_queries, database):
+    small = inbox_cost(client, count_queries, 1)
+    database.drop_all()
+    database.create_all()
+    assert inbox_cost(client, count_queries, 15) == small
+
+def test_concurrent_first_messages_are_all_indexed(app):
+    pairs = [(make_user(), make_user()) for _ in range(5)]
+    payloads = [
+        {'sender_id': sender.id, 'recipient_id': recipient.id, 'content': f"Message {index}"}
+        for sender, recipient in pairs for index in range(4)
+    ]
+    db.session.remove()
+
+    def post(payload):
+        with app.test_client() as thread_client:
+            return thread_client.post('/api/chats/private', json=payload).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert set(executor.map(post, payloads)) == {201}
+
+    for sender, recipient in pairs:
+        conversation_id = conversation_id_for(sender.id, recipient.id)
+        assert db.session.get(Conversation, conversation_id).messages_count == 4
+        assert unread(conversation_id, recipient) == 4
+
+def test_create_chat_indexes_the_recipient(client):
+    alice, bob = make_user(), make_user()
+    conversation_id = conversation_id_for(alice.id, bob.id)
+
+    response = client.post('/api/chats', json={
+        'conversation_id': conversation_id, 'sender_id': alice.id, 'recipient_id': bob.id, 'content': 'Bonjour'
+    })
+    assert response.status_code == 201
+    assert unread(conversation_id, bob) == 1
+    assert [conversation['other_user']['id'] for conversation in client.get(f"/api/chats/conversations/{bob.id}").get_json()['conversations']] == [alice.id]
+
+    mismatch = client.post('/api/chats', json={
+        'conversation_id': conversation_id + 1, 'sender_id': alice.id, 'recipient_id': bob.id, 'content': 'Bonjour'
+    })
+    assert mismatch.status_code == 400
@@ -0,0 +1,68 @@
+from models import db
+from models.post import Post
+from models.comment import Comment
+from models.reply import Reply
+from models.like import Like
+from services.counters import reconcile_counters
+from conftest import make_user, make_category, make_post
+
+def counters(model, row_id):
+    db.session.expire_all()
+    return db.session.get(model, row_id)
+
+def test_toggles_maintain_post_counters(client):
+    author, reader = make_user(), make_user()
+    post = make_post(author, make_category())
+
+    assert client.post(f"/api/posts/{post.id}/like", json={'user_id': reader.id}).get_json()['likes_count'] == 1
+    assert client.post(f"/api/posts/{post.id}/favorite", json={'user_id': reader.id}).get_json()['favorites_count'] == 1
+    assert client.post('/api/comments', json={'content': 'Commentaire', 'post_id': post.id, 'user_id': reader.id}).status_code == 201
+    state = counters(Post, post.id)
+    assert (state.likes_count, state.favorites_count, state.comments_count) == (1, 1, 1)
+
+    assert client.post(f"/api/posts/{post.id}/like", json={'user_id': reader.id}).get_json()['likes_count'] == 0
+    assert client.post(f"/api/posts/{post.id}/favorite", json={'user_id': reader.id}).get_json()['favorites_count'] == 0
+    state = counters(Post, post.id)
+    assert (state.likes_count, state.favorites_count, state.comments_count) == (0, 0, 1)
+
+def test_replies_and_likes_maintain_thread_counters(client):
+    author, reader = make_user(), make_user()
+    post = make_post(author, make_category())
+    comment_id = client.post('/api/comments', json={'content': 'Commentaire', 'post_id': post.id, 'user_id': author.id}).get_json()['comment']['id']
+
+    reply = client.post('/api/replies', json={'content': 'Réponse', 'comment_id': comment_id, 'user_id': reader.id})
+    assert reply.status_code == 201
+    reply_id = Reply.query.filter_by(comment_id=comment_id).one().id
+    assert client.post('/api/replies', json={'content': 'Sous-réponse', 'replies_id': reply_id, 'user_id': author.id}).status_code == 201
+    client.post(f"/api/comments/{comment_id}/like", json={'user_id': reader.id})
+    client.post(f"/api/replies/{reply_id}/like", json={'user_id': author.id})
+
+    comment = counters(Comment, comment_id)
+    assert (comment.replies_count, comment.likes_count) == (1, 1)
+    reply = counters(Reply, reply_id)
+    assert (reply.replies_count, reply.likes_count) == (1, 1)
+
+def test_reconcile_repairs_drift():
+    author, reader = make_user(), make_user()
+    post = make_post(author, make_category(), likes_count=7, comments_count=3)
+    db.session.add(Like(post_id=post.id, user_id=reader.id))
+    db.session.commit()
+
+    repaired = reconcile_counters()
+
+    assert repaired['posts'] == 1
+    state = counters(Post, post.id)
+    assert (state.likes_count, state.comments_count) == (1, 0)
+    assert reconcile_counters()['posts'] == 0
+
+def test_feed_reads_counts_without_aggregates(client, count_queries):
+    author, reader = make_user(), make_user()
+    post = make_post(author, make_category())
+    client.post(f"/api/posts/{post.id}/like", json={'user_id': reader.id})
+    db.session.remove()
+
+    with count_queries() as statements:
+        body = client.get('/api/posts').get_json()
+
+    assert body[0]['likes'] == 1
+    assert not [statement for statement in statements if 'count(' in statement.lower()]
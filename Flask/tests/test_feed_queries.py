@@ -0,0 +1,67 @@
+import pytest
+
+from models import db
+from models.post_media import PostMedia
+from models.like import Like
+from models.comment import Comment
+from models.favorite import Favorite
+from models.follow import Follow
+from services.timeline import backfill_timeline
+from conftest import make_user, make_category, make_post
+
+def seed_feed(size):
+    """
+    `size` posts d'auteurs et de catégories distincts et `size` posts d'un même auteur, chacun
+    avec des médias, une mention J'aime, un commentaire et un favori du lecteur, qui suit tous les auteurs.
+    """
+    reader = make_user()
+    prolific = make_user()
+    db.session.add(Follow(follower_id=reader.id, followed_id=prolific.id, status='accepted'))
+    categories = [make_category(f"Catégorie {index}") for index in range(min(size, 5))]
+    for index in range(size):
+        author = make_user()
+        category = categories[index % len(categories)]
+        for post in (make_post(author, category, likes_count=1, comments_count=1, favorites_count=1),
+                     make_post(prolific, category, likes_count=1, comments_count=1, favorites_count=1)):
+            db.session.add_all([
+                PostMedia(post_id=post.id, media_url=f"https://example.com/{post.id}/1.jpg", media_type='image'),
+                PostMedia(post_id=post.id, media_url=f"https://example.com/{post.id}/2.jpg", media_type='image'),
+                Like(post_id=post.id, user_id=reader.id),
+                Comment(post_id=post.id, user_id=reader.id, content='Commentaire'),
+                Favorite(post_id=post.id, user_id=reader.id)
+            ])
+        db.session.add(Follow(follower_id=reader.id, followed_id=author.id, status='accepted'))
+        db.session.commit()
+        backfill_timeline(reader.id, author.id)
+    backfill_timeline(reader.id, prolific.id)
+    return reader, prolific, categories[0]
+
+FEED_ENDPOINTS = {
+    'all_posts': lambda reader, prolific, category: '/api/posts',
+    'user_posts': lambda reader, prolific, category: f"/api/users/{prolific.id}/posts",
+    'foryou': lambda reader, prolific, category: '/api/posts/foryou',
+    'foryou_legacy_page': lambda reader, prolific, category: '/api/posts/foryou?page=1',
+    'following_timeline': lambda reader, prolific, category: f"/api/posts/following/{reader.id}",
+    'following_legacy_page': lambda reader, prolific, category: f"/api/posts/following/{reader.id}?page=1",
+    'category_posts': lambda reader, prolific, category: f"/api/categories/{category.id}/posts",
+    'favorites': lambda reader, prolific, category: f"/api/users/{reader.id}/favorites",
+}
+
+def page_cost(client, count_queries, size, endpoint):
+    url = FEED_ENDPOINTS[endpoint](*seed_feed(size))
+    db.session.remove()
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+@pytest.mark.parametrize('endpoint', sorted(FEED_ENDPOINTS))
+def test_feed_page_cost_does_not_grow_with_page_size(app, database, client, count_queries, endpoint):
+    small, _ = page_cost(client, count_queries, 1, endpoint)
+    database.drop_all()
+    database.create_all()
+    large, body = page_cost(client, count_queries, 20, endpoint)
+
+    posts = body if isinstance(body, list) else body.get('posts') or body.get('favorites')
+    assert len(posts) > 1, f"{endpoint}: la page ne contient que {len(posts)} post(s)"
+    assert large == small, f"{endpoint}: {small} requêtes pour 1 post, {large} pour 20"
@@ -0,0 +1,48 @@
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from services import media_assets
+
+class RecordingStorage:
+    """Stockage qui attribue une URL distincte à chaque envoi, comme Cloudinary"""
+    def __init__(self):
+        self.saved, self.deleted = [], []
+
+    def save(self, file, timeout=None):
+        url = f"https://cdn.example.com/{len(self.saved)}.png"
+        self.saved.append(url)
+        return url
+
+    def delete(self, url):
+        self.deleted.append(url)
+        return True
+
+def upload(content):
+    return FileStorage(stream=io.BytesIO(content), filename='image.png', content_type='image/png')
+
+def test_losing_a_concurrent_upload_discards_its_copy(monkeypatch):
+    storage = RecordingStorage()
+    monkeypatch.setattr(media_assets, 'get_storage', lambda: storage)
+    register_asset = media_assets.register_asset
+
+    def register_after_competitor(digest, url, content_type=None, size=None):
+        # Un autre worker enregistre le même contenu entre la recherche et l'insertion
+        register_asset(digest, 'https://cdn.example.com/winner.png', content_type, size)
+        return register_asset(digest, url, content_type, size)
+
+    monkeypatch.setattr(media_assets, 'register_asset', register_after_competitor)
+    asset = media_assets.store_media(upload(b'contenu'))
+
+    assert asset.url == 'https://cdn.example.com/winner.png'
+    assert storage.deleted == storage.saved == ['https://cdn.example.com/0.png']
+
+def test_known_content_is_not_uploaded_again(monkeypatch):
+    storage = RecordingStorage()
+    monkeypatch.setattr(media_assets, 'get_storage', lambda: storage)
+
+    first = media_assets.store_media(upload(b'contenu'))
+    second = media_assets.store_media(upload(b'contenu'))
+
+    assert first.id == second.id
+    assert storage.saved == ['https://cdn.example.com/0.png'] and storage.deleted == []
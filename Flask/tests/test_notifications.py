@@ -0,0 +1,45 @@
+from conftest import make_user
+
+def follow(client, follower, followed):
+    assert client.post('/api/follows', json={'follower_id': follower.id, 'followed_id': followed.id}).status_code == 201
+
+def unfollow(client, follower, followed):
+    assert client.delete('/api/follows', json={'follower_id': follower.id, 'followed_id': followed.id}).status_code == 200
+
+def test_follows_are_grouped_and_unfollows_remove_actors(client):
+    followed = make_user()
+    followers = [make_user() for _ in range(3)]
+    for follower in followers:
+        follow(client, follower, followed)
+
+    [group] = client.get(f"/api/user_notifications/{followed.id}").get_json()['notifications']
+    assert group['actor_count'] == 3 and group['actor_user']['id'] == followers[-1].id
+
+    unfollow(client, followers[-1], followed)
+    unfollow(client, followers[0], followed)
+    [group] = client.get(f"/api/user_notifications/{followed.id}").get_json()['notifications']
+    assert group['actor_count'] == 1
+    assert [actor['id'] for actor in group['sample_actors']] == [followers[1].id]
+
+    unfollow(client, followers[1], followed)
+    assert client.get(f"/api/user_notifications/{followed.id}").get_json()['notifications'] == []
+
+def test_unfollow_changes_the_inbox_etag(app, client):
+    followed = make_user()
+    followers = [make_user() for _ in range(2)]
+    for follower in followers:
+        follow(client, follower, followed)
+
+    app.config['CONDITIONAL_GET_ENABLED'] = True
+    try:
+        url = f"/api/user_notifications/{followed.id}"
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+        unfollow(client, followers[0], followed)
+        response = client.get(url, headers={'If-None-Match': etag})
+    finally:
+        app.config['CONDITIONAL_GET_ENABLED'] = False
+
+    assert response.status_code == 200
+    assert response.get_json()['notifications'][0]['actor_count'] == 1
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from models import db
+from models.pollvote import PollVote
+from conftest import make_user, make_category
+
+def create_poll(client, options=('Oui', 'Non', 'Sans avis')):
+    author, category = make_user(), make_category()
+    response = client.post('/api/polls', json={
+        'question': 'Question ?', 'options': list(options), 'user_id': author.id, 'category_id': category.id
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['poll']['id']
+
+def vote(client, poll_id, user_id, option):
+    return client.post(f"/api/polls/{poll_id}/vote", json={'user_id': user_id, 'option': option})
+
+def test_second_vote_is_rejected(client):
+    poll_id = create_poll(client)
+    voter = make_user()
+
+    first = vote(client, poll_id, voter.id, 1)
+    assert first.status_code == 200 and first.get_json()['poll']['votes'] == [0, 1, 0]
+    assert vote(client, poll_id, voter.id, 2).status_code == 400
+
+    assert client.get(f"/api/polls/{poll_id}").get_json()['poll']['votes'] == [0, 1, 0]
+
+def test_concurrent_votes_are_all_counted(app, client):
+    poll_id = create_poll(client)
+    voter_ids = [make_user().id for _ in range(30)]
+    db.session.remove()
+
+    def attempt(args):
+        index, user_id = args
+        with app.test_client() as thread_client:
+            return vote(thread_client, poll_id, user_id, index % 3).status_code
+
+    # Chaque votant tente deux fois, en parallèle
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(attempt, list(enumerate(voter_ids)) * 2))
+
+    assert sorted(statuses) == [200] * 30 + [400] * 30
+    assert PollVote.query.filter_by(poll_id=poll_id).count() == 30
+    assert client.get(f"/api/polls/{poll_id}").get_json()['poll']['votes'] == [10, 10, 10]
@@ -0,0 +1,45 @@
+from models import db
+from models.comment import Comment
+from models.follow import Follow
+from services.search import index_document
+from conftest import make_user, make_category, make_post
+
+def seed_author(private):
+    author = make_user(private=private)
+    post = make_post(author, make_category(), title='Astronomie', content='Observation de Saturne')
+    comment = Comment(content='Saturne ce soir', post_id=post.id, user_id=author.id)
+    db.session.add(comment)
+    db.session.flush()
+    for obj in (author, post, comment):
+        index_document(obj)
+    db.session.commit()
+    return author
+
+def found_authors(client, viewer=None):
+    url = '/api/search?q=saturne&type=post,comment' + (f"&user_id={viewer.id}" if viewer else '')
+    return {result['item'].get('userId', result['item'].get('user_id')) for result in client.get(url).get_json()['results']}
+
+def test_private_authors_are_hidden_from_search(client):
+    public, private = seed_author(False), seed_author(True)
+    stranger, follower, pending = make_user(), make_user(), make_user()
+    db.session.add_all([
+        Follow(follower_id=follower.id, followed_id=private.id, status='accepted'),
+        Follow(follower_id=pending.id, followed_id=private.id, status='pending')
+    ])
+    db.session.commit()
+
+    assert found_authors(client) == {public.id}
+    assert found_authors(client, stranger) == {public.id}
+    assert found_authors(client, pending) == {public.id}
+    assert found_authors(client, follower) == {public.id, private.id}
+    assert found_authors(client, private) == {public.id, private.id}
+
+def test_user_search_matches_inside_pseudos(client):
+    make_user(pseudo='havenito')
+    make_user(pseudo='itouch')
+    make_user(pseudo='autre')
+
+    users = client.get('/api/users/search?q=ito').get_json()['users']
+
+    assert [user['pseudo'] for user in users] == ['itouch', 'havenito']
+    assert [user['pseudo'] for user in client.get('/api/users/search?q=NITO').get_json()['users']] == ['havenito']
@@ -0,0 +1,65 @@
+from models import db
+from models.comment import Comment
+from models.reply import Reply
+from conftest import make_user, make_category, make_post
+
+def seed_thread(width, levels):
+    """Commentaire dont chaque réponse a `width` enfants, sur `levels` niveaux"""
+    user = make_user()
+    post = make_post(user, make_category())
+    comment = Comment(content='Commentaire', post_id=post.id, user_id=user.id, replies_count=width)
+    db.session.add(comment)
+    db.session.commit()
+
+    parents = [{'comment_id': comment.id}]
+    for level in range(levels):
+        children = [
+            Reply(content='Réponse', user_id=user.id, replies_count=width if level < levels - 1 else 0, **parent)
+            for parent in parents for _ in range(width)
+        ]
+        db.session.add_all(children)
+        db.session.commit()
+        parents = [{'replies_id': reply.id} for reply in children]
+    return comment
+
+def tree_size(replies):
+    return sum(1 + tree_size(reply.get('sub_replies', [])) for reply in replies)
+
+def test_depth_and_fanout_limits(client):
+    comment = seed_thread(width=6, levels=4)
+
+    body = client.get(f"/api/comments/{comment.id}?depth=3&fanout=2").get_json()['comment']
+
+    replies = body['replies']
+    assert tree_size(replies) == 2 + 4 + 8
+    assert body['has_more_replies']
+    assert [reply['id'] for reply in replies] == sorted(reply['id'] for reply in replies)
+    deepest = replies[0]['sub_replies'][0]['sub_replies'][0]
+    assert 'sub_replies' not in deepest and deepest['has_more_replies']
+
+def test_thread_cost_does_not_grow_with_thread_width(client, count_queries, database):
+    costs = []
+    for width in (2, 8):
+        database.drop_all()
+        database.create_all()
+        comment_id = seed_thread(width=width, levels=3).id
+        db.session.remove()
+        with count_queries() as statements:
+            body = client.get(f"/api/comments/{comment_id}?depth=3&fanout=2").get_json()['comment']
+        assert tree_size(body['replies']) == 2 + 4 + 8
+        costs.append(len(statements))
+    assert costs[0] == costs[1]
+
+def test_children_beyond_fanout_are_paginated(client):
+    comment = seed_thread(width=7, levels=1)
+
+    seen, cursor = [], None
+    while True:
+        url = f"/api/comments/{comment.id}/replies?limit=3" + (f"&cursor={cursor}" if cursor else '')
+        body = client.get(url).get_json()
+        seen += [reply['id'] for reply in body['replies']]
+        cursor = body['nextCursor']
+        if not cursor:
+            break
+
+    assert seen == sorted(seen) and len(seen) == len(set(seen)) == 7
@@ -0,0 +1,49 @@
+"""
+Point d'entrée de production : Socket.IO sur un worker eventlet ou gevent.
+
+    SOCKETIO_ASYNC_MODE=eventlet python wsgi.py
+    gunicorn -k eventlet -w 1 --worker-connections 1000 wsgi:app
+
+Avec plusieurs workers, configurer SOCKETIO_MESSAGE_QUEUE (Redis) pour que les
+émissions atteignent les clients connectés aux autres workers.
+"""
+import os
+
+ASYNC_MODE = os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+
+# Le monkey-patching doit précéder tout autre import (sockets, threads, psycopg2)
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+    try:
+        from psycogreen.eventlet import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        print("psycogreen absent : les requêtes PostgreSQL bloqueront la boucle eventlet")
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        print("psycogreen absent : les requêtes PostgreSQL bloqueront la boucle gevent")
+
+from app import create_app
+
+app, socketio = create_app()
+
+if __name__ == '__main__':
+    # Nombre de connexions simultanées (greenlets) accepté par le serveur
+    server_options = {}
+    if ASYNC_MODE == 'eventlet':
+        server_options['max_size'] = app.config['WORKER_CONNECTIONS']
+    elif ASYNC_MODE == 'gevent':
+        server_options['spawn'] = app.config['WORKER_CONNECTIONS']
+
+    socketio.run(
+        app,
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT') or 5000),
+        **server_options
+    )
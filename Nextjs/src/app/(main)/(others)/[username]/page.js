@@ -85,13 +85,13 @@ export default function UserProfilePage() {
                   id: post.id,
                   title: post.title,
                   content: post.content,
-                  createdAt: post.published_at,
-                  publishedAt: post.published_at,
+                  createdAt: post.publishedAt,
+                  publishedAt: post.publishedAt,
                   media: post.media || [],
                   user: post.user, 
-                  userId: post.user_id,
+                  userId: post.userId,
                   category: post.category,
-                  categoryId: post.category_id,
+                  categoryId: post.categoryId,
                   likes: post.likes || 0,
                   comments: post.comments || 0
                 }));
@@ -10,6 +10,7 @@ export default function ClassementPage() {
   const [topUsers, setTopUsers] = useState([]);
   const [userRank, setUserRank] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [period, setPeriod] = useState('all');
 
   const API_URL = process.env.NEXT_PUBLIC_API_URL || process.env.NEXT_PUBLIC_FLASK_API_URL || 'http://localhost:5000';
 
@@ -17,12 +18,12 @@ export default function ClassementPage() {
     async function fetchClassement() {
       setLoading(true);
       try {
-        const res = await fetch(`${API_URL}/api/classement/top10`);
+        const res = await fetch(`${API_URL}/api/classement/top10?period=${period}`);
         const data = await res.json();
         setTopUsers(data.top10 || []);
 
         if (session?.user?.id) {
-          const resRank = await fetch(`${API_URL}/api/classement/user/${session.user.id}`);
+          const resRank = await fetch(`${API_URL}/api/classement/user/${session.user.id}?period=${period}`);
           const dataRank = await resRank.json();
           setUserRank(dataRank.rank);
         }
@@ -34,7 +35,7 @@ export default function ClassementPage() {
       setLoading(false);
     }
     if (status === "authenticated") fetchClassement();
-  }, [session, status, API_URL]);
+  }, [session, status, API_URL, period]);
 
   if (status === "loading" || loading) {
     return (
@@ -58,7 +59,26 @@ export default function ClassementPage() {
           🏆 Classement des utilisateurs
         </h1>
         <section className="bg-[#1b1b1b] bg-opacity-80 rounded-2xl shadow-xl p-4 sm:p-8 mb-10 w-full">
-          <h2 className="text-xl sm:text-2xl font-bold text-[#90EE90] mb-6 text-center">Top 10 des plus suivis</h2>
+          <div className="flex justify-center gap-2 mb-4">
+            {[
+              { value: 'all', label: 'Global' },
+              { value: 'month', label: 'Ce mois-ci' },
+              { value: 'week', label: 'Cette semaine' }
+            ].map(option => (
+              <button
+                key={option.value}
+                onClick={() => setPeriod(option.value)}
+                className={`px-3 py-1 rounded-full text-sm font-semibold transition-colors ${
+                  period === option.value ? 'bg-[#90EE90] text-[#181c24]' : 'bg-[#23272f] text-gray-300 hover:text-[#90EE90]'
+                }`}
+              >
+                {option.label}
+              </button>
+            ))}
+          </div>
+          <h2 className="text-xl sm:text-2xl font-bold text-[#90EE90] mb-6 text-center">
+            {period === 'all' ? 'Top 10 des plus suivis' : 'Top 10 des nouveaux abonnés'}
+          </h2>
           <div className="flex justify-center items-end gap-2 sm:gap-8 mb-12 w-full relative">
             {podium[1] && (
               <div className="flex flex-col items-center w-20 sm:w-28 z-10 relative">
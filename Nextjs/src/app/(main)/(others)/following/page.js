@@ -14,7 +14,7 @@ export default function FollowingPage() {
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState(null);
   const [hasNext, setHasNext] = useState(true);
   const [loadingMore, setLoadingMore] = useState(false);
 
@@ -39,14 +39,14 @@ export default function FollowingPage() {
     return reordered.filter(post => post !== undefined);
   };
 
-  const fetchPosts = useCallback(async (page = 1, append = false) => {
+  const fetchPosts = useCallback(async (cursor = null, append = false) => {
     if (!session?.user?.id) return;
     
     try {
       if (!append) setLoading(true);
       else setLoadingMore(true);
       
-      const response = await fetch(`${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/posts/following/${session.user.id}?page=${page}`);
+      const response = await fetch(`${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/posts/following/${session.user.id}${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
       if (!response.ok) {
         throw new Error('Erreur lors du chargement des posts');
       }
@@ -60,7 +60,7 @@ export default function FollowingPage() {
       }
       
       setHasNext(data.hasNext);
-      setCurrentPage(data.currentPage);
+      setNextCursor(data.nextCursor);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -71,9 +71,9 @@ export default function FollowingPage() {
 
   const fetchMore = useCallback(async () => {
     if (hasNext && !loadingMore) {
-      await fetchPosts(currentPage + 1, true);
+      await fetchPosts(nextCursor, true);
     }
-  }, [hasNext, loadingMore, currentPage, fetchPosts]);
+  }, [hasNext, loadingMore, nextCursor, fetchPosts]);
 
   const [isFetching] = useInfiniteScroll(fetchMore);
 
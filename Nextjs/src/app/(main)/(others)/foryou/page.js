@@ -11,7 +11,7 @@ export default function ForYouPage() {
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState(null);
   const [hasNext, setHasNext] = useState(true);
   const [loadingMore, setLoadingMore] = useState(false);
 
@@ -36,12 +36,12 @@ export default function ForYouPage() {
     return reordered.filter(post => post !== undefined);
   };
 
-  const fetchPosts = useCallback(async (page = 1, append = false) => {
+  const fetchPosts = useCallback(async (cursor = null, append = false) => {
     try {
       if (!append) setLoading(true);
       else setLoadingMore(true);
       
-      const response = await fetch(`${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/posts/foryou?page=${page}`);
+      const response = await fetch(`${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/posts/foryou${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
       if (!response.ok) {
         throw new Error('Erreur lors du chargement des posts');
       }
@@ -55,7 +55,7 @@ export default function ForYouPage() {
       }
       
       setHasNext(data.hasNext);
-      setCurrentPage(data.currentPage);
+      setNextCursor(data.nextCursor);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -66,9 +66,9 @@ export default function ForYouPage() {
 
   const fetchMore = useCallback(async () => {
     if (hasNext && !loadingMore) {
-      await fetchPosts(currentPage + 1, true);
+      await fetchPosts(nextCursor, true);
     }
-  }, [hasNext, loadingMore, currentPage, fetchPosts]);
+  }, [hasNext, loadingMore, nextCursor, fetchPosts]);
 
   const [isFetching] = useInfiniteScroll(fetchMore);
 
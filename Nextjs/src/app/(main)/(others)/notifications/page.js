@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useSession } from 'next-auth/react';
 import { useRouter } from 'next/navigation';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -10,10 +10,16 @@ import NotificationFilters from '@/components/Main/Notifications/NotificationFil
 import NotificationItem from '@/components/Main/Notifications/NotificationItem';
 import EmptyNotifications from '@/components/Main/Notifications/EmptyNotifications';
 import Notification from '@/components/Notification';
+import { useSocket } from '@/hooks/useSocket';
+
+const ALLOWED_TYPES = ['follow', 'follow_request', 'follow_request_accepted', 'comment', 'reply', 'reply_to_reply'];
 
 export default function NotificationsPage() {
   const { data: session, status } = useSession();
   const router = useRouter();
+  const { socket, isConnected } = useSocket();
+  // Dernière séquence reçue : après une reconnexion, seules les notifications suivantes sont demandées
+  const lastSeqRef = useRef(null);
   
   const [notifications, setNotifications] = useState([]);
   const [filteredNotifications, setFilteredNotifications] = useState([]);
@@ -23,14 +29,35 @@ export default function NotificationsPage() {
   const [deleteLoading, setDeleteLoading] = useState(false);
   const [showNotification, setShowNotification] = useState(false);
   const [notificationMessage, setNotificationMessage] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const markAllAsRead = useCallback(async () => {
+    if (!session?.user?.id) return;
+
+    try {
+      await fetch(
+        `${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/user_notifications/${session.user.id}/read`,
+        { method: 'POST' }
+      );
+    } catch (err) {
+      console.error('Erreur lors du marquage des notifications comme lues:', err);
+    }
+  }, [session?.user?.id]);
 
-  const fetchNotifications = useCallback(async () => {
+  const fetchNotifications = useCallback(async (cursor = null) => {
     if (!session?.user?.id) return;
 
     try {
-      setLoading(true);
+      if (cursor) {
+        setLoadingMore(true);
+      } else {
+        setLoading(true);
+      }
+      const params = new URLSearchParams();
+      if (cursor) params.set('cursor', cursor);
       const response = await fetch(
-        `${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/user_notifications/${session.user.id}`
+        `${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/user_notifications/${session.user.id}?${params.toString()}`
       );
       
       if (!response.ok) {
@@ -40,19 +67,86 @@ export default function NotificationsPage() {
       const data = await response.json();
             
       // Filtrer pour ne garder que les types autorisés
-      const allowedTypes = ['follow', 'follow_request', 'follow_request_accepted', 'comment', 'reply', 'reply_to_reply'];
-      const filteredData = data.filter(notification => 
-        allowedTypes.includes(notification.type)
+      const filteredData = (data.notifications || []).filter(notification => 
+        ALLOWED_TYPES.includes(notification.type)
       );
       
-      setNotifications(filteredData);
+      setNotifications(prev => cursor ? [...prev, ...filteredData] : filteredData);
+      setNextCursor(data.nextCursor || null);
+      if (!cursor) {
+        lastSeqRef.current = data.latest_seq ?? 0;
+      }
+
+      if (!cursor && data.unread_count > 0) {
+        markAllAsRead();
+      }
     } catch (err) {
       console.error('Erreur lors du chargement des notifications:', err);
       setError(err.message);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
-  }, [session?.user?.id]);
+  }, [session?.user?.id, markAllAsRead]);
+
+  const prependNotifications = useCallback((incoming) => {
+    const fresh = incoming.filter(notification => ALLOWED_TYPES.includes(notification.type));
+    incoming.forEach(notification => {
+      lastSeqRef.current = Math.max(lastSeqRef.current, notification.seq || 0);
+    });
+    if (fresh.length === 0) return;
+
+    // Une notification regroupée déjà affichée est remplacée et remonte en tête
+    setNotifications(prev => {
+      const updated = new Set(fresh.map(n => n.id));
+      const added = [...fresh].sort((a, b) => (b.seq || 0) - (a.seq || 0));
+      return [...added, ...prev.filter(n => !updated.has(n.id))];
+    });
+  }, []);
+
+  const fetchMissedNotifications = useCallback(async () => {
+    if (!session?.user?.id) return;
+
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const response = await fetch(
+          `${process.env.NEXT_PUBLIC_FLASK_API_URL}/api/user_notifications/${session.user.id}?after_seq=${lastSeqRef.current}`
+        );
+        if (!response.ok) return;
+
+        const data = await response.json();
+        prependNotifications(data.notifications || []);
+        hasMore = data.has_more && (data.notifications || []).length > 0;
+      }
+    } catch (err) {
+      console.error('Erreur lors du rattrapage des notifications:', err);
+    }
+  }, [session?.user?.id, prependNotifications]);
+
+  useEffect(() => {
+    if (!socket || !isConnected || !session?.user?.id) return;
+
+    const handleNotification = (notification) => {
+      prependNotifications([notification]);
+    };
+
+    const handleNotificationState = (state) => {
+      // Des notifications ont été créées pendant la déconnexion : on ne récupère que celles-là
+      if (lastSeqRef.current !== null && state.latest_seq > lastSeqRef.current) {
+        fetchMissedNotifications();
+      }
+    };
+
+    socket.on('notification', handleNotification);
+    socket.on('notification_state', handleNotificationState);
+    socket.emit('join_user', { user_id: session.user.id });
+
+    return () => {
+      socket.off('notification', handleNotification);
+      socket.off('notification_state', handleNotificationState);
+    };
+  }, [socket, isConnected, session?.user?.id, prependNotifications, fetchMissedNotifications]);
 
   useEffect(() => {
     if (status === 'unauthenticated') {
@@ -92,6 +186,7 @@ export default function NotificationsPage() {
       
       if (response.ok) {
         setNotifications([]);
+        setNextCursor(null);
         setNotificationMessage('Toutes les notifications ont été supprimées');
         setShowNotification(true);
       }
@@ -236,7 +331,7 @@ export default function NotificationsPage() {
             <div className="text-center py-12">
               <p className="text-red-400 mb-4">Erreur: {error}</p>
               <button 
-                onClick={fetchNotifications}
+                onClick={() => fetchNotifications()}
                 className="px-4 py-2 bg-[#90EE90] text-black rounded-full font-semibold hover:bg-[#7CD37C] transition-colors"
               >
                 Réessayer
@@ -264,6 +359,18 @@ export default function NotificationsPage() {
                   </motion.div>
                 ))}
               </AnimatePresence>
+
+              {nextCursor && (
+                <div className="text-center pt-2">
+                  <button
+                    onClick={() => fetchNotifications(nextCursor)}
+                    disabled={loadingMore}
+                    className="px-4 py-2 bg-[#222] text-[#90EE90] rounded-full font-semibold hover:bg-[#333] transition-colors disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Chargement...' : 'Charger plus'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </motion.div>
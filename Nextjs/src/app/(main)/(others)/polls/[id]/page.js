@@ -9,6 +9,7 @@ import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faArrowLeft, faChartBar, faClock, faVoteYea, faUser, faEye, faEyeSlash, faSpinner, faExclamationTriangle, faAlignLeft, faTag } from '@fortawesome/free-solid-svg-icons';
 import PollVoteSection from '@/components/Main/Poll/PollVoteSection';
 import PollResults from '@/components/Main/Poll/PollResults';
+import { useSocket } from '@/hooks/useSocket';
 
 export default function PollDetailPage() {
   const params = useParams();
@@ -21,6 +22,7 @@ export default function PollDetailPage() {
   const [error, setError] = useState(null);
   const [showResults, setShowResults] = useState(false);
   const [hasVoted, setHasVoted] = useState(false);
+  const { socket, isConnected } = useSocket();
 
   useEffect(() => {
     const fetchPoll = async () => {
@@ -60,6 +62,27 @@ export default function PollDetailPage() {
     fetchPoll();
   }, [pollId, session?.user?.id]);
 
+  // Résultats en direct : instantané à l'arrivée dans la room, puis mises à jour regroupées par le serveur
+  useEffect(() => {
+    if (!socket || !isConnected || !pollId) return;
+
+    const handlePollResults = (data) => {
+      setPoll((previous) => (
+        previous && String(previous.id) === String(data.poll_id)
+          ? { ...previous, votes: data.votes }
+          : previous
+      ));
+    };
+
+    socket.on('poll_results', handlePollResults);
+    socket.emit('join_poll', { poll_id: pollId });
+
+    return () => {
+      socket.emit('leave_poll', { poll_id: pollId });
+      socket.off('poll_results', handlePollResults);
+    };
+  }, [socket, isConnected, pollId]);
+
   const handleVoteSuccess = (updatedPoll) => {
     setPoll(updatedPoll);
     setHasVoted(true);
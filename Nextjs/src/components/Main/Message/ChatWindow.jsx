@@ -17,13 +17,20 @@ export default function ChatWindow({
   const [typing, setTyping] = useState(null);
   const [pendingMessages, setPendingMessages] = useState(new Map());
   const [connectionStatus, setConnectionStatus] = useState('connecting');
+  const [hasOlderMessages, setHasOlderMessages] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
+  const skipScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -87,15 +94,49 @@ export default function ChatWindow({
       
       if (data.chats) {
         setMessages(data.chats);
+        setHasOlderMessages(Boolean(data.has_more));
       }
     } catch (error) {
       console.error('Erreur lors du chargement des messages:', error);
       setMessages([]);
+      setHasOlderMessages(false);
     } finally {
       setLoading(false);
     }
   };
 
+  const loadOlderMessages = async () => {
+    const oldestMessage = messages.find(msg => msg.id && !msg.tempId);
+    if (!oldestMessage || loadingOlder) return;
+
+    try {
+      setLoadingOlder(true);
+      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
+      const response = await fetch(
+        `${apiUrl}/api/conversations/${conversation.conversation_id}/chats?before_id=${oldestMessage.id}`
+      );
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const data = await response.json();
+
+      if (data.chats) {
+        skipScrollRef.current = true;
+        setMessages(prev => {
+          const knownIds = new Set(prev.map(msg => msg.id));
+          return [...data.chats.filter(msg => !knownIds.has(msg.id)), ...prev];
+        });
+        setHasOlderMessages(Boolean(data.has_more));
+      }
+    } catch (error) {
+      console.error('Erreur lors du chargement des messages précédents:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const handleNewMessage = (messageData) => {
     console.log('Received new_message:', messageData);
     
@@ -426,6 +467,17 @@ export default function ChatWindow({
           </motion.div>
         ) : (
           <AnimatePresence>
+            {hasOlderMessages && (
+              <div className="flex justify-center">
+                <button
+                  onClick={loadOlderMessages}
+                  disabled={loadingOlder}
+                  className="text-xs text-gray-400 hover:text-[#90EE90] transition-colors disabled:opacity-50"
+                >
+                  {loadingOlder ? 'Chargement...' : 'Charger les messages précédents'}
+                </button>
+              </div>
+            )}
             {messages.map((message, index) => (
               <MessageBubble
                 key={message.tempId || message.id}
@@ -45,25 +45,31 @@ const NotificationItem = ({ notification, currentUser, onDelete, onFollowRequest
 
   const getNotificationText = (notification) => {
     const actor = notification.actor_user;
-    const actorName = actor ? 
+    let actorName = actor ? 
       (actor.first_name && actor.last_name ? 
         `${actor.first_name} ${actor.last_name}` : 
         actor.pseudo || actor.email) : 
       'Un utilisateur';
+    // Notifications regroupées : « Alice et 41 autres »
+    const othersCount = (notification.actor_count || 1) - 1;
+    if (othersCount > 0) {
+      actorName = `${actorName} et ${othersCount} autre${othersCount > 1 ? 's' : ''}`;
+    }
+    const verb = othersCount > 0 ? 'ont' : 'a';
 
     switch (notification.type) {
       case 'follow':
-        return `${actorName} a commencé à vous suivre`;
+        return `${actorName} ${verb} commencé à vous suivre`;
       case 'follow_request':
         return `${actorName} souhaite vous suivre`;
       case 'follow_request_accepted':
         return `${actorName} a accepté votre demande d'abonnement`;
       case 'comment':
-        return `${actorName} a commenté votre post`;
+        return `${actorName} ${verb} commenté votre post`;
       case 'reply':
-        return `${actorName} a répondu à votre commentaire`;
+        return `${actorName} ${verb} répondu à votre commentaire`;
       case 'reply_to_reply':
-        return `${actorName} a répondu à votre réponse`;
+        return `${actorName} ${verb} répondu à votre réponse`;
       default:
         return 'Nouvelle notification';
     }
@@ -62,6 +62,17 @@ const PostCard = ({ post, disableNavigation = false }) => {
     setShowMediaModal(true);
   };
 
+  // Déclinaisons WebP (srcSet) et aperçu flou en fond pendant le chargement, quand le serveur les fournit
+  const imageVariantProps = (media, sizes) => {
+    if (!Array.isArray(media.variants) || media.variants.length === 0) return {};
+    return {
+      srcSet: media.variants.map(v => `${v.url} ${v.width}w`).join(', '),
+      sizes,
+      loading: 'lazy',
+      style: media.placeholder ? { backgroundImage: `url(${media.placeholder})`, backgroundSize: 'cover' } : undefined
+    };
+  };
+
   const renderMedia = () => {
     const allMedia = Array.isArray(post.media) ? post.media : [];
     
@@ -94,6 +105,7 @@ const PostCard = ({ post, disableNavigation = false }) => {
             <img 
               src={src} 
               alt="" 
+              {...imageVariantProps(media, '(max-width: 640px) 100vw, 600px')}
               className="w-full rounded-lg max-h-96 object-cover group-hover:scale-105 transition-transform duration-300" 
             />
           )}
@@ -131,6 +143,7 @@ const PostCard = ({ post, disableNavigation = false }) => {
                 <img 
                   src={src} 
                   alt="" 
+                  {...imageVariantProps(media, '(max-width: 640px) 50vw, 300px')}
                   className="w-full h-32 object-cover group-hover:scale-105 transition-transform duration-300" 
                 />
               )}